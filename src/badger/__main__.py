@@ -13,6 +13,7 @@ from .actions.uninstall import plugin_remove
 from .actions.intf import show_intf
 from .actions.run import run_routine
 from .actions.config import config_settings
+from .actions.archive import rebuild_index
 
 
 def main():
@@ -49,6 +50,17 @@ def main():
     parser_routine.add_argument('-v', '--verbose', type=int, choices=[0, 1, 2],
                                 default=2, const=2, nargs='?',
                                 help='verbose level of optimization progress')
+    parser_routine.add_argument('-u', '--until', type=str, default=None,
+                                help='run until the termination condition is met, '
+                                     'one of max_eval=N, max_time=SEC, '
+                                     'max_stall=N, ftol=TOL[,window=N], '
+                                     'target=VALUE, max_std=TOL')
+    parser_routine.add_argument('--checkpoint', type=str, default=None,
+                                help='checkpoint the run to this yaml file')
+    parser_routine.add_argument('--resume', type=str, default=None,
+                                help='resume the run from this checkpoint '
+                                     '(yaml file), and keep checkpointing '
+                                     'to it unless --checkpoint is given')
     parser_routine.set_defaults(func=show_routine)
 
     # Parser for the 'generator' command
@@ -104,6 +116,11 @@ def main():
     parser_config.add_argument('key', nargs='?', type=str, default=None)
     parser_config.set_defaults(func=config_settings)
 
+    # Parser for the 'rebuild-index' command
+    parser_index = subparsers.add_parser(
+        'rebuild-index', help='resync the run index with the archive')
+    parser_index.set_defaults(func=rebuild_index)
+
     args = parser.parse_args()
     args.func(args)
 
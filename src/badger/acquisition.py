@@ -0,0 +1,137 @@
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Union
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from badger import stats
+from badger.errors import BadgerConfigError
+from badger.utils import parse_rule
+
+# Suffix of the extra observables holding the noise of the observables
+NOISE_SUFFIX = '_noise'
+
+# Reducers by name, 'percentile_80' is the default one of parse_rule
+REDUCERS = {
+    'median': stats.median,
+    'std_deviation': stats.std_deviation,
+    'median_deviation': stats.median_deviation,
+    'max': stats.max,
+    'min': stats.min,
+    'percent_80': stats.percent_80,
+    'percentile_80': stats.percent_80,
+    'percent_20': stats.percent_20,
+    'percentile_20': stats.percent_20,
+    'avg_mean': stats.avg_mean,
+    'mean': stats.mean,
+}
+
+
+def take_shots(read: Callable[[], Dict], observable_names: List[str],
+               n_shots: int, interval: float = 0,
+               concurrent: bool = False) -> np.ndarray:
+    """
+    Read the observables n_shots times, one shot every interval seconds.
+    If concurrent, a shot doesn't wait for the previous one to be done, so
+    slow reads overlap instead of delaying the following shots.
+
+    Returns an (n_shots, n_observables) array, missing readings are nan.
+    """
+    shots = np.full((n_shots, len(observable_names)), np.nan)
+
+    def record(i, obs):
+        shots[i] = np.array([obs.get(name) for name in observable_names],
+                            dtype=float)
+
+    t0 = time.monotonic()
+
+    def wait_for_shot(i):
+        delay = t0 + i * interval - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    if not concurrent:
+        for i in range(n_shots):
+            wait_for_shot(i)
+            record(i, read())
+
+        return shots
+
+    with ThreadPoolExecutor(max_workers=n_shots) as executor:
+        futures = []
+        for i in range(n_shots):
+            wait_for_shot(i)
+            futures.append(executor.submit(read))
+        for i, future in enumerate(futures):
+            record(i, future.result())
+
+    return shots
+
+
+def reduce_shots(shots: np.ndarray, observable_names: List[str],
+                 rules: Dict[str, Union[str, Dict]] = None) -> Dict[str, float]:
+    """
+    Reduce the shots of each observable to a single value with the filter
+    and reducer of its rule (see `utils.parse_rule`). The observables sharing
+    a rule are reduced together in one call.
+    """
+    rules = rules or {}
+    groups = {}
+    for i, name in enumerate(observable_names):
+        rule = parse_rule(rules.get(name, {}))
+        groups.setdefault((rule['filter'], rule['reducer']), []).append(i)
+
+    values = np.full(len(observable_names), np.nan)
+    for (filter, reducer), indices in groups.items():
+        data = shots[:, indices]
+        ignore_nan = filter == 'ignore_nan'
+        if reducer == 'none':  # no reduction, keep the last reading
+            values[indices] = data[-1]
+            continue
+
+        try:
+            reduce = REDUCERS[reducer]
+        except KeyError:
+            raise BadgerConfigError(f'Unknown reducer {reducer}')
+
+        if ignore_nan:
+            # all-nan columns are expected (a broken channel), keep them nan
+            all_nan = np.isnan(data).all(axis=0)
+            result = np.full(len(indices), np.nan)
+            if not all_nan.all():
+                result[~all_nan] = reduce(data[:, ~all_nan], axis=0,
+                                          ignore_nan=True)
+            values[indices] = result
+        else:
+            values[indices] = reduce(data, axis=0)
+
+    return dict(zip(observable_names, values.tolist()))
+
+
+class Acquisition(BaseModel):
+    """
+    Multi-shot acquisition of the observables: each observable is read
+    n_shots times and reduced per its rule, the noise (standard deviation of
+    the readings) of each observable is recorded as an extra observable.
+    """
+
+    n_shots: int = Field(1, ge=1, description="Number of readings of the observables per evaluation")
+    interval: float = Field(0, ge=0, description="Time between two readings, unit is second")
+    concurrent: bool = Field(False, description="Do not wait for a reading to be done to start the next one")
+    rules: Dict[str, Union[str, Dict]] = Field({}, description="Filter and reducer of the observables, see utils.parse_rule")
+
+    def acquire(self, read: Callable[[], Dict],
+                observable_names: List[str]) -> Dict[str, float]:
+        shots = take_shots(read, observable_names, self.n_shots,
+                           self.interval, self.concurrent)
+        obs = reduce_shots(shots, observable_names, self.rules)
+
+        with warnings.catch_warnings():  # all-nan observables
+            warnings.simplefilter('ignore', RuntimeWarning)
+            noise = stats.std_deviation(shots, axis=0, ignore_nan=True)
+        for name, value in zip(observable_names, noise.tolist()):
+            obs[name + NOISE_SUFFIX] = value
+
+        return obs
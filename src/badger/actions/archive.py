@@ -0,0 +1,14 @@
+import logging
+logger = logging.getLogger(__name__)
+
+
+def rebuild_index(args):
+    try:
+        from ..archive import rebuild_run_index
+    except Exception as e:
+        logger.error(e)
+        return
+
+    n_added, n_removed = rebuild_run_index()
+    print(f'Run index rebuilt: {n_added} run(s) added, '
+          f'{n_removed} run(s) removed')
@@ -9,6 +9,7 @@ def show_routine(args):
     try:
         from ..db import load_routine, list_routine
         from .run import run_n_archive
+        from ..termination import parse_termination_condition
     except Exception as e:
         logger.error(e)
         return
@@ -48,4 +49,15 @@ def show_routine(args):
         yprint(output)
         return
 
-    run_n_archive(routine, args.yes, False, args.verbose)
+    termination_condition = None
+    if args.until:
+        try:
+            termination_condition = parse_termination_condition(
+                args.until, routine.vocs)
+        except Exception as e:
+            print(e)
+            return
+
+    run_n_archive(routine, args.yes, False, args.verbose,
+                  termination_condition=termination_condition,
+                  checkpoint_file=args.checkpoint, resume_file=args.resume)
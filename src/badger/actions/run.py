@@ -12,12 +12,15 @@ from ..core import run_routine as run
 from ..routine import Routine
 from ..settings import read_value
 from ..errors import BadgerRunTerminatedError
+from ..termination import TerminationChecker
+from ..timing import RunTrace, phase
 
 
 def run_n_archive(routine: Routine, yes=False, save=False, verbose=2,
-                  sleep=0, flush_prompt=False):
+                  sleep=0, flush_prompt=False, termination_condition=None,
+                  checkpoint_file=None, resume_file=None):
     try:
-        from ..archive import archive_run
+        from ..archive import archive_run, archive_timing
     except Exception as e:
         logger.error(e)
         return
@@ -28,6 +31,7 @@ def run_n_archive(routine: Routine, yes=False, save=False, verbose=2,
         'ts_last_dump': None,
         'paused': False,
     }
+    trace = RunTrace()  # time spent in each phase of the steps
 
     def handler(*args):
         if storage['paused']:
@@ -39,7 +43,13 @@ def run_n_archive(routine: Routine, yes=False, save=False, verbose=2,
 
     signal.signal(signal.SIGINT, handler)
 
+    # termination_condition: see termination.parse_termination_condition
+    termination = TerminationChecker(termination_condition)
+
     def check_run_status():
+        if termination.check(routine):
+            return 2
+
         return 0
 
     def before_evaluate(candidates: DataFrame):
@@ -66,15 +76,16 @@ def run_n_archive(routine: Routine, yes=False, save=False, verbose=2,
         ts_last_dump = storage['ts_last_dump']
         if (ts_last_dump is None) or (ts_float - ts_last_dump > dump_period):
             storage['ts_last_dump'] = ts_float
-            _run = archive_run(routine, storage['states'])
-            # Try dump the interface logs
-            try:
-                path = _run['path']
-                filename = _run['filename'][:-4] + 'pickle'
-                routine.environment.interface.dump_recording(
-                    os.path.join(path, filename))
-            except Exception:
-                pass
+            with phase('dump'):
+                _run = archive_run(routine, storage['states'])
+                # Try dump the interface logs
+                try:
+                    path = _run['path']
+                    filename = _run['filename'][:-4] + 'pickle'
+                    routine.environment.interface.dump_recording(
+                        os.path.join(path, filename))
+                except Exception:
+                    pass
 
         # take a break to let the outside signal to change the status
         time.sleep(sleep)
@@ -82,20 +93,31 @@ def run_n_archive(routine: Routine, yes=False, save=False, verbose=2,
     def states_ready(states):
         storage['states'] = states
 
+    # Checkpoint the run if asked to, a resumed run carries on its checkpoint
+    checkpoint_file = checkpoint_file or resume_file
+    dump_file_callback = None
+    if checkpoint_file:
+        def dump_file_callback():
+            return checkpoint_file
+
     try:
         run(routine,
             active_callback=check_run_status,
             generate_callback=before_evaluate,
             evaluate_callback=after_evaluate,
-            states_callback=states_ready)
+            states_callback=states_ready,
+            dump_file_callback=dump_file_callback,
+            trace=trace,
+            resume_file=resume_file)
     except BadgerRunTerminatedError as e:
         logger.info(e)
     except Exception as e:
         logger.error(e)
 
     # Save the run when at least one solution has been evaluated
-    if len(routine.data):
+    if routine.data is not None and len(routine.data):
         _run = archive_run(routine, storage['states'])
+        archive_timing(_run, trace)
         # Try dump the interface logs
         try:
             path = _run['path']
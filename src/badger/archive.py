@@ -1,8 +1,16 @@
 import os
+import json
+import weakref
 import logging
 logger = logging.getLogger(__name__)
-from .db import save_run, remove_run_by_filename
-from .utils import ts_float_to_str
+from datetime import datetime
+import pandas as pd
+import yaml
+from xopt import VOCS
+from .db import save_run, save_run_record, remove_run_by_filename, get_runs, \
+    get_run_records, load_routine, get_run_vocs, get_unindexed_runs
+from .utils import ts_float_to_str, load_config, append_data, load_data, \
+    count_records, run_names_to_dict, get_best_objective
 from .settings import read_value
 from .routine import Routine
 from .errors import BadgerConfigError
@@ -17,13 +25,37 @@ elif not os.path.exists(BADGER_ARCHIVE_ROOT):
     logger.info(
         f'Badger run root {BADGER_ARCHIVE_ROOT} created')
 
+# Routine (weakref) and number of data records archived, per run data file
+_n_archived = {}
+
+
+def get_data_filename(run_fname):
+    # The evaluated points of a run are stored as json lines next to the
+    # routine header: BadgerOpt-<ts>.yaml -> BadgerOpt-<ts>.jsonl
+    return os.path.splitext(run_fname)[0] + '.jsonl'
+
+
+def get_timing_filename(run_fname):
+    # The timing trace of a run is stored next to its data:
+    # BadgerOpt-<ts>.yaml -> BadgerOpt-<ts>.timing.jsonl
+    return os.path.splitext(run_fname)[0] + '.timing.jsonl'
+
+
+def archive_timing(run, trace):
+    # run: archived run, as returned by archive_run
+    # trace: RunTrace of the run
+    trace.dump(os.path.join(run['path'], get_timing_filename(run['filename'])))
+
 
 def archive_run(routine, states=None):
     # routine: Routine
+    #
+    # The run is stored as a routine header (yaml, written once) plus an
+    # append-only data file holding one record per evaluated point, so
+    # archiving periodically during a run only writes the new points
 
     data = routine.sorted_data
-    data_dict = data.to_dict('list')
-    ts_float = data_dict['timestamp'][0]  # time of the first evaluated point
+    ts_float = data['timestamp'].iloc[0]  # time of the first evaluated point
     suffix = ts_float_to_str(ts_float, "lcls-fname")
     tokens = suffix.split('-')
     first_level = tokens[0]
@@ -35,7 +67,8 @@ def archive_run(routine, states=None):
     run = {
         'filename': fname,
         'routine': routine,
-        'data': data_dict,
+        'data': data,
+        'path': path,
     }
     rid = save_run(run)
     run = {'id': rid, **run}  # Put id in front
@@ -43,76 +76,219 @@ def archive_run(routine, states=None):
         run['system_states'] = states
 
     os.makedirs(path, exist_ok=True)
-    routine.dump(os.path.join(path, fname))
-
-    # Temporarily add path information
-    # Do not save this info in database or on disk
-    run['path'] = path
+    header_file = os.path.join(path, fname)
+    data_file = os.path.join(path, get_data_filename(fname))
+    owner, n_archived = _n_archived.get(data_file, (None, None))
+    if owner is None or owner() is not routine:
+        if n_archived is not None or not os.path.exists(header_file):
+            # A new run, overwrite whatever is archived under the same name
+            header = json.loads(routine.json())
+            header.pop('data', None)
+            with open(header_file, 'w') as f:
+                yaml.dump(header, f, default_flow_style=None, sort_keys=False)
+            open(data_file, 'w').close()
+            n_archived = 0
+        else:  # resuming an archive created by another process
+            n_archived = count_records(data_file)
+    append_data(data_file, data.iloc[n_archived:])
+    _n_archived[data_file] = (weakref.ref(routine), len(data))
 
     return run
 
 
 def list_run():
-    runs = {}
-    # Get years, latest first
-    years = sorted([p for p in os.listdir(BADGER_ARCHIVE_ROOT)
-                   if os.path.isdir(os.path.join(BADGER_ARCHIVE_ROOT, p))], reverse=True)
-    for year in years:
-        path_year = os.path.join(BADGER_ARCHIVE_ROOT, year)
-        months = sorted([p for p in os.listdir(path_year) if os.path.isdir(
-            os.path.join(path_year, p))], reverse=True)
-        runs[year] = {}
-        for month in months:
-            path_month = os.path.join(path_year, month)
-            days = sorted([p for p in os.listdir(path_month) if os.path.isdir(
-                os.path.join(path_month, p))], reverse=True)
-            runs[year][month] = {}
-            for day in days:
-                path_day = os.path.join(path_month, day)
-                files = [p for p in os.listdir(path_day) if os.path.splitext(p)[
-                    1] == '.yaml']
-                files = sorted(files, key=lambda f: os.path.getmtime(
-                    os.path.join(path_day, f)), reverse=True)
-                runs[year][month][day] = files
-
-    return runs
+    # Query the run catalog instead of walking the archive
+    return run_names_to_dict(get_runs())
 
 
-def load_run(run_fname):
-    tokens = run_fname.split('-')
-    first_level = tokens[1]
-    second_level = f'{tokens[1]}-{tokens[2]}'
-    third_level = f'{tokens[1]}-{tokens[2]}-{tokens[3]}'
+def read_run_files(path, run_fname):
+    # Routine config (without data) and data of an archived run
+    configs = load_config(os.path.join(path, run_fname))
+    data_file = os.path.join(path, get_data_filename(run_fname))
+    if os.path.exists(data_file):
+        configs.pop('data', None)
+        data = load_data(data_file)
+    else:  # runs archived in a single yaml file
+        data = pd.DataFrame(configs.pop('data', None) or {})
+        data.index = data.index.astype(int)
+        data = data.sort_index()
 
-    filename = os.path.join(BADGER_ARCHIVE_ROOT,
-                            first_level,
-                            second_level,
-                            third_level,
-                            run_fname)
+    return configs, data
 
-    routine = Routine.from_file(filename)
 
-    return routine
+def read_run_record(path, run_fname):
+    # Catalog record of an archived run, read from the files
+    configs, data = read_run_files(path, run_fname)
+    timestamps = data['timestamp']
+    vocs = VOCS(**configs['vocs'])
 
+    return {
+        'filename': run_fname,
+        'savedAt': datetime.fromtimestamp(timestamps.iloc[0]),
+        'finishedAt': datetime.fromtimestamp(timestamps.iloc[-1]),
+        'routine': configs['name'],
+        'path': path,
+        'environment': configs['environment']['name'],
+        'n_points': len(data),
+        'best': get_best_objective(vocs, data),
+        'vocs': get_run_vocs(vocs),
+    }
 
-def delete_run(run_fname):
+
+def rebuild_run_index():
+    """Resync the run catalog with the runs in the archive.
+
+    Returns the numbers of runs added to and removed from the catalog.
+    """
+    runs = {}  # filename -> path
+    for path, _, files in os.walk(BADGER_ARCHIVE_ROOT):
+        for f in files:
+            if f.startswith('BadgerOpt-') and f.endswith('.yaml'):
+                runs[f] = path
+
+    catalog = {record['filename']: record['path']
+               for record in get_run_records()}
+    unindexed = set(get_unindexed_runs())
+
+    n_removed = 0
+    for run_fname in catalog.keys() - runs.keys():
+        remove_run_by_filename(run_fname)
+        n_removed += 1
+
+    n_added = 0
+    for run_fname, path in runs.items():
+        if catalog.get(run_fname) == path and run_fname not in unindexed:
+            continue
+
+        try:
+            save_run_record(read_run_record(path, run_fname))
+        except Exception as e:
+            logger.warning(f'Failed to index run {run_fname}: {e}')
+            continue
+        if run_fname not in catalog:
+            n_added += 1
+
+    return n_added, n_removed
+
+
+def get_run_path(run_fname):
     tokens = run_fname.split('-')
     first_level = tokens[1]
     second_level = f'{tokens[1]}-{tokens[2]}'
     third_level = f'{tokens[1]}-{tokens[2]}-{tokens[3]}'
 
+    return os.path.join(BADGER_ARCHIVE_ROOT, first_level, second_level,
+                        third_level)
+
+
+def load_run(run_fname):
+    path = get_run_path(run_fname)
+    configs, data = read_run_files(path, run_fname)
+    if len(data):
+        configs['data'] = data.to_dict('list')
+
+    return Routine(**configs)
+
+
+class LazyRoutine:
+    """Stand-in for the routine of an archived run.
+
+    Metadata and data are read from the run files only, the routine itself
+    (generator, environment, interface) is instantiated on first access to
+    anything else, e.g. when rerunning or editing it. The full routine is
+    the saved one of the same name with the run data, as the run's own
+    routine config could be outdated.
+    """
+
+    def __init__(self, run_fname):
+        configs, data = read_run_files(get_run_path(run_fname), run_fname)
+        if data.index.dtype.kind != 'i':  # empty run
+            data.index = data.index.astype(int)
+
+        object.__setattr__(self, 'filename', run_fname)
+        object.__setattr__(self, '_configs', configs)
+        object.__setattr__(self, '_data', data)
+        object.__setattr__(self, '_vocs', VOCS(**configs['vocs']))
+        object.__setattr__(self, '_routine', None)
+
+    @property
+    def routine(self):
+        if self._routine is None:
+            routine, _ = load_routine(self.name)
+            if routine is None:  # routine has been removed
+                routine = Routine(**self._configs)
+            routine.data = self._data
+            object.__setattr__(self, '_routine', routine)
+
+        return self._routine
+
+    def _get(self, name, default=None):
+        if self._routine is not None:
+            return getattr(self._routine, name)
+
+        return self._configs.get(name, default)
+
+    @property
+    def name(self):
+        return self._get('name')
+
+    @property
+    def description(self):
+        return self._get('description')
+
+    @property
+    def tags(self):
+        return self._get('tags')
+
+    @property
+    def critical_constraint_names(self):
+        return self._get('critical_constraint_names', [])
+
+    @property
+    def vocs(self):
+        return self._vocs if self._routine is None else self._routine.vocs
+
+    @property
+    def data(self):
+        return self._data if self._routine is None else self._routine.data
+
+    @property
+    def sorted_data(self):
+        # data is read in order
+        return self._data if self._routine is None else \
+            self._routine.sorted_data
+
+    def __getattr__(self, name):
+        if name.startswith('__'):  # do not load the routine for protocols
+            raise AttributeError(name)
+
+        return getattr(self.routine, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.routine, name, value)
+
+    def __delattr__(self, name):
+        if self._routine is None:
+            raise AttributeError(name)
+
+        delattr(self._routine, name)
+
+
+def delete_run(run_fname):
     # Remove record from the database
     remove_run_by_filename(run_fname)
 
-    prefix = os.path.join(BADGER_ARCHIVE_ROOT, first_level,
-                          second_level, third_level)
+    prefix = get_run_path(run_fname)
 
-    # Try remove the pickle file (could exist or not)
+    # Try remove the pickle, data and timing files (could exist or not)
     pickle_fname = os.path.splitext(run_fname)[0] + '.pickle'
-    try:
-        os.remove(os.path.join(prefix, pickle_fname))
-    except FileNotFoundError:
-        pass
+    for fname in [pickle_fname, get_data_filename(run_fname),
+                  get_timing_filename(run_fname)]:
+        try:
+            os.remove(os.path.join(prefix, fname))
+        except FileNotFoundError:
+            pass
+    _n_archived.pop(os.path.join(prefix, get_data_filename(run_fname)), None)
 
     # Remove the yaml data file
     os.remove(os.path.join(prefix, run_fname))
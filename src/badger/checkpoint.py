@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+import tempfile
+
+import pandas as pd
+import yaml
+from xopt import VOCS
+from xopt.generators import get_generator
+
+from badger.errors import BadgerRoutineError
+from badger.utils import append_data, load_config, load_data
+
+logger = logging.getLogger(__name__)
+
+# Generator fields derived from the data, rebuilt on restart, so not part of
+# the checkpoint (they would change, and grow, at every step)
+DERIVED_GENERATOR_FIELDS = {'model', 'computation_time'}
+
+
+def get_checkpoint_data_filename(dump_file):
+    # The evaluated points are appended next to the state:
+    # xopt_states.yaml -> xopt_states.jsonl
+    return os.path.splitext(dump_file)[0] + '.jsonl'
+
+
+def write_atomic(filename, text):
+    """Replace the content of filename, readers never see a partial file"""
+    dirname = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_file = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, filename)
+    except BaseException:
+        os.remove(tmp_file)
+        raise
+
+
+class Checkpoint:
+    """
+    Incremental checkpoint of a run. The state (generator and VOCS) is
+    written to the dump file (yaml) only when it changes, the evaluated
+    points are appended to a data file next to it (see
+    `get_checkpoint_data_filename`), so a checkpoint costs the same at every
+    step however long the run.
+    """
+
+    def __init__(self, dump_file):
+        self.dump_file = dump_file
+        self.data_file = get_checkpoint_data_filename(dump_file)
+        self._state = None  # last state written
+
+        # A new run, drop the points of whatever was checkpointed before
+        open(self.data_file, 'w').close()
+
+    def update(self, generator, data: pd.DataFrame = None):
+        """Checkpoint the current state and the newly evaluated points"""
+        # The generator serializer ignores exclude=, drop the fields here
+        generator_state = json.loads(generator.model_dump_json())
+        for field in DERIVED_GENERATOR_FIELDS:
+            generator_state.pop(field, None)
+
+        state = yaml.dump({
+            'generator': {
+                'name': type(generator).name,
+                type(generator).name: generator_state,
+            },
+            'vocs': json.loads(generator.vocs.model_dump_json()),
+            'data_file': os.path.basename(self.data_file),
+        })
+        # Points first, a state on disk never misses any of its points
+        append_data(self.data_file, data)
+        if state != self._state:
+            write_atomic(self.dump_file, state)
+            self._state = state
+            logger.debug(f'Dumped state to YAML file: {self.dump_file}')
+
+
+def load_checkpoint(dump_file):
+    """
+    Load a checkpoint (or a state dumped by former versions, with the data
+    in the yaml file), return the generator, with the checkpointed points
+    added, and the points.
+    """
+    configs = load_config(dump_file)
+    if 'data_file' in configs:
+        data_file = os.path.join(os.path.dirname(dump_file),
+                                 configs['data_file'])
+        data = load_data(data_file)
+    else:
+        data = pd.DataFrame(configs.get('data') or {})
+        data.index = data.index.astype(int)
+        data = data.sort_index()
+
+    vocs = VOCS(**configs['vocs'])
+    name = configs['generator']['name']
+    generator = get_generator(name).model_validate(
+        {**configs['generator'][name], 'vocs': vocs})
+    if len(data):
+        generator.add_data(data)
+
+    return generator, data
+
+
+def resume_from_checkpoint(routine, dump_file) -> int:
+    """
+    Pick up a run from its checkpoint: the checkpointed points become the
+    routine data and the generator gets its checkpointed state. The VOCS of
+    the checkpoint should be the one of the routine. Return the number of
+    points loaded.
+    """
+    generator, data = load_checkpoint(dump_file)
+    if generator.vocs != routine.vocs:
+        raise BadgerRoutineError(
+            f'The checkpoint {dump_file} is not a run of routine '
+            f'{routine.name}, the VOCS are different')
+
+    generator.vocs = routine.vocs
+    routine.generator = generator
+    routine.data = data if len(data) else None
+
+    return len(data)
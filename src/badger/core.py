@@ -1,18 +1,82 @@
+import logging
+import threading
 import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
 from typing import Callable
 
 from pandas import concat, DataFrame
+from xopt.evaluator import validate_outputs
+from xopt.utils import explode_all_columns
 
+from badger.checkpoint import Checkpoint, resume_from_checkpoint
 from badger.errors import (
+    BadgerRoutineError,
     BadgerRunTerminatedError,
 )
 from badger.routine import Routine
+from badger.timing import RunTrace, phase, record_evaluation, record_value
 from badger.logger import _get_default_logger
 from badger.logger.event import Events
-from badger.utils import (
-    curr_ts_to_str,
-    dump_state,
-)
+from badger.utils import curr_ts_to_str
+
+logger = logging.getLogger(__name__)
+
+
+# Interval to poll an active callback that doesn't block while paused (s)
+PAUSE_POLL_INTERVAL = 0.1
+
+
+class RunControl:
+    """
+    Pause/resume/stop control of a run, shared between the thread running the
+    optimization and the ones controlling it. While paused, the run blocks in
+    `wait` until it's resumed or stopped, instead of polling.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._paused = False
+        self._killed = False
+
+    @property
+    def is_paused(self) -> bool:
+        return self._paused
+
+    @property
+    def is_killed(self) -> bool:
+        return self._killed
+
+    def pause(self):
+        with self._cond:
+            self._paused = True
+
+    def resume(self):
+        with self._cond:
+            self._paused = False
+            self._cond.notify_all()
+
+    def stop(self):
+        with self._cond:
+            self._killed = True
+            self._cond.notify_all()
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Block while the run is paused, until it's resumed or stopped. Return
+        False if the run is still paused after timeout (in seconds).
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._paused or self._killed, timeout)
+
+    def status(self) -> int:
+        # Same convention as the active callback of run_routine
+        if self._killed:
+            return 2
+        elif self._paused:
+            return 1
+        else:
+            return 0
 
 
 def check_run_status(active_callback):
@@ -21,22 +85,20 @@ def check_run_status(active_callback):
         if status == 2:
             raise BadgerRunTerminatedError
         elif status == 1:
-            time.sleep(0)
-            continue
+            # the callback is expected to block while paused, don't spin if
+            # it doesn't
+            time.sleep(PAUSE_POLL_INTERVAL)
         else:
             break
 
 
-def convert_to_solution(result: DataFrame, routine: Routine):
+def convert_to_solution(result: DataFrame, routine: Routine, idx: int = None):
+    # idx: index of the result in the routine data, default to the last one
     vocs = routine.vocs
-    try:
-        best_idx, _ = vocs.select_best(routine.sorted_data, n=1)
-        if best_idx != len(routine.data) - 1:
-            is_optimal = False
-        else:
-            is_optimal = True
-    except NotImplementedError:
-        is_optimal = False  # disable the optimal highlight for MO problems
+    if idx is None:
+        idx = len(routine.data) - 1
+    # on the Pareto front for MO problems
+    is_optimal = routine.tracker.is_optimal(idx)
 
     vars = list(result[vocs.variable_names].to_numpy()[0])
     objs = list(result[vocs.objective_names].to_numpy()[0])
@@ -52,6 +114,15 @@ def convert_to_solution(result: DataFrame, routine: Routine):
     return solution
 
 
+def log_results(opt_logger, result: DataFrame, routine: Routine):
+    # Log the evaluated points one by one
+    idx_first = len(routine.data) - len(result)
+    for i in range(len(result)):
+        solution = convert_to_solution(result.iloc[[i]], routine,
+                                       idx_first + i)
+        opt_logger.update(Events.OPTIMIZATION_STEP, solution)
+
+
 def run_routine(
         routine: Routine,
         active_callback: Callable,
@@ -60,6 +131,8 @@ def run_routine(
         states_callback: Callable,
         dump_file_callback: Callable = None,
         verbose: int = 2,
+        trace: RunTrace = None,
+        resume_file: str = None,
 ) -> None:
     """
     Run the provided routine object using Xopt.
@@ -75,6 +148,8 @@ def run_routine(
         0: proceed
         1: paused
         2: killed
+        The callback should block while the run is paused (see `RunControl`),
+        if it returns 1 instead it's polled every `PAUSE_POLL_INTERVAL`.
 
     generate_callback : Callable
         Callback function called after generating candidate points that takes
@@ -86,10 +161,41 @@ def run_routine(
 
     states_callback : Callable
         Callback function called after system states is fetched
+
+    trace : RunTrace, optional
+        Timing trace of the run, a record with the time spent in each phase
+        is added to it per optimization step. The time spent in the
+        evaluation phases of each point is also stored in the data, see
+        `timing.TIMING_PREFIX`.
+
+    resume_file : str, optional
+        Checkpoint (dump file) of a previous run of the routine to pick up
+        from, see `checkpoint.resume_from_checkpoint`. The checkpointed points
+        are the data of the run so far, the initial points are skipped.
+
+    Notes
+    -----
+    If `routine.batch_size` is larger than 1, the generator is asked for that
+    many candidates per step, the candidates are evaluated as a batch (in one
+    go if the environment implements `evaluate_batch`) and added to the
+    routine data in a single `add_data` call. The callbacks are called once
+    per batch.
+
+    If `routine.pipeline` is True (and the generator does not depend on the
+    result of the last step), the next candidates are generated while the
+    current ones are being evaluated, see `run_pipeline`.
     """
 
     environment = routine.environment
+    if trace is None:
+        trace = RunTrace()
     initial_points = routine.initial_points
+    batch_size = routine.batch_size
+
+    if batch_size > 1 and not routine.generator.supports_batch_generation:
+        raise BadgerRoutineError(
+            f'Generator {routine.generator.name} does not support '
+            f'batch generation (batch size = {batch_size})')
 
     # Log the optimization progress in terminal
     opt_logger = _get_default_logger(verbose)
@@ -99,6 +205,16 @@ def run_routine(
     if states_callback and (states is not None):
         states_callback(states)
 
+    if resume_file:
+        n_resumed = resume_from_checkpoint(routine, resume_file)
+        logger.info(f'Resumed from {resume_file} with {n_resumed} points')
+        initial_points = DataFrame()
+
+    # Give the points of the archived runs to the generator if asked to
+    n_warm = routine.preload_warm_start()
+    if n_warm:
+        logger.info(f'Warm started with {n_warm} archived points')
+
     # Optimization starts
     print('')
     solution_meta = (None, None, None, None, None,
@@ -108,59 +224,216 @@ def run_routine(
                      routine.vocs.observable_names)
     opt_logger.update(Events.OPTIMIZATION_START, solution_meta)
 
-    # evaluate initial points:
-    # Nikita: more care about the setting var logic,
-    # wait or consider timeout/retry
-    # TODO: need to evaluate a single point at the time
-    for _, ele in initial_points.iterrows():
-        result = routine.evaluate_data(ele.to_dict())
-        solution = convert_to_solution(result, routine)
-        opt_logger.update(Events.OPTIMIZATION_STEP, solution)
-        if evaluate_callback:
-            evaluate_callback(result)
-
     # Prepare for dumping file
+    checkpoint = None
     if dump_file_callback:
-        combined_results = None
         ts_start = curr_ts_to_str()
         dump_file = dump_file_callback()
         if not dump_file:
             dump_file = f"xopt_states_{ts_start}.yaml"
+        checkpoint = Checkpoint(dump_file)
+        if resume_file:  # the new checkpoint carries on the resumed one
+            checkpoint.update(routine.generator, routine.data)
 
-    # perform optimization
-    try:
-        while True:
-            status = active_callback()
-            if status == 2:
-                raise BadgerRunTerminatedError
-            elif status == 1:
-                time.sleep(0)
-                continue
-
-            # generate points to observe
-            candidates = routine.generator.generate(1)[0]
-            candidates = DataFrame(candidates, index=[0])
-            # generate_callback(generator, candidates)
-            generate_callback(candidates)
-
-            check_run_status(active_callback)
-            # if still active evaluate the points and add to generator
-            # check active_callback evaluate point
-            result = routine.evaluate_data(candidates)
-            solution = convert_to_solution(result, routine)
-            opt_logger.update(Events.OPTIMIZATION_STEP, solution)
+    def process_result(result):
+        record_evaluation(result)
+        with phase('callbacks'):
+            log_results(opt_logger, result, routine)
             if evaluate_callback:
                 evaluate_callback(result)
 
-            # Dump Xopt state after each step
-            if dump_file_callback:
-                if combined_results is not None:
-                    combined_results = concat([combined_results, result],
-                                              axis=0).reset_index(drop=True)
-                else:
-                    combined_results = result
+        # Checkpoint Xopt state after each step, see `load_checkpoint`
+        if checkpoint:
+            with phase('dump'):
+                checkpoint.update(routine.generator, result)
+
+    # evaluate initial points:
+    # setting the variables waits for their readbacks to settle if the env
+    # configures readback tolerances, see Environment._wait_for_variables
+    # TODO: need to evaluate a single point at the time
+    for _, ele in initial_points.iterrows():
+        with trace.step():
+            with phase('evaluate'):
+                output = routine.evaluator.evaluate_data(
+                    prepare_input(routine, DataFrame([ele.to_dict()])))
+            with phase('add_data'):
+                result = add_result(routine, output)
+            process_result(result)
+
+    pipeline = routine.pipeline
+    if pipeline and not routine.generator.supports_batch_generation:
+        logger.warning(
+            f'Generator {routine.generator.name} relies on the result of '
+            'the last step to generate new candidates, fall back to the '
+            'serial mode')
+        pipeline = False
+
+    # perform optimization
+    try:
+        if pipeline:
+            run_pipeline(routine, batch_size, active_callback,
+                         generate_callback, process_result, trace)
+        else:
+            while True:
+                with trace.step():
+                    with phase('status'):
+                        check_run_status(active_callback)
 
-                dump_state(dump_file, routine.generator, combined_results)
+                    # generate points to observe
+                    with phase('generate'):
+                        candidates = generate_candidates(routine, batch_size)
+                    with phase('callbacks'):
+                        # generate_callback(generator, candidates)
+                        generate_callback(candidates)
+
+                    with phase('status'):
+                        check_run_status(active_callback)
+                    # if still active evaluate the points and add to generator
+                    # check active_callback evaluate point
+                    with phase('evaluate'):
+                        output = routine.evaluator.evaluate_data(
+                            prepare_input(routine, candidates))
+                    with phase('add_data'):
+                        result = add_result(routine, output)
+                    process_result(result)
     except Exception as e:
         opt_logger.update(Events.OPTIMIZATION_END, solution_meta)
         raise e
+
+
+def run_pipeline(
+        routine: Routine,
+        batch_size: int,
+        active_callback: Callable,
+        generate_callback: Callable,
+        process_result: Callable,
+        trace: RunTrace = None,
+) -> None:
+    """
+    Generate the next candidates while the current ones are being evaluated.
+
+    The evaluation runs in a single worker thread so the environment is never
+    accessed concurrently, while the generator and the routine data are only
+    touched by the calling thread. Candidates generated while a batch is in
+    flight see the in-flight points as pending (constant liar), and the
+    in-flight results are always added before the next refit. Raises
+    `BadgerRunTerminatedError` once the run is terminated, after the
+    in-flight evaluation has been collected.
+
+    The evaluate phase of a step in the timing trace is the time spent
+    waiting for the in-flight evaluation.
+    """
+
+    if trace is None:
+        trace = RunTrace()
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = None
+    pending = None
+
+    try:
+        while True:
+            with trace.step():
+                with phase('status'):
+                    check_run_status(active_callback)
+
+                # generate the next points while the current ones are
+                # evaluated
+                with phase('generate'):
+                    candidates = generate_candidates(routine, batch_size,
+                                                     pending)
+                with phase('callbacks'):
+                    generate_callback(candidates)
+
+                if future is not None:
+                    _future, future = future, None
+                    process_result(collect_result(routine, _future))
+
+                with phase('status'):
+                    check_run_status(active_callback)
+                future = submit_candidates(routine, candidates, executor)
+                pending = candidates
+    finally:
+        # Never drop the points that have been set on the machine
+        if future is not None:
+            try:
+                process_result(collect_result(routine, future))
+            except Exception as e:
+                logger.error(f'Failed to collect the in-flight points: {e}')
+        executor.shutdown(wait=True)
+
+
+def generate_candidates(routine: Routine, n: int,
+                        pending: DataFrame = None) -> DataFrame:
+    """
+    Generate n candidates, taking the pending points (evaluation not done
+    yet) into account by temporarily adding them to the generator data with
+    constant liar outputs: the best observed value for the objectives and the
+    mean observed value for the other outputs.
+    """
+    generator = routine.generator
+    data = generator.data
+    # the training set of the model, bounded if the routine says so
+    record_value('n_train', 0 if data is None else len(data))
+
+    if pending is None or data is None or not len(data):
+        candidates = generator.generate(n)
+        return DataFrame(candidates, index=range(len(candidates)))
+
+    vocs = routine.vocs
+    liars = DataFrame(pending[vocs.variable_names], copy=True)
+    for name in vocs.output_names:
+        values = data[name]
+        direction = vocs.objectives.get(name)
+        if direction == 'MINIMIZE':
+            liars[name] = values.min()
+        elif direction == 'MAXIMIZE':
+            liars[name] = values.max()
+        else:
+            liars[name] = values.mean()
+    if 'xopt_error' in data:
+        liars['xopt_error'] = False
+
+    generator.data = concat([data, liars], axis=0, ignore_index=True)
+    try:
+        candidates = generator.generate(n)
+    finally:
+        generator.data = data
+
+    return DataFrame(candidates, index=range(len(candidates)))
+
+
+def prepare_input(routine: Routine, candidates: DataFrame) -> DataFrame:
+    # Input of the evaluator, as in Xopt.evaluate_data
+    input_data = DataFrame(candidates, copy=True)
+    routine.vocs.validate_input_data(input_data)
+
+    # add constants to input data
+    for name, value in routine.vocs.constants.items():
+        input_data[name] = value
+
+    return input_data
+
+
+def add_result(routine: Routine, output_data: DataFrame) -> DataFrame:
+    # Add the evaluator output to the routine data, as in Xopt.evaluate_data
+    if routine.strict:
+        validate_outputs(output_data)
+    output_data = explode_all_columns(output_data)
+    routine.add_data(output_data)
+
+    return output_data
+
+
+def submit_candidates(routine: Routine, candidates: DataFrame,
+                      executor: Executor) -> Future:
+    # Same as Xopt.evaluate_data, but returns without waiting for the result
+    return executor.submit(routine.evaluator.evaluate_data,
+                           prepare_input(routine, candidates))
+
+
+def collect_result(routine: Routine, future: Future) -> DataFrame:
+    # Wait for the evaluation and add the result to the routine data
+    with phase('evaluate'):
+        output_data = future.result()
+    with phase('add_data'):
+        return add_result(routine, output_data)
@@ -1,12 +1,17 @@
 import os
+import re
+import atexit
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 import logging
 logger = logging.getLogger(__name__)
 import yaml
 import sqlite3
+import pandas as pd
 from .routine import Routine
 from .settings import read_value
-from .utils import get_yaml_string
+from .utils import get_yaml_string, get_best_objective
 from .errors import BadgerConfigError, BadgerDBError
 
 
@@ -20,147 +25,339 @@ elif not os.path.exists(BADGER_DB_ROOT):
         f'Badger database root {BADGER_DB_ROOT} created')
 
 
-def maybe_create_routines_db(func):
-
-    def func_safe(*args, **kwargs):
-        db_routine = os.path.join(BADGER_DB_ROOT, 'routines.db')
+ROUTINES_DB = 'routines.db'
+RUNS_DB = 'runs.db'
+
+SCHEMAS = {
+    ROUTINES_DB: [
+        'create table if not exists routine (name not null primary key, config, savedAt timestamp)',
+    ],
+    RUNS_DB: [
+        'create table if not exists run (id integer primary key, savedAt timestamp, finishedAt timestamp, routine, filename)',
+    ],
+}
+
+
+def extract_metadata(config: dict):
+    """Extract the indexed metadata columns from a routine config."""
+    description = config.get('description')
+    environment = (config.get('environment') or {}).get('name')
+    generator = (config.get('generator') or {}).get('name')
+    # Tags could be a list (routine) or a dict (legacy routine config)
+    tags = config.get('tags') or (config.get('config') or {}).get('tags')
+    if isinstance(tags, dict):
+        tags = [(k, str(v)) for k, v in tags.items()]
+    elif tags:
+        tags = [(str(tag), None) for tag in tags]
+    else:
+        tags = []
+
+    return description, environment, generator, tags
+
+
+def _write_metadata(cur, name, config: dict):
+    description, environment, generator, tags = extract_metadata(config)
+    cur.execute('update routine set description = ?, environment = ?, generator = ? where name = ?',
+                (description, environment, generator, name))
+    cur.execute('delete from routine_tag where routine = ?', (name,))
+    cur.executemany('insert into routine_tag values (?, ?, ?)',
+                    [(name, key, value) for key, value in tags])
+
+    if _fts_available.get(ROUTINES_DB):
+        # The index rows are keyed by the rowid of the routine (stable, the
+        # db is never vacuumed)
+        vocs = config.get('vocs') or {}
+        rowid = cur.execute('select rowid from routine where name = ?',
+                            (name,)).fetchone()[0]
+        cur.execute('delete from routine_fts where rowid = ?', (rowid,))
+        cur.execute('insert into routine_fts (rowid, name, description, tags, environment, generator, variables, objectives) values (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (rowid, name, description,
+                     ' '.join(' '.join(filter(None, tag)) for tag in tags),
+                     environment, generator,
+                     ' '.join(vocs.get('variables') or []),
+                     ' '.join([*(vocs.get('objectives') or []),
+                               *(vocs.get('constraints') or []),
+                               *(vocs.get('observables') or [])])))
+
+
+def _write_run_index(cur, rid, filename, routine, saved_at):
+    # The index rows are keyed by the id of the run
+    if _fts_available.get(RUNS_DB):
+        cur.execute('insert into run_fts (rowid, filename, routine, date) values (?, ?, ?, ?)',
+                    (rid, filename, routine, str(saved_at)[:10]))
+
+
+def _migrate_routines_v1(cur):
+    # Index routine metadata so that listing never parses the configs
+    cur.execute('alter table routine add column description')
+    cur.execute('alter table routine add column environment')
+    cur.execute('alter table routine add column generator')
+    cur.execute('create table routine_tag (routine not null, key not null, value)')
+    cur.execute('create index routine_tag_key on routine_tag (key, value)')
+    cur.execute('create index routine_tag_routine on routine_tag (routine)')
+    cur.execute('create index routine_environment on routine (environment)')
+    cur.execute('create index routine_generator on routine (generator)')
+    cur.execute('create index routine_saved_at on routine (savedAt)')
+
+    # Backfill the existing records
+    for name, config in cur.execute('select name, config from routine').fetchall():
+        try:
+            _write_metadata(cur, name, yaml.safe_load(config))
+        except Exception as e:
+            logger.warning(f'Failed to index routine {name}: {e}')
+
+
+def _migrate_runs_v1(cur):
+    # Turn the run table into a catalog of the archive
+    cur.execute('alter table run add column path')
+    cur.execute('alter table run add column environment')
+    cur.execute('alter table run add column n_points integer')
+    cur.execute('alter table run add column best real')
+    cur.execute('create index run_filename on run (filename)')
+    cur.execute('create index run_routine on run (routine)')
+    cur.execute('create index run_saved_at on run (savedAt)')
+
+
+def _migrate_runs_v2(cur):
+    # Index the variables (with their bounds) and outputs of the runs, to
+    # find the runs compatible with a routine. The runs cataloged before are
+    # indexed by archive.rebuild_run_index
+    cur.execute('create table run_vocs (run integer not null, name not null, kind not null, lb real, ub real)')
+    cur.execute('create index run_vocs_run on run_vocs (run)')
+    cur.execute('create index run_environment on run (environment)')
+
+
+def _drop_fts(cur):
+    # The full-text index rows were not keyed by the rowid of the records
+    # they index, they are indexed again by _init_fts
+    cur.execute('drop table if exists routine_fts')
+    cur.execute('drop table if exists run_fts')
+
+
+# Schema migrations, the n-th one brings the db to version (user_version) n
+MIGRATIONS = {
+    ROUTINES_DB: [_migrate_routines_v1, _drop_fts],
+    RUNS_DB: [_migrate_runs_v1, _migrate_runs_v2, _drop_fts],
+}
+
+# Columns of the run catalog
+RUN_RECORD_KEYS = ['id', 'savedAt', 'finishedAt', 'routine', 'filename',
+                   'path', 'environment', 'n_points', 'best']
+
+# Full-text search indices, only built if sqlite is compiled with FTS5
+FTS_SCHEMAS = {
+    ROUTINES_DB: 'create virtual table routine_fts using fts5(name, description, tags, environment, generator, variables, objectives)',
+    RUNS_DB: 'create virtual table run_fts using fts5(filename, routine, date)',
+}
+_fts_available = {}
+
+
+def _init_fts(cur, db_name):
+    exists = cur.execute(
+        "select 1 from sqlite_master where type = 'table' and name = ?",
+        (FTS_SCHEMAS[db_name].split()[3],)).fetchone()
+    if not exists:
+        try:
+            cur.execute(FTS_SCHEMAS[db_name])
+        except sqlite3.OperationalError:
+            logger.info('FTS5 is not available, fall back to pattern search')
+            return
+    _fts_available[db_name] = True
+    if exists:
+        return
+
+    # Index the existing records
+    if db_name == ROUTINES_DB:
+        for name, config in cur.execute('select name, config from routine').fetchall():
+            try:
+                _write_metadata(cur, name, yaml.safe_load(config))
+            except Exception as e:
+                logger.warning(f'Failed to index routine {name}: {e}')
+    else:
+        for record in cur.execute('select id, filename, routine, savedAt from run').fetchall():
+            _write_run_index(cur, *record)
 
-        con = sqlite3.connect(db_routine)
-        cur = con.cursor()
 
-        cur.execute('create table if not exists routine (name not null primary key, config, savedAt timestamp)')
+def to_fts_query(keyword):
+    """Convert a search keyword to a FTS5 query (all words, as prefixes)."""
+    words = re.findall(r'\w+', keyword)
 
-        con.commit()
-        con.close()
+    return ' '.join(f'"{word}"*' for word in words)
 
-        return func(*args, **kwargs)
 
-    return func_safe
+# Connections are pooled per thread (sqlite connections can not be shared
+# across threads), schemas are initialized once per process
+_local = threading.local()
+_lock = threading.Lock()
+_initialized = set()
+_connections = []
 
 
-def maybe_create_runs_db(func):
+def _connect(db_name):
+    db_path = os.path.join(BADGER_DB_ROOT, db_name)
+    os.makedirs(BADGER_DB_ROOT, exist_ok=True)
 
-    def func_safe(*args, **kwargs):
-        db_run = os.path.join(BADGER_DB_ROOT, 'runs.db')
+    is_new = not os.path.exists(db_path)
+    con = sqlite3.connect(db_path)
+    con.execute('pragma journal_mode=wal')
+    con.execute('pragma synchronous=normal')
 
-        con = sqlite3.connect(db_run)
-        cur = con.cursor()
+    with _lock:
+        _connections.append(con)
+        if is_new or db_path not in _initialized:
+            with con:
+                cur = con.cursor()
+                for statement in SCHEMAS.get(db_name, []):
+                    cur.execute(statement)
 
-        cur.execute('create table if not exists run (id integer primary key, savedAt timestamp, finishedAt timestamp, routine, filename)')
+                _fts_available[db_name] = False
+                version = cur.execute('pragma user_version').fetchone()[0]
+                migrations = MIGRATIONS.get(db_name, [])
+                for migrate in migrations[version:]:
+                    migrate(cur)
+                cur.execute(f'pragma user_version = {len(migrations)}')
+                _init_fts(cur, db_name)
+            _initialized.add(db_path)
 
-        con.commit()
-        con.close()
+    return con
 
-        return func(*args, **kwargs)
 
-    return func_safe
+def get_connection(db_name):
+    """Get the pooled connection to a badger database for current thread."""
+    db_path = os.path.join(BADGER_DB_ROOT, db_name)
+    pool = _local.__dict__.setdefault('connections', {})
 
+    con = pool.get(db_name)
+    if con is not None and not os.path.exists(db_path):
+        # The db file has been removed under us, start over
+        close_connection(con)
+        con = None
 
-def filter_routines(records, tags):
-    records_filtered = []
-    for record in records:
-        try:
-            _tags = yaml.safe_load(record[1])['config']['tags']
-            if tags.items() <= _tags.items():
-                records_filtered.append(record)
-        except:
-            pass
+    if con is None:
+        con = pool[db_name] = _connect(db_name)
 
-    return records_filtered
+    return con
 
 
-def extract_descriptions(records):
-    descr_list = []
-    for record in records:
+def close_connection(con):
+    with _lock:
         try:
-            descr = yaml.safe_load(record[1])['description']
-            descr_list.append(descr)
-        except Exception:
-            descr_list.append('')
-
-    return descr_list
+            _connections.remove(con)
+        except ValueError:
+            pass
+    try:
+        con.close()
+    except sqlite3.ProgrammingError:  # created in another thread
+        pass
+
+    pool = _local.__dict__.get('connections', {})
+    for db_name, _con in list(pool.items()):
+        if _con is con:
+            del pool[db_name]
+
+
+@atexit.register
+def close_all_connections():
+    for con in list(_connections):
+        close_connection(con)
+    # Check the schemas again on the next connection
+    with _lock:
+        _initialized.clear()
+
+
+@contextmanager
+def transaction(db_name):
+    """Run statements in a (batched) transaction on a badger database.
+
+    Nested transactions on the same database are merged into the outermost
+    one, which commits on success and rolls back on error.
+    """
+    con = get_connection(db_name)
+    depth = _local.__dict__.setdefault('depth', {})
+    depth[db_name] = depth.get(db_name, 0) + 1
+    try:
+        yield con.cursor()
+    except BaseException:
+        depth[db_name] -= 1
+        if not depth[db_name]:
+            con.rollback()
+        raise
+    else:
+        depth[db_name] -= 1
+        if not depth[db_name]:
+            con.commit()
+
+
+def get_routine_config(routine: Routine):
+    # Only the parts of the routine config used for indexing
+    return {
+        'description': routine.description,
+        'environment': {'name': routine.environment.name},
+        'generator': {'name': routine.generator.name},
+        'tags': routine.tags,
+        'vocs': {
+            'variables': routine.vocs.variable_names,
+            'objectives': routine.vocs.objective_names,
+            'constraints': routine.vocs.constraint_names,
+            'observables': routine.vocs.observable_names,
+        },
+    }
 
 
-@maybe_create_routines_db
 def save_routine(routine: Routine):
-    db_routine = os.path.join(BADGER_DB_ROOT, 'routines.db')
+    with transaction(ROUTINES_DB) as cur:
+        cur.execute('select name from routine where name=:name',
+                    {'name': routine.name})
+        record = cur.fetchone()
 
-    con = sqlite3.connect(db_routine)
-    cur = con.cursor()
+        runs = get_runs_by_routine(routine.name)
 
-    cur.execute('select * from routine where name=:name',
-                {'name': routine.name})
-    record = cur.fetchone()
-
-    runs = get_runs_by_routine(routine.name)
-
-    if record and len(runs) == 0:  # update the record
-        cur.execute('update routine set config = ?, savedAt = ? where name = ?',
-                    (routine.yaml(), datetime.now(), routine.name))
-    else:  # insert a record
-        cur.execute('insert into routine values (?, ?, ?)',
-                    (routine.name, routine.yaml(), datetime.now()))
-
-    con.commit()
-    con.close()
+        if record and len(runs) == 0:  # update the record
+            cur.execute('update routine set config = ?, savedAt = ? where name = ?',
+                        (routine.yaml(), datetime.now(), routine.name))
+        else:  # insert a record
+            cur.execute('insert into routine (name, config, savedAt) values (?, ?, ?)',
+                        (routine.name, routine.yaml(), datetime.now()))
+        _write_metadata(cur, routine.name, get_routine_config(routine))
 
 
 # This function is not safe and might break database! Use with caution!
-@maybe_create_routines_db
 def update_routine(routine: Routine):
-    db_routine = os.path.join(BADGER_DB_ROOT, 'routines.db')
-
-    con = sqlite3.connect(db_routine)
-    cur = con.cursor()
+    with transaction(ROUTINES_DB) as cur:
+        cur.execute('select name from routine where name=:name',
+                    {'name': routine.name})
+        record = cur.fetchone()
 
-    cur.execute('select * from routine where name=:name',
-                {'name': routine.name})
-    record = cur.fetchone()
+        if record:  # update the record
+            cur.execute('update routine set config = ?, savedAt = ? where name = ?',
+                        (routine.yaml(), datetime.now(), routine.name))
+            _write_metadata(cur, routine.name, get_routine_config(routine))
 
-    if record:  # update the record
-        cur.execute('update routine set config = ?, savedAt = ? where name = ?',
-                    (routine.yaml(), datetime.now(), routine.name))
 
-    con.commit()
-    con.close()
-
-
-@maybe_create_routines_db
-@maybe_create_runs_db
 def remove_routine(name, remove_runs=False):
-    db_routine = os.path.join(BADGER_DB_ROOT, 'routines.db')
-
-    con = sqlite3.connect(db_routine)
-    cur = con.cursor()
-
-    cur.execute(f'delete from routine where name = "{name}"')
-
-    con.commit()
-    con.close()
+    with transaction(ROUTINES_DB) as cur:
+        if _fts_available.get(ROUTINES_DB):
+            cur.execute('delete from routine_fts where rowid in (select rowid from routine where name = ?)',
+                        (name,))
+        cur.execute('delete from routine where name = ?', (name,))
+        cur.execute('delete from routine_tag where routine = ?', (name,))
 
     if remove_runs:
         # Remove all related run records
-        db_run = os.path.join(BADGER_DB_ROOT, 'runs.db')
+        with transaction(RUNS_DB) as cur:
+            if _fts_available.get(RUNS_DB):
+                cur.execute('delete from run_fts where rowid in (select id from run where routine = ?)',
+                            (name,))
+            cur.execute('delete from run_vocs where run in (select id from run where routine = ?)',
+                        (name,))
+            cur.execute('delete from run where routine = ?', (name,))
 
-        con = sqlite3.connect(db_run)
-        cur = con.cursor()
-
-        cur.execute(f'delete from run where routine = "{name}"')
-
-        con.commit()
-        con.close()
 
-
-@maybe_create_routines_db
 def load_routine(name: str):
-    db_routine = os.path.join(BADGER_DB_ROOT, 'routines.db')
-    con = sqlite3.connect(db_routine)
-    cur = con.cursor()
-
-    cur.execute('select * from routine where name=:name', {'name': name})
-
+    cur = get_connection(ROUTINES_DB).cursor()
+    cur.execute('select name, config, savedAt from routine where name=:name',
+                {'name': name})
     records = cur.fetchall()
-    con.close()
 
     if len(records) == 1:
         # return yaml.safe_load(records[0][1]), records[0][2]
@@ -175,114 +372,314 @@ def load_routine(name: str):
             f'Multiple routines with name {name} found in the database!')
 
 
-@maybe_create_routines_db
 def list_routine(keyword='', tags={}):
-    db_routine = os.path.join(BADGER_DB_ROOT, 'routines.db')
-    con = sqlite3.connect(db_routine)
-    cur = con.cursor()
+    query = 'select r.name, r.savedAt, r.description from routine r'
+    params = []
+    cur = get_connection(ROUTINES_DB).cursor()
+    fts_query = _fts_available.get(ROUTINES_DB) and to_fts_query(keyword)
+    if fts_query:
+        query += ' join routine_fts f on f.rowid = r.rowid where routine_fts match ?'
+        params.append(fts_query)
+    else:
+        query += ' where (r.name like ? or r.description like ?)'
+        params += [f'%{keyword}%'] * 2
+    # Routine must have all the tags (key-value pairs, or keys if value is None)
+    for key, value in tags.items():
+        if value is None:  # only the tag key matters
+            query += ' and r.name in (select routine from routine_tag where key = ?)'
+            params += [key]
+        else:
+            query += ' and r.name in (select routine from routine_tag where key = ? and value = ?)'
+            params += [key, str(value)]
+    if fts_query:  # best matches first
+        query += ' order by f.rank, r.savedAt desc'
+    else:
+        query += ' order by r.savedAt desc'
 
-    cur.execute(f'select name, config, savedAt from routine where name like "%{keyword}%" order by savedAt desc')
+    cur.execute(query, params)
     records = cur.fetchall()
-    if tags:
-        records = filter_routines(records, tags)
     names = [record[0] for record in records]
-    timestamps = [record[2] for record in records]
-    descriptions = extract_descriptions(records)
-    con.close()
+    timestamps = [record[1] for record in records]
+    descriptions = [record[2] for record in records]
 
     return names, timestamps, descriptions
 
 
-@maybe_create_runs_db
 def save_run(run):
-    db_run = os.path.join(BADGER_DB_ROOT, 'runs.db')
+    routine = run['routine']
+    data = run['data']
+    if isinstance(data, dict):
+        data = pd.DataFrame(data)
+    timestamps = data['timestamp']
+
+    return save_run_record({
+        'filename': run['filename'],
+        'savedAt': datetime.fromtimestamp(timestamps.iloc[0]),
+        'finishedAt': datetime.fromtimestamp(timestamps.iloc[-1]),
+        'routine': routine.name,
+        'path': run.get('path'),
+        'environment': routine.environment.name,
+        'n_points': len(data),
+        'best': get_best_objective(routine.vocs, data),
+        'vocs': get_run_vocs(routine.vocs),
+    })
+
+
+def get_run_vocs(vocs):
+    # The part of the vocs indexed in the run catalog
+    return {
+        'variables': {name: list(bounds)
+                      for name, bounds in vocs.variables.items()},
+        'outputs': vocs.output_names,
+    }
+
+
+def _write_run_vocs(cur, rid, vocs):
+    cur.execute('delete from run_vocs where run = ?', (rid,))
+    cur.executemany('insert into run_vocs values (?, ?, ?, ?, ?)', [
+        *[(rid, name, 'variable', lb, ub)
+          for name, (lb, ub) in vocs['variables'].items()],
+        *[(rid, name, 'output', None, None) for name in vocs['outputs']],
+    ])
+
+
+def save_run_record(record):
+    # Insert or update a record in the run catalog
+    with transaction(RUNS_DB) as cur:
+        # Check if the record exist (same filename)
+        cur.execute('select id from run where filename = ?',
+                    (record['filename'],))
+        existing_row = cur.fetchone()
+
+        if existing_row:
+            rid = existing_row[0]
+            cur.execute('update run set finishedAt = ?, path = ?, n_points = ?, best = ? where id = ?',
+                        (record['finishedAt'], record['path'],
+                         record['n_points'], record['best'], rid))
+        else:
+            cur.execute('insert into run (savedAt, finishedAt, routine, filename, path, environment, n_points, best) values (?, ?, ?, ?, ?, ?, ?, ?)',
+                        tuple(record[key] for key in RUN_RECORD_KEYS[1:]))
+            rid = cur.lastrowid
+            _write_run_index(cur, rid, record['filename'], record['routine'],
+                             record['savedAt'])
+        if record.get('vocs'):
+            _write_run_vocs(cur, rid, record['vocs'])
 
-    con = sqlite3.connect(db_run)
-    cur = con.cursor()
+    return rid
 
-    # Insert or update a record
-    routine_name = run['routine'].name
-    run_filename = run['filename']
-    timestamps = run['data']['timestamp']
-    time_start = datetime.fromtimestamp(timestamps[0])
-    time_finish = datetime.fromtimestamp(timestamps[-1])
-
-    # Check if the record exist (same filename)
-    cur.execute('select id from run where filename = ?', (run_filename,))
-    existing_row = cur.fetchone()
-
-    if existing_row:
-        cur.execute('update run set finishedAt = ? where filename = ?',
-                    (time_finish, run_filename))
-        rid = existing_row[0]
-    else:
-        cur.execute('insert into run values (?, ?, ?, ?, ?)',
-                    (None, time_start, time_finish, routine_name, run_filename))
-        rid = cur.lastrowid
 
-    con.commit()
-    con.close()
+def get_unindexed_runs():
+    """Filenames of the cataloged runs without indexed vocs."""
+    cur = get_connection(RUNS_DB).cursor()
+    cur.execute('select filename from run where id not in (select run from run_vocs)')
+
+    return [record[0] for record in cur.fetchall()]
+
+
+def find_compatible_runs(environment: str, variables: dict,
+                         outputs: list = None, since: datetime = None):
+    """Find the runs that could warm start a routine.
+
+    The runs on the environment with the same variables, with bounds
+    overlapping the given ones (dict of name -> [lb, ub]), and all the given
+    outputs, saved since the given date if any. Latest run first.
+    """
+    outputs = outputs or []
+    query = f'select {", ".join(RUN_RECORD_KEYS)} from run where environment = ?'
+    params = [environment]
+    if since is not None:
+        query += ' and savedAt >= ?'
+        params.append(since)
+    query += ' order by savedAt desc'
+
+    cur = get_connection(RUNS_DB).cursor()
+    records = [dict(zip(RUN_RECORD_KEYS, record))
+               for record in cur.execute(query, params).fetchall()]
+    if not records:
+        return []
+
+    vocs = {}  # run id -> (variables, outputs)
+    placeholders = ', '.join('?' * len(records))
+    cur.execute(f'select run, name, kind, lb, ub from run_vocs where run in ({placeholders})',
+                [record['id'] for record in records])
+    for rid, name, kind, lb, ub in cur.fetchall():
+        run_variables, run_outputs = vocs.setdefault(rid, ({}, set()))
+        if kind == 'variable':
+            run_variables[name] = (lb, ub)
+        else:
+            run_outputs.add(name)
+
+    def is_compatible(record):
+        try:
+            run_variables, run_outputs = vocs[record['id']]
+        except KeyError:  # not indexed
+            return False
 
-    return rid
+        if run_variables.keys() != variables.keys():
+            return False
+        if not run_outputs.issuperset(outputs):
+            return False
 
+        return all(run_variables[name][0] <= ub and run_variables[name][1] >= lb
+                   for name, (lb, ub) in variables.items())
 
-@maybe_create_runs_db
-def get_runs_by_routine(routine: str):
-    db_run = os.path.join(BADGER_DB_ROOT, 'runs.db')
+    return [record for record in records if is_compatible(record)]
 
-    con = sqlite3.connect(db_run)
-    cur = con.cursor()
 
-    cur.execute(f'select filename from run where routine = "{routine}" order by savedAt desc')
+def get_run_records(routine: str = None):
+    """Get the run catalog (list of dicts), latest run first."""
+    query = f'select {", ".join(RUN_RECORD_KEYS)} from run'
+    params = []
+    if routine is not None:
+        query += ' where routine = ?'
+        params.append(routine)
+    query += ' order by savedAt desc'
+
+    cur = get_connection(RUNS_DB).cursor()
+    cur.execute(query, params)
+    records = cur.fetchall()
+
+    return [dict(zip(RUN_RECORD_KEYS, record)) for record in records]
+
+
+def get_runs_by_routine(routine: str):
+    cur = get_connection(RUNS_DB).cursor()
+    cur.execute('select filename from run where routine = ? order by savedAt desc',
+                (routine,))
     records = cur.fetchall()
-    con.close()
 
     filenames = [record[0] for record in records]
 
     return filenames
 
 
-@maybe_create_runs_db
 def get_runs():
-    db_run = os.path.join(BADGER_DB_ROOT, 'runs.db')
+    cur = get_connection(RUNS_DB).cursor()
+    cur.execute('select filename from run order by savedAt desc')
+    records = cur.fetchall()
 
-    con = sqlite3.connect(db_run)
-    cur = con.cursor()
+    filenames = [record[0] for record in records]
 
-    cur.execute(f'select filename from run order by savedAt desc')
-    records = cur.fetchall()
+    return filenames
 
-    con.close()
+
+# Run filenames are BadgerOpt-YYYY-MM-DD-HHMMSS.yaml, so the runs can be
+# grouped and paged by date with range queries on the filename index
+RUN_PREFIX = 'BadgerOpt-'
+RUN_GROUP_LENGTHS = {'year': 4, 'month': 7, 'day': 10}
+
+
+def _run_range_filter(prefix='', routine=None):
+    lower = RUN_PREFIX + prefix
+    query = 'filename >= ? and filename < ?'
+    params = [lower, lower + '\uffff']
+    if routine is not None:
+        query += ' and routine = ?'
+        params.append(routine)
+
+    return query, params
+
+
+def get_run_groups(level, prefix='', routine=None):
+    """Get the dates (year, month or day) of the runs, latest first.
+
+    Only the dates starting with prefix are returned, for example
+    get_run_groups('day', '2024-01') gives the days in Jan 2024 with runs.
+    """
+    n = RUN_GROUP_LENGTHS[level]
+    cur = get_connection(RUNS_DB).cursor()
+    query, params = _run_range_filter(prefix, routine)
+
+    # Skip scan: jump from one group to the next instead of visiting all runs
+    groups = []
+    while True:
+        cur.execute(f'select max(filename) from run where {query}', params)
+        filename = cur.fetchone()[0]
+        if filename is None:
+            break
+
+        group = filename[len(RUN_PREFIX):len(RUN_PREFIX) + n]
+        groups.append(group)
+        params[1] = RUN_PREFIX + group  # runs in earlier groups
+
+    return groups
+
+
+def get_runs_page(prefix='', routine=None, offset=0, limit=None):
+    """Get the runs (filenames) starting with a date prefix, latest first."""
+    query, params = _run_range_filter(prefix, routine)
+    params += [-1 if limit is None else limit, offset]
+
+    cur = get_connection(RUNS_DB).cursor()
+    cur.execute(f'select filename from run where {query} order by filename desc limit ? offset ?',
+                params)
+    records = cur.fetchall()
 
     filenames = [record[0] for record in records]
 
     return filenames
 
 
-@maybe_create_runs_db
-def remove_run_by_filename(name):
-    db_run = os.path.join(BADGER_DB_ROOT, 'runs.db')
+def get_adjacent_run(filename, routine=None, older=True):
+    """Get the run right before (older) or after a run, None if no such run."""
+    query = 'filename < ?' if older else 'filename > ?'
+    params = [filename]
+    if routine is not None:
+        query += ' and routine = ?'
+        params.append(routine)
+    func = 'max' if older else 'min'
 
-    con = sqlite3.connect(db_run)
-    cur = con.cursor()
+    cur = get_connection(RUNS_DB).cursor()
+    cur.execute(f'select {func}(filename) from run where {query}', params)
 
-    cur.execute(f'delete from run where filename = "{name}"')
+    return cur.fetchone()[0]
 
-    con.commit()
-    con.close()
 
+def search_runs(keyword, routine=None):
+    """Search the runs by filename, routine name or date, best matches first.
 
-@maybe_create_runs_db
-def remove_run_by_id(rid):
-    db_run = os.path.join(BADGER_DB_ROOT, 'runs.db')
+    Only the runs of routine are searched if given.
+    """
+    cur = get_connection(RUNS_DB).cursor()
+    fts_query = _fts_available.get(RUNS_DB) and to_fts_query(keyword)
+    if fts_query:
+        query = 'select r.filename from run_fts f join run r on r.id = f.rowid where run_fts match ?'
+        params = [fts_query]
+    else:
+        query = 'select filename from run r where (filename like ? or routine like ?)'
+        params = [f'%{keyword}%', f'%{keyword}%']
+    if routine is not None:
+        query += ' and r.routine = ?'
+        params.append(routine)
+    if fts_query:  # latest run first among equal matches
+        query += ' order by f.rank, r.filename desc'
+    else:
+        query += ' order by savedAt desc'
 
-    con = sqlite3.connect(db_run)
-    cur = con.cursor()
+    cur.execute(query, params)
+    records = cur.fetchall()
 
-    cur.execute(f'delete from run where id = {rid}')
+    filenames = [record[0] for record in records]
 
-    con.commit()
-    con.close()
+    return filenames
+
+
+def remove_run_by_filename(name):
+    with transaction(RUNS_DB) as cur:
+        if _fts_available.get(RUNS_DB):
+            cur.execute('delete from run_fts where rowid in (select id from run where filename = ?)',
+                        (name,))
+        cur.execute('delete from run_vocs where run in (select id from run where filename = ?)',
+                    (name,))
+        cur.execute('delete from run where filename = ?', (name,))
+
+
+def remove_run_by_id(rid):
+    with transaction(RUNS_DB) as cur:
+        if _fts_available.get(RUNS_DB):
+            cur.execute('delete from run_fts where rowid = ?', (rid,))
+        cur.execute('delete from run_vocs where run = ?', (rid,))
+        cur.execute('delete from run where id = ?', (rid,))
 
 
 def import_routines(filename):
@@ -290,26 +687,21 @@ def import_routines(filename):
     cur = con.cursor()
 
     # Deal with empty db file
-    cur.execute('create table if not exists routine (name not null primary key, config, savedAt timestamp)')
-
-    db_routine = os.path.join(BADGER_DB_ROOT, 'routines.db')
-    con_db = sqlite3.connect(db_routine)
-    cur_db = con_db.cursor()
+    cur.execute(SCHEMAS[ROUTINES_DB][0])
 
-    cur.execute('select * from routine')
+    cur.execute('select name, config, savedAt from routine')
     records = cur.fetchall()
+    con.close()
 
     failed_list = []
-    for record in records:
-        try:
-            cur_db.execute('insert into routine values (?, ?, ?)', record)
-        except:
-            failed_list.append(record[0])
-
-    con_db.commit()
-    con_db.close()
-
-    con.close()
+    with transaction(ROUTINES_DB) as cur_db:
+        for record in records:
+            try:
+                cur_db.execute('insert into routine (name, config, savedAt) values (?, ?, ?)',
+                               record[:3])
+                _write_metadata(cur_db, record[0], yaml.safe_load(record[1]))
+            except Exception:
+                failed_list.append(record[0])
 
     if failed_list:
         raise BadgerDBError(get_yaml_string(failed_list))
@@ -319,20 +711,17 @@ def export_routines(filename, routine_name_list):
     con = sqlite3.connect(filename)
     cur = con.cursor()
 
-    cur.execute('create table if not exists routine (name not null primary key, config, savedAt timestamp)')
+    cur.execute(SCHEMAS[ROUTINES_DB][0])
 
-    db_routine = os.path.join(BADGER_DB_ROOT, 'routines.db')
-    con_db = sqlite3.connect(db_routine)
-    cur_db = con_db.cursor()
+    cur_db = get_connection(ROUTINES_DB).cursor()
 
     for name in routine_name_list:
-        cur_db.execute('select * from routine where name=:name', {'name': name})
+        cur_db.execute('select name, config, savedAt from routine where name=:name',
+                       {'name': name})
         records = cur_db.fetchall()
         record = records[0]  # should only have one hit
 
         cur.execute('insert into routine values (?, ?, ?)', record)
 
-    con_db.close()
-
     con.commit()
     con.close()
@@ -1,3 +1,4 @@
+import time
 from abc import ABC
 from logging import warning
 from typing import ClassVar, Dict, final, List, Optional
@@ -11,6 +12,7 @@ from badger.errors import (
     BadgerNoInterfaceError,
 )
 from badger.interface import Interface
+from badger.timing import phase
 
 
 def validate_variable_names(func):
@@ -29,7 +31,7 @@ def validate_variable_names(func):
 
 
 def validate_observable_names(func):
-    def validate(cls, observable_names: List[str]):
+    def validate(cls, observable_names: List[str], **kwargs):
         observable_names_invalid = [
             name for name in observable_names if name not in cls.observables
         ]
@@ -39,7 +41,7 @@ def validate_observable_names(func):
                 + "not found in environment"
             )
 
-        return func(cls, observable_names)
+        return func(cls, observable_names, **kwargs)
 
     return validate
 
@@ -73,6 +75,12 @@ class Environment(BaseModel, ABC):
     name: ClassVar[str] = Field(description="environment name")
     variables: ClassVar[Dict[str, List]]  # bounds list could be empty for var
     observables: ClassVar[List[str]]
+    # Readback verification after setting the variables (set-and-wait)
+    # Absolute tolerance of the readback of each variable, the variables
+    # not listed here are not waited for
+    readback_tolerances: ClassVar[Dict[str, float]] = {}
+    # Timeout (s) of specific variables, BADGER_CHECK_VAR_TIMEOUT by default
+    readback_timeouts: ClassVar[Dict[str, float]] = {}
 
     # Interface
     interface: Optional[SerializeAsAny[Interface]] = None
@@ -87,7 +95,7 @@ class Environment(BaseModel, ABC):
         if not self.interface:
             raise BadgerNoInterfaceError
 
-        return self.interface.get_values(variable_names)
+        return self.interface.get_values_cached(variable_names)
 
     def set_variables(self, variable_inputs: Dict[str, float]):
         if not self.interface:
@@ -99,15 +107,38 @@ class Environment(BaseModel, ABC):
         if not self.interface:
             raise BadgerNoInterfaceError
 
-        return self.interface.get_values(observable_names)
+        return self.interface.get_values_cached(observable_names)
 
     def get_bounds(self, variable_names: List[str]) -> Dict[str, List[float]]:
         return {}
 
+    # Read the actual values of the variables, to check if they have settled
+    # after being set. Override it if the readbacks are different channels
+    def get_readbacks(self, variable_names: List[str]) -> Dict:
+        # Always read from the machine
+        if self.interface is not None and \
+                type(self).get_variables is Environment.get_variables:
+            return self.interface.get_values_cached(variable_names,
+                                                    bypass=True)
+
+        self._invalidate_cache(variable_names)
+        return self.get_variables(variable_names)
+
     # Actions to preform after changing vars and before reading vars/obj
     def variables_changed(self, variables_input: Dict[str, float]):
         pass
 
+    # Set the variables and get the observables for a batch of points
+    # Override it if the env/interface could evaluate several points in one
+    # go (buffered scans, shared settle time, etc)
+    # Should return a list of observable dicts, one per point
+    # Return None to let Badger evaluate the points one by one
+    def evaluate_batch(
+        self, variable_inputs: List[Dict[str, float]],
+        observable_names: List[str]
+    ) -> Optional[List[Dict]]:
+        return None
+
     # Get current system states
     # If return is not None, the states would be saved at the start of each run
     # Should return a dict if not None
@@ -172,6 +203,7 @@ class Environment(BaseModel, ABC):
     @validate_setpoints
     def _set_variables_def(self, variable_inputs: Dict[str, float]):
         self.set_variables(variable_inputs)
+        self._invalidate_cache()
 
     # Optimizer will only call this method to set variable values
     @final
@@ -181,6 +213,8 @@ class Environment(BaseModel, ABC):
             [v for v in variable_inputs.items() if v[0] in self.variables]
         )
         self._set_variables_def(variable_inputs_def)
+        with phase('settle'):
+            self._wait_for_variables(variable_inputs_def)
 
         # Deal with tmp variables
         # Usually should be able to directly set to the interface
@@ -209,12 +243,128 @@ class Environment(BaseModel, ABC):
         )
         raise BadgerInterfaceChannelError(err_msg)
 
+    # Wait until the readbacks of the variables that have a tolerance are
+    # within tolerance of the setpoints. The readbacks are polled with an
+    # exponential backoff, starting at BADGER_CHECK_VAR_INTERVAL, and a
+    # variable is given up on (with a warning) after its timeout
+    @final
+    def _wait_for_variables(self, variable_inputs: Dict[str, float]):
+        pending = [name for name in variable_inputs
+                   if name in self.readback_tolerances]
+        if not pending:
+            return
+
+        from badger.settings import read_value
+
+        interval = float(read_value('BADGER_CHECK_VAR_INTERVAL') or 0.1)
+        timeout = float(read_value('BADGER_CHECK_VAR_TIMEOUT') or 3)
+        t0 = time.monotonic()
+        deadlines = {name: t0 + self.readback_timeouts.get(name, timeout)
+                     for name in pending}
+
+        delay = interval
+        while True:
+            readbacks = self.get_readbacks(pending)
+            pending = [
+                name for name in pending
+                if abs(readbacks[name] - variable_inputs[name]) >
+                self.readback_tolerances[name]
+            ]
+            if not pending:  # all settled
+                return
+
+            now = time.monotonic()
+            timed_out = [name for name in pending if now >= deadlines[name]]
+            if timed_out:
+                warning(
+                    f"Variables {timed_out} did not settle within "
+                    + "their timeout, continue anyway"
+                )
+                pending = [name for name in pending if name not in timed_out]
+                if not pending:
+                    return
+
+            next_deadline = min(deadlines[name] for name in pending)
+            time.sleep(max(0, min(delay, next_deadline - now)))
+            delay *= 2
+
+    # The observables could depend on any variable, so none of the cached
+    # values could be trusted after setting the variables
+    @final
+    def _invalidate_cache(self, channel_names: Optional[List[str]] = None):
+        if self.interface is not None:
+            self.interface.invalidate_cache(channel_names)
+
     # Optimizer will only call this method to get observable values
+    # Use bypass_cache=True to read them from the machine, e.g. for each
+    # shot of a multi-shot acquisition
     @final
     @validate_observable_names
-    def _get_observables(self, observable_names: List[str]) -> Dict:
+    def _get_observables(self, observable_names: List[str],
+                         bypass_cache: bool = False) -> Dict:
+        if bypass_cache and self.interface is not None:
+            if type(self).get_observables is Environment.get_observables:
+                return self.interface.get_values_cached(observable_names,
+                                                        bypass=True)
+            # custom getter, drop the cached values it could rely on
+            self._invalidate_cache(observable_names)
+
         return self.get_observables(observable_names)
 
+    # Optimizer will only call this method to evaluate a batch of points
+    @final
+    def _evaluate_batch(
+        self, variable_inputs: List[Dict[str, float]],
+        observable_names: List[str]
+    ) -> Optional[List[Dict]]:
+        # Batch evaluation not supported by the env
+        if type(self).evaluate_batch is Environment.evaluate_batch:
+            return None
+
+        observable_names_invalid = [
+            name for name in observable_names if name not in self.observables
+        ]
+        if len(observable_names_invalid):
+            raise BadgerEnvObsError(
+                f"Observables {observable_names_invalid} "
+                + "not found in environment"
+            )
+
+        variable_names = {name for variable_input in variable_inputs
+                          for name in variable_input}
+        variable_names_tmp = [
+            name for name in variable_names if name not in self.variables
+        ]
+        if len(variable_names_tmp):
+            raise BadgerEnvVarError(
+                f"Variables {variable_names_tmp} "
+                + "not defined in the environment! "
+                + "Setting them in a batch is not allowed."
+            )
+
+        _bounds = self._get_bounds(list(variable_names))
+        for variable_input in variable_inputs:
+            for name, value in variable_input.items():
+                lower, upper = _bounds[name]
+                if value > upper or value < lower:
+                    raise BadgerEnvVarError(
+                        f"Input point for {name} is outside "
+                        + f"its bounds {_bounds[name]}"
+                    )
+
+        obs_list = self.evaluate_batch(variable_inputs, observable_names)
+        self._invalidate_cache()
+        if obs_list is None:
+            return None
+
+        if len(obs_list) != len(variable_inputs):
+            raise BadgerEnvObsError(
+                f"Expected {len(variable_inputs)} observable dicts from the "
+                + f"batch evaluation, got {len(obs_list)}"
+            )
+
+        return obs_list
+
     # Optimizer will only call this method to get variable bounds
     # Lazy loading -- read the bounds only when they are needed
     # TODO: considering cache validation (is it needed?)
@@ -31,6 +31,9 @@ class ParetoFrontViewer(AnalysisExtension):
         self.plot_widget = pg.PlotWidget()
 
         self.scatter_plot = self.plot_widget.plot(pen=None, symbol='o', symbolSize=10)
+        # the non-dominated points, on top of the others
+        self.front_plot = self.plot_widget.plot(pen=None, symbol='o', symbolSize=10,
+                                                symbolBrush='r')
 
         layout = QVBoxLayout()
         layout.addWidget(self.plot_widget)
@@ -51,6 +54,14 @@ class ParetoFrontViewer(AnalysisExtension):
             # Update the scatter plot
             self.scatter_plot.setData(x=x, y=y)
 
+            tracker = routine.tracker
+            front = routine.sorted_data.loc[tracker.front_index]
+            self.front_plot.setData(x=front[x_name], y=front[y_name])
+
+            hypervolume = tracker.hypervolume
+            if hypervolume is not None:
+                self.plot_widget.setTitle(f"Hypervolume: {hypervolume:.4g}")
+
         # set labels
         self.plot_widget.setLabel("left", y_name)
         self.plot_widget.setLabel("bottom", x_name)
@@ -1,14 +1,19 @@
+import numpy as np
 from pandas import DataFrame
 from PyQt5.QtWidgets import QApplication, QTableWidget, QTableWidgetItem, QHeaderView
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QTableView
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from ..utils import GrowableArray
+from ....acquisition import NOISE_SUFFIX
+from ....timing import TIMING_PREFIX
 
 
 stylesheet = '''
-    QTableWidget
+    QTableView
     {
         alternate-background-color: #262E38;
     }
-    QTableWidget::item::selected
+    QTableView::item::selected
     {
         background-color: #B3E5FC;
         color: #000000;
@@ -16,6 +21,28 @@ stylesheet = '''
 '''
 
 
+def copy_selection(table):
+    """
+    Copy the text of the selected cells onto the clipboard, formatted
+    specifically to work with multiple-cell paste into programs like
+    google sheets, excel, or numbers.
+    """
+    copied_cells = sorted(table.selectionModel().selectedIndexes())
+    if not copied_cells:
+        return
+
+    copy_text = ''
+    max_column = copied_cells[-1].column()
+    for c in copied_cells:
+        copy_text += table.model().data(c) or ''
+        if c.column() == max_column:
+            copy_text += '\n'
+        else:
+            copy_text += '\t'
+
+    QApplication.clipboard().setText(copy_text)
+
+
 # https://stackoverflow.com/questions/60715462/how-to-copy-and-paste-multiple-cells-in-qtablewidget-in-pyqt5
 class TableWithCopy(QTableWidget):
     """
@@ -31,67 +58,131 @@ class TableWithCopy(QTableWidget):
     def keyPressEvent(self, event):
         super().keyPressEvent(event)
         if event.key() == Qt.Key.Key_C and (event.modifiers() & Qt.KeyboardModifier.ControlModifier):
-            copied_cells = sorted(self.selectedIndexes())
+            copy_selection(self)
+
+
+class RunDataModel(QAbstractTableModel):
+    """
+    Table model of the run data, the values are kept in a 2D array and
+    only formatted when the cells are painted.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.columns = []
+        self.values = GrowableArray(0)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return self.values.size
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+
+        return f'{self.values.data[index.row(), index.column()]:g}'
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
 
-            copy_text = ''
-            max_column = copied_cells[-1].column()
-            for c in copied_cells:
-                copy_text += self.item(c.row(), c.column()).text()
-                if c.column() == max_column:
-                    copy_text += '\n'
-                else:
-                    copy_text += '\t'
+        if orientation == Qt.Horizontal:
+            try:
+                return self.columns[section]
+            except IndexError:
+                return None
 
-            QApplication.clipboard().setText(copy_text)
+        return str(section)  # row index starts from 0
+
+    def reset(self, columns, values=None):
+        self.beginResetModel()
+        self.columns = list(columns)
+        if values is None:
+            values = np.empty((0, len(self.columns)))
+        self.values = GrowableArray(len(self.columns), max(256, len(values)))
+        self.values.append(values)
+        self.endResetModel()
+
+    def append_rows(self, rows):
+        """
+        Append rows to the table, views are notified through the
+        rowsInserted signal.
+        """
+        rows = np.atleast_2d(np.asarray(rows, dtype=np.double))
+        if not len(rows):
+            return
+
+        n = self.values.size
+        self.beginInsertRows(QModelIndex(), n, n + len(rows) - 1)
+        self.values.append(rows)
+        self.endInsertRows()
+
+
+class RunDataTable(QTableView):
+    """
+    View of a RunDataModel that supports copying multiple cell's text
+    onto the clipboard.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.setModel(RunDataModel(self))
+
+    def keyPressEvent(self, event):
+        super().keyPressEvent(event)
+        if event.key() == Qt.Key.Key_C and (event.modifiers() & Qt.KeyboardModifier.ControlModifier):
+            copy_selection(self)
 
 
 def update_table(table, data=None):
-    table.setRowCount(0)
     table.horizontalHeader().setVisible(False)
 
     if data is None:
+        table.model().reset([])
         return table
 
-    _data = data.drop(columns=['timestamp', 'xopt_error', 'xopt_runtime'])
-
-    m, n = _data.shape
-    table.setRowCount(m)
-    table.setColumnCount(n)
-    for i in range(m):
-        for j in range(n):
-            v = _data.iloc[i, j]
-            table.setItem(i, j, QTableWidgetItem(f'{v:g}'))
-    table.setHorizontalHeaderLabels(list(_data.columns))
-    table.setVerticalHeaderLabels(list(map(str, _data.index)))  # row index starts from 0
+    # Same columns as a live run (see get_header): the timings and noises
+    # archived with the points are not shown
+    hidden = ['timestamp', 'xopt_error', 'xopt_runtime'] + [
+        col for col in data.columns if col.startswith(TIMING_PREFIX) or
+        (col.endswith(NOISE_SUFFIX) and
+         col[:-len(NOISE_SUFFIX)] in data.columns)]
+    _data = data.drop(columns=hidden)
+    table.model().reset(_data.columns, _data.to_numpy(dtype=np.double))
     table.horizontalHeader().setVisible(True)
 
     return table
 
 
 def reset_table(table, header):
-    table.setRowCount(0)
-    # Need to set col num or the old col num will be used for new data,
-    # resulting in potential incomplete table
-    table.setColumnCount(len(header))
-    table.horizontalHeader().setVisible(False)
-    table.setHorizontalHeaderLabels(header)
+    table.model().reset(header)
     table.horizontalHeader().setVisible(True)
 
     return table
 
 
-def add_row(table, row):
-    r = table.rowCount()
-    table.insertRow(r)
-    for i, v in enumerate(row):
-        table.setItem(r, i, QTableWidgetItem(f'{v:g}'))
-    table.setVerticalHeaderItem(r, QTableWidgetItem(str(r)))
+def add_rows(table, rows):
+    table.model().append_rows(rows)
 
     return table
 
 
+def add_row(table, row):
+    return add_rows(table, [row])
+
+
 def data_table(data=None):
-    table = TableWithCopy()
+    table = RunDataTable()
     table.setAlternatingRowColors(True)
     table.setStyleSheet(stylesheet)
     table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
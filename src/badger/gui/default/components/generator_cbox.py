@@ -1,7 +1,10 @@
 from PyQt5.QtWidgets import QVBoxLayout, QHBoxLayout, QPushButton, QWidget, QPlainTextEdit
 from PyQt5.QtWidgets import QComboBox, QCheckBox, QStyledItemDelegate, QLabel
+from PyQt5.QtWidgets import QSpinBox
 from .collapsible_box import CollapsibleBox
 from ....settings import read_value
+from ....training import TRAINING_POLICIES, TrainingWindow
+from ....warm_start import WarmStart
 from ....utils import strtobool
 
 
@@ -114,5 +117,100 @@ class BadgerAlgoBox(CollapsibleBox):
         if not strtobool(read_value('BADGER_ENABLE_ADVANCED')):
             cbox_misc.hide()
 
+        # Training data of the generator model
+        cbox_training = CollapsibleBox(self, ' Training Data')
+        vbox.addWidget(cbox_training)
+        vbox_training = QVBoxLayout()
+
+        policy = QWidget()
+        hbox_policy = QHBoxLayout(policy)
+        hbox_policy.setContentsMargins(0, 0, 0, 0)
+        lbl_policy = QLabel('Policy')
+        lbl_policy.setFixedWidth(64)
+        hbox_policy.addWidget(lbl_policy)
+        self.cb_training = cb_training = QComboBox()
+        cb_training.setItemDelegate(QStyledItemDelegate())
+        cb_training.addItems(['All points'] + list(TRAINING_POLICIES.values()))
+        cb_training.setToolTip(
+            'Points used to train the model, all the points are archived')
+        hbox_policy.addWidget(cb_training, 1)
+        vbox_training.addWidget(policy)
+
+        size = QWidget()
+        hbox_size = QHBoxLayout(size)
+        hbox_size.setContentsMargins(0, 0, 0, 0)
+        lbl_size = QLabel('Size')
+        lbl_size.setFixedWidth(64)
+        hbox_size.addWidget(lbl_size)
+        self.sb_training_size = sb_size = QSpinBox()
+        sb_size.setRange(1, 100000)
+        sb_size.setToolTip('Number of recent (or closest to the best) points')
+        hbox_size.addWidget(sb_size, 1)
+        lbl_best = QLabel('Best')
+        hbox_size.addWidget(lbl_best)
+        self.sb_training_best = sb_best = QSpinBox()
+        sb_best.setRange(0, 100000)
+        sb_best.setToolTip('Number of best points kept in addition to the '
+                           'recent ones')
+        hbox_size.addWidget(sb_best, 1)
+        vbox_training.addWidget(size)
+
+        warm_start = QWidget()
+        hbox_warm = QHBoxLayout(warm_start)
+        hbox_warm.setContentsMargins(0, 0, 0, 0)
+        self.check_warm_start = check_warm = QCheckBox('Warm start from archived runs')
+        check_warm.setToolTip(
+            'Train the model on the points of the archived runs on the same '
+            'environment and variables')
+        hbox_warm.addWidget(check_warm, 1)
+        lbl_age = QLabel('Max age (days)')
+        hbox_warm.addWidget(lbl_age)
+        self.sb_warm_start_age = sb_age = QSpinBox()
+        sb_age.setRange(1, 3650)
+        hbox_warm.addWidget(sb_age)
+        vbox_training.addWidget(warm_start)
+
+        cbox_training.setContentLayout(vbox_training)
+        self.set_training_window(None)
+        self.set_warm_start(None)
+
         self.setContentLayout(vbox)
         # vbox.addStretch()
+
+    def set_training_window(self, window: TrainingWindow = None):
+        if window is None:
+            self.cb_training.setCurrentIndex(0)
+            window = TrainingWindow()  # for the default values
+        else:
+            policies = list(TRAINING_POLICIES)
+            self.cb_training.setCurrentIndex(
+                policies.index(window.policy) + 1)
+        self.sb_training_size.setValue(window.size)
+        self.sb_training_best.setValue(window.n_best)
+
+    def set_warm_start(self, warm_start: WarmStart = None):
+        self.check_warm_start.setChecked(warm_start is not None)
+        if warm_start is None:
+            warm_start = WarmStart()  # for the default values
+        self.sb_warm_start_age.setValue(int(warm_start.max_age or 3650))
+
+    def enable_warm_start(self, enabled: bool):
+        # Only the Bayesian generators can be warm started
+        self.check_warm_start.setEnabled(enabled)
+        self.sb_warm_start_age.setEnabled(enabled)
+
+    def get_warm_start(self) -> WarmStart:
+        if not (self.check_warm_start.isEnabled() and
+                self.check_warm_start.isChecked()):
+            return None
+
+        return WarmStart(max_age=self.sb_warm_start_age.value())
+
+    def get_training_window(self) -> TrainingWindow:
+        idx = self.cb_training.currentIndex()
+        if idx <= 0:  # all points
+            return None
+
+        return TrainingWindow(policy=list(TRAINING_POLICIES)[idx - 1],
+                              size=self.sb_training_size.value(),
+                              n_best=self.sb_training_best.value())
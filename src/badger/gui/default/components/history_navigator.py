@@ -1,6 +1,14 @@
 from PyQt5.QtWidgets import QComboBox, QTreeWidget, QTreeWidgetItem
 from PyQt5.QtCore import QModelIndex, Qt
-from ....utils import run_names_to_dict
+from ....db import get_run_groups, get_runs_page, get_adjacent_run, \
+    search_runs
+
+# Data roles of the tree items
+ROLE_GROUP = Qt.UserRole  # (level, date) of a year/month/day node
+ROLE_LOADED = Qt.UserRole + 1  # if the children have been fetched
+
+# Level of the children of each kind of node
+CHILD_LEVEL = {'year': 'month', 'month': 'day', 'day': 'run'}
 
 
 # Modified based on the following solution
@@ -16,137 +24,181 @@ class HistoryNavigator(QComboBox):
         self.view().setMinimumHeight(256)
         # self.view().setItemsExpandable(False)
         # self.view().setRootIsDecorated(False)
-        self.runs = None  # all runs to be shown in combobox
+        self.view().itemExpanded.connect(self.fetchChildren)
+
+        self.routine = None  # show runs of this routine, all runs if None
+        self.keyword = ''  # only show the runs matching it, if any
+        self.results = []  # matching runs, best matches first
 
     def showPopup(self):
         self.setRootModelIndex(QModelIndex())  # key to success!
         QComboBox.showPopup(self)
 
-    def _firstSelectableItem(self, parent=QModelIndex()):
+    def _createGroupItem(self, level, group):
+        # The displayed text is the date, as the directories in the archive
+        item = QTreeWidgetItem([group])
+        item.setFlags(item.flags() & ~Qt.ItemIsSelectable)
+        item.setData(0, ROLE_GROUP, (level, group))
+        item.setData(0, ROLE_LOADED, False)
+        # Children are fetched on expanding
+        item.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
+
+        return item
+
+    def fetchChildren(self, item):
         """
-        Internal recursive function for finding the first selectable item.
+        Populate a year/month/day node with its children, if not yet done.
         """
-        for i in range(self.model().rowCount(parent)):
-            itemIndex = self.model().index(i, 0, parent)
-            if self.view().itemFromIndex(itemIndex).flags() & Qt.ItemIsSelectable:
-                return parent, i
-            else:
-                itemIndex, row = self._firstSelectableItem(itemIndex)
-                if row is not None:
-                    return itemIndex, row
-        return parent, None
+        if item.data(0, ROLE_LOADED):
+            return
 
-    def currentIsFirst(self):
-        if not self.runs:
-            return True
+        level, group = item.data(0, ROLE_GROUP)
+        child_level = CHILD_LEVEL[level]
+        if child_level == 'run':
+            children = [QTreeWidgetItem([run]) for run in get_runs_page(
+                group, self.routine)]
+        else:
+            children = [self._createGroupItem(child_level, child)
+                        for child in get_run_groups(
+                            child_level, group, self.routine)]
+        item.addChildren(children)
+        item.setData(0, ROLE_LOADED, True)
+        item.setChildIndicatorPolicy(
+            QTreeWidgetItem.DontShowIndicatorWhenChildless)
+
+    def _findChild(self, parent, text):
+        # parent: tree item, None for the top level
+        if parent is None:
+            items = [self.view().topLevelItem(i)
+                     for i in range(self.view().topLevelItemCount())]
+        else:
+            self.fetchChildren(parent)
+            items = [parent.child(i) for i in range(parent.childCount())]
+
+        for item in items:
+            if item.text(0) == text:
+                return item
+
+        return None
+
+    def _findRunItem(self, run):
+        """
+        Internal function for finding the item of a run, the nodes on the
+        path to the run are populated along the way.
+        """
+        if self.keyword:  # flat list of the matching runs
+            return self._findChild(None, run)
 
+        tokens = run.split('-')
+        path = [tokens[1], f'{tokens[1]}-{tokens[2]}',
+                f'{tokens[1]}-{tokens[2]}-{tokens[3]}', run]
+
+        item = None
+        for text in path:
+            item = self._findChild(item, text)
+            if item is None:
+                return None
+
+        return item
+
+    def _selectRun(self, run):
+        item = self._findRunItem(run) if run else None
+        if item is None:
+            return
+
+        if item.parent() is None:
+            self.setRootModelIndex(QModelIndex())
+            self.setCurrentIndex(self.view().indexOfTopLevelItem(item))
+            return
+
+        parent = self.view().indexFromItem(item.parent())
+        self.setRootModelIndex(parent)
+        self.setCurrentIndex(item.parent().indexOfChild(item))
+
+    def _currentRun(self):
         run = self.currentText()
-        try:
-            idx = self.runs.index(run)
-            if idx == 0:
-                return True
-            else:
-                return False
-        except:  # run is empty string
+        if not run.startswith('BadgerOpt-'):  # empty or run in progress
+            return None
+
+        return run
+
+    def _adjacentRun(self, run, older=True):
+        if not self.keyword:
+            return get_adjacent_run(run, self.routine, older)
+
+        # Next/previous search result
+        i = self.results.index(run) + (1 if older else -1)
+        if 0 <= i < len(self.results):
+            return self.results[i]
+
+        return None
+
+    def currentIsFirst(self):
+        run = self._currentRun()
+        if run is None:
             return True
 
+        return self._adjacentRun(run, older=False) is None
+
     def currentIsLast(self):
-        if not self.runs:
+        run = self._currentRun()
+        if run is None:
             return True
 
-        run = self.currentText()
-        try:
-            idx = self.runs.index(run)
-            tot = len(self.runs)
-            if idx == tot - 1:
-                return True
-            else:
-                return False
-        except:  # run is empty string
-            return True
+        return self._adjacentRun(run) is None
 
-    def _firstMatchingSelectableItem(self, text, parent=QModelIndex()):
-        for i in range(self.model().rowCount(parent)):
-            itemIndex = self.model().index(i, 0, parent)
-            item = self.view().itemFromIndex(itemIndex)
-            if (item.flags() & Qt.ItemIsSelectable) and item.text(0) == text:
-                return parent, i
-            else:
-                itemIndex, row = self._firstMatchingSelectableItem(text, itemIndex)
-                if row is not None:
-                    return itemIndex, row
-        return parent, None
-
-    def _nextSelectableItem(self, parent=QModelIndex()):
-        run_curr = self.currentText()
-        idx = self.runs.index(run_curr)
-        run_next = self.runs[idx + 1]
-
-        return self._firstMatchingSelectableItem(run_next)
-
-    def _previousSelectableItem(self, parent=QModelIndex()):
-        run_curr = self.currentText()
-        idx = self.runs.index(run_curr)
-        run_prev = self.runs[idx - 1]
-
-        return self._firstMatchingSelectableItem(run_prev)
-
-    def updateItems(self, runs=None):
+    def setKeyword(self, keyword):
+        """
+        Only show the runs matching keyword (filename, routine name or
+        date), best matches first, all the runs if keyword is empty.
+        """
+        self.keyword = keyword.strip()
+        self.updateItems(self.routine)
+
+    def updateItems(self, routine=None):
+        """
+        Show the runs of routine (all runs if routine is None). Only the
+        latest day is populated, other nodes fetch their runs on expanding.
+        """
         self.view().clear()
 
-        self.runs = runs  # store the runs for nav
-        if runs is None:
+        self.routine = routine
+        if self.keyword:
+            self.results = search_runs(self.keyword, self.routine)
+            self.view().insertTopLevelItems(
+                0, [QTreeWidgetItem([run]) for run in self.results])
+            if self.results:
+                self._selectRun(self.results[0])
             return
 
-        items = []
-        flag_first_item = True
-        first_items = []
-        runs_dict = run_names_to_dict(runs)
-        for year, dict_year in runs_dict.items():
-            item_year = QTreeWidgetItem([year])
-            item_year.setFlags(item_year.flags() & ~Qt.ItemIsSelectable)
-
-            if flag_first_item:
-                first_items.append(item_year)
-
-            for month, dict_month in dict_year.items():
-                item_month = QTreeWidgetItem([month])
-                item_month.setFlags(item_month.flags() & ~Qt.ItemIsSelectable)
-
-                if flag_first_item:
-                    first_items.append(item_month)
-
-                for day, list_day in dict_month.items():
-                    item_day = QTreeWidgetItem([day])
-                    item_day.setFlags(item_day.flags() & ~Qt.ItemIsSelectable)
-
-                    if flag_first_item:
-                        first_items.append(item_day)
-                        flag_first_item = False
-
-                    for i, file in enumerate(list_day):
-                        item_file = QTreeWidgetItem([file])
-                        item_day.addChild(item_file)
-                    item_month.addChild(item_day)
-                item_year.addChild(item_month)
-            items.append(item_year)
+        items = [self._createGroupItem('year', year)
+                 for year in get_run_groups('year',
+                                            routine=self.routine)]
         self.view().insertTopLevelItems(0, items)
-        for item in first_items:
+        if not items:
+            return
+
+        # Expand the latest year/month/day
+        item = items[0]
+        while item is not None:
+            self.fetchChildren(item)
             item.setExpanded(True)
+            item = item.child(0) if item.data(0, ROLE_GROUP)[0] != 'day' \
+                else None
 
-        parent, row = self._firstSelectableItem()  # key to success!
-        if row is not None:
-            self.setRootModelIndex(parent)
-            self.setCurrentIndex(row)
+        latest = get_runs_page(routine=self.routine, limit=1)
+        self._selectRun(latest[0])  # key to success!
 
     def selectNextItem(self):
-        parent, row = self._nextSelectableItem()
-        if row is not None:
-            self.setRootModelIndex(parent)
-            self.setCurrentIndex(row)
+        run = self._currentRun()
+        if run is None:
+            return
+
+        self._selectRun(self._adjacentRun(run))
 
     def selectPreviousItem(self):
-        parent, row = self._previousSelectableItem()
-        if row is not None:
-            self.setRootModelIndex(parent)
-            self.setCurrentIndex(row)
+        run = self._currentRun()
+        if run is None:
+            return
+
+        self._selectRun(self._adjacentRun(run, older=False))
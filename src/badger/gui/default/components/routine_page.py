@@ -12,7 +12,8 @@ from PyQt5.QtWidgets import QTableWidgetItem, QPlainTextEdit, QSizePolicy
 from coolname import generate_slug
 from pydantic import ValidationError
 from xopt import VOCS
-from xopt.generators import get_generator_defaults
+from xopt.generators import get_generator, get_generator_defaults
+from xopt.generators.bayesian.bayesian_generator import BayesianGenerator
 
 from .generator_cbox import BadgerAlgoBox
 from .constraint_item import constraint_item
@@ -161,6 +162,8 @@ class BadgerRoutinePage(QWidget):
         if routine is None:
             # Reset the generator and env configs
             self.generator_box.cb.setCurrentIndex(-1)
+            self.generator_box.set_training_window(None)
+            self.generator_box.set_warm_start(None)
             self.env_box.cb.setCurrentIndex(-1)
 
             # Reset the routine configs check box status
@@ -185,6 +188,8 @@ class BadgerRoutinePage(QWidget):
         # self.generator_box.edit.setPlainText(routine.generator.yaml())
         self.generator_box.edit.setPlainText(
             get_yaml_string(routine.generator.model_dump()))
+        self.generator_box.set_training_window(routine.training_window)
+        self.generator_box.set_warm_start(routine.warm_start)
         self.script = routine.script
 
         name_env = routine.environment.name
@@ -247,6 +252,8 @@ class BadgerRoutinePage(QWidget):
         name = self.generators[i]
         default_config = get_generator_defaults(name)
         self.generator_box.edit.setPlainText(get_yaml_string(default_config))
+        self.generator_box.enable_warm_start(
+            issubclass(get_generator(name), BayesianGenerator))
 
         # Update the docs
         self.window_docs.update_docs(name)
@@ -612,6 +619,8 @@ class BadgerRoutinePage(QWidget):
             critical_constraint_names=critical_constraints,
             tags=None,
             script=script,
+            training_window=self.generator_box.get_training_window(),
+            warm_start=self.generator_box.get_warm_start(),
         )
 
     def review(self):
@@ -1,17 +1,24 @@
 import logging
 
 logger = logging.getLogger(__name__)
+import json
+import multiprocessing
 import time
 from pandas import DataFrame
 from PyQt5.QtCore import pyqtSignal, QObject, QRunnable
-from ....core import run_routine, Routine
-from ....errors import BadgerRunTerminatedError
+from ....core import run_routine, RunControl, Routine
+from ....errors import BadgerRoutineError, BadgerRunTerminatedError
+from ....termination import TerminationChecker
+from ....timing import RunTrace
+from ....worker import run_routine_worker, MSG_ENV_READY, MSG_STATES, \
+    MSG_PROGRESS, MSG_TIMING, MSG_TERMINATED, MSG_ERROR, CMD_PAUSE, \
+    CMD_STOP, CMD_TERMINATION
 
 
 class BadgerRoutineSignals(QObject):
     env_ready = pyqtSignal(list)
     finished = pyqtSignal()
-    progress = pyqtSignal()
+    progress = pyqtSignal(DataFrame)  # newly evaluated solution(s)
     error = pyqtSignal(Exception)
     info = pyqtSignal(str)
 
@@ -51,18 +58,29 @@ class BadgerRoutineRunner(QRunnable):
         self.verbose = verbose
         self.use_full_ts = use_full_ts
         self.termination_condition = None  # additional option to control the optimization flow
+        self.termination = None  # checker of the termination condition
         self.start_time = None  # track the time cost of the run
         self.last_dump_time = None  # track the time the run data got dumped
 
-        self.is_paused = False
-        self.is_killed = False
+        self.control = RunControl()  # pause/resume/stop the run
+        self.trace = RunTrace()  # time spent in each phase of the steps
+
+    @property
+    def is_paused(self):
+        return self.control.is_paused
+
+    @property
+    def is_killed(self):
+        return self.control.is_killed
 
     def set_termination_condition(self, termination_condition):
         self.termination_condition = termination_condition
+        self.termination = None  # start over
 
     def run(self) -> None:
         self.start_time = time.time()
         self.last_dump_time = None  # reset the timer
+        self.termination = None
 
         try:
             self.save_init_vars()
@@ -73,7 +91,8 @@ class BadgerRoutineRunner(QRunnable):
                 active_callback=self.check_run_status,
                 generate_callback=self.before_evaluate,
                 evaluate_callback=self.after_evaluate,
-                states_callback=self.states_ready
+                states_callback=self.states_ready,
+                trace=self.trace
             )
         except BadgerRunTerminatedError as e:
             self.signals.finished.emit()
@@ -85,16 +104,14 @@ class BadgerRoutineRunner(QRunnable):
 
     def before_evaluate(self, candidates: DataFrame):
         # vars: ndarray
-        while self.is_paused:
-            time.sleep(0)
-            if self.is_killed:
-                raise BadgerRunTerminatedError
+        # Block while paused, until resumed or stopped
+        self.control.wait()
 
         if self.is_killed:
             raise BadgerRunTerminatedError
 
     def after_evaluate(self, data: DataFrame):
-        self.signals.progress.emit()
+        self.signals.progress.emit(data)
 
         # Try dump the run data and interface log to the disk
         # dump_period = float(read_value('BADGER_DATA_DUMP_PERIOD'))
@@ -109,9 +126,6 @@ class BadgerRoutineRunner(QRunnable):
         #     except:
         #         pass
 
-        # Take a break to let the outside signal change the status
-        time.sleep(0.1)
-
     def check_run_status(self):
         """
         check for termination condition
@@ -119,28 +133,19 @@ class BadgerRoutineRunner(QRunnable):
         - checks for internal triggers (max eval, max time) and external triggers
 
         """
-        # Check if termination condition has been satisfied
-        if self.termination_condition:
-            tc_config = self.termination_condition
-            idx = tc_config['tc_idx']
-            if idx == 0:
-                max_eval = tc_config['max_eval']
-                if len(self.routine.data) >= max_eval:
-                    return 2
-
-            elif idx == 1:
-                max_time = tc_config['max_time']
-                dt = time.time() - self.start_time
-                if dt >= max_time:
-                    return 2
+        # Block while paused, until resumed or stopped
+        self.control.wait()
 
-        # External triggers
-        if self.is_killed:
+        # Check if termination condition has been satisfied, the running
+        # statistics are updated with the new points only
+        if self.termination is None:
+            self.termination = TerminationChecker(
+                self.termination_condition, self.start_time)
+        if self.termination.check(self.routine):
             return 2
-        elif self.is_paused:
-            return 1
-        else:
-            return 0  # continue to run
+
+        # External triggers
+        return self.control.status()
 
     def save_init_vars(self):
         var_names = self.routine.vocs.variable_names
@@ -152,7 +157,125 @@ class BadgerRoutineRunner(QRunnable):
         self.states = states
 
     def ctrl_routine(self, pause):
-        self.is_paused = pause
+        if pause:
+            self.control.pause()
+        else:
+            self.control.resume()
+
+    def stop_routine(self):
+        self.control.stop()
+
+
+class BadgerRoutineProcessRunner(BadgerRoutineRunner):
+    """
+        Run routine in a separate worker process, so that the generator
+        (model fitting) and the interface I/O don't compete with the GUI
+        event loop. This thread only relays the worker messages through the
+        same signals as BadgerRoutineRunner, and adds the evaluated solutions
+        to the routine on the GUI side.
+
+    """
+
+    # Time given to the worker to exit once stopped (or done) before it
+    # gets terminated, in seconds. A worker stuck in the interface I/O would
+    # never check for the stop command
+    exit_timeout = 10
+
+    def __init__(self, routine: Routine, save: bool, verbose=2, use_full_ts=False):
+        super().__init__(routine, save, verbose, use_full_ts)
+
+        # Commands sent before the worker starts are kept in the pipe
+        ctx = multiprocessing.get_context('spawn')
+        self.ctx = ctx
+        self.cmd_recv, self.cmd_conn = ctx.Pipe(duplex=False)
+        self.data_conn, self.data_send = ctx.Pipe(duplex=False)
+
+    def set_termination_condition(self, termination_condition):
+        super().set_termination_condition(termination_condition)
+        self.send_command(CMD_TERMINATION, termination_condition)
+
+    def send_command(self, cmd, *args):
+        try:
+            self.cmd_conn.send((cmd, *args))
+        except (BrokenPipeError, OSError):  # worker already exited
+            pass
+
+    def run(self) -> None:
+        self.start_time = time.time()
+        self.last_dump_time = None  # reset the timer
+
+        config = json.loads(self.routine.json())
+        config.pop('data', None)
+        self.routine.data = None  # reset data
+
+        process = self.ctx.Process(
+            target=run_routine_worker,
+            args=(config, self.cmd_recv, self.data_send),
+            daemon=True)
+        try:
+            process.start()
+            # Only the worker holds these ends, so EOF means it has exited
+            self.cmd_recv.close()
+            self.data_send.close()
+
+            while True:
+                try:
+                    msg, payload = self.recv()
+                except EOFError:
+                    raise BadgerRoutineError(
+                        'Worker process exited unexpectedly')
+
+                if msg == MSG_PROGRESS:
+                    self.routine.add_data(payload)
+                    self.signals.progress.emit(payload)
+                elif msg == MSG_TIMING:
+                    self.trace.add_step(payload)
+                elif msg == MSG_ENV_READY:
+                    self.signals.env_ready.emit(payload)
+                elif msg == MSG_STATES:
+                    self.states = payload
+                elif msg == MSG_TERMINATED:
+                    raise BadgerRunTerminatedError(payload)
+                elif msg == MSG_ERROR:
+                    raise BadgerRoutineError(payload)
+        except BadgerRunTerminatedError as e:
+            self.signals.finished.emit()
+            self.signals.info.emit(str(e))
+        except Exception as e:
+            logger.exception(e)
+            self.signals.finished.emit()
+            self.signals.error.emit(e)
+        finally:
+            if process.pid is not None:  # started
+                process.join(self.exit_timeout)
+                if process.is_alive():
+                    logger.warning('Worker process did not exit, terminating it')
+                    process.terminate()
+                    process.join(self.exit_timeout)
+            self.cmd_conn.close()
+            self.data_conn.close()
+
+    def recv(self):
+        # Next message of the worker, the worker has exit_timeout to send it
+        # once the run is stopped
+        deadline = None
+        while not self.data_conn.poll(0.1):
+            if not self.is_killed:
+                continue
+
+            now = time.monotonic()
+            if deadline is None:
+                deadline = now + self.exit_timeout
+            elif now > deadline:
+                raise BadgerRunTerminatedError(
+                    'Optimization stopped, the worker process did not respond')
+
+        return self.data_conn.recv()
+
+    def ctrl_routine(self, pause):
+        super().ctrl_routine(pause)
+        self.send_command(CMD_PAUSE, pause)
 
     def stop_routine(self):
-        self.is_killed = True
+        super().stop_routine()
+        self.send_command(CMD_STOP)
@@ -1,4 +1,5 @@
 import os
+import time
 import traceback
 from importlib import resources
 import numpy as np
@@ -6,23 +7,32 @@ import pandas as pd
 from PyQt5.QtWidgets import QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QCheckBox
 from PyQt5.QtWidgets import QMessageBox, QComboBox, QLabel, QStyledItemDelegate
 from PyQt5.QtWidgets import QToolButton, QMenu, QAction
-from PyQt5.QtCore import pyqtSignal, QThreadPool, QSize
+from PyQt5.QtCore import pyqtSignal, QThreadPool, QSize, QTimer
 from PyQt5.QtGui import QFont, QIcon
 import pyqtgraph as pg
 from xopt import VOCS
 
 from .extensions_palette import ExtensionsPalette
-from .routine_runner import BadgerRoutineRunner
-from ..utils import create_button
+from .routine_runner import BadgerRoutineRunner, BadgerRoutineProcessRunner
+from ..utils import create_button, GrowableArray, PeakPyramid
 from ..windows.terminition_condition_dialog import BadgerTerminationConditionDialog
 from ....routine import Routine
 # from ...utils import AURORA_PALETTE, FROST_PALETTE
 from ....logbook import send_to_logbook, BADGER_LOGBOOK_ROOT
-from ....archive import archive_run, BADGER_ARCHIVE_ROOT
+from ....archive import archive_run, archive_timing, BADGER_ARCHIVE_ROOT
+from ....settings import read_value
+from ....utils import strtobool
+from ....timing import STEP_PHASES, EVALUATION_PHASES
 
 # disable chained assignment warning from pydantic
 pd.options.mode.chained_assignment = None  # default='warn'
 
+# Minimum interval between two redraws of the curves during a run (ms)
+REDRAW_INTERVAL = 50
+# Max number of buckets of rows drawn per curve, as min/max peaks, so that a
+# redraw costs the same however long the run
+CURVE_RESOLUTION = 1000
+
 
 stylesheet_del = '''
 QPushButton:hover:pressed
@@ -109,7 +119,7 @@ class BadgerOptMonitor(QWidget):
     sig_new_run = pyqtSignal()
     sig_run_name = pyqtSignal(str)  # filename of the new run
     sig_inspect = pyqtSignal(int)  # index of the inspector
-    sig_progress = pyqtSignal(pd.DataFrame)  # new evaluated solution
+    sig_progress = pyqtSignal(pd.DataFrame)  # new evaluated solution(s)
     sig_del = pyqtSignal()
 
     def __init__(self):
@@ -128,6 +138,14 @@ class BadgerOptMonitor(QWidget):
         self.curves_objective = {}
         self.curves_constraint = {}
         self.curves_sta = {}
+        # Data of the curves: timestamp, variables, objectives, constraints
+        self.curve_names = []
+        self.curve_data = GrowableArray(0)  # as evaluated
+        self.curve_display = GrowableArray(0)  # as plotted
+        self.curve_display_mode = None
+        self.curve_peaks = PeakPyramid(0)  # of the plotted data
+        self.curves_drawn = None  # what the curves show, see redraw_curves
+        self.last_redraw = 0
 
         # Run optimization
         self.thread_pool = None
@@ -149,6 +167,14 @@ class BadgerOptMonitor(QWidget):
         self.init_ui()
         self.config_logic()
 
+        # Throttle the redraws during a run
+        self.redraw_timer = QTimer(self)
+        self.redraw_timer.setSingleShot(True)
+        self.redraw_timer.timeout.connect(self.redraw_curves)
+        # The x-axes are linked, the objective plot drives them
+        self.plot_obj.getViewBox().sigXRangeChanged.connect(
+            self.view_range_changed)
+
     @property
     def vocs(self) -> VOCS:
         return self.routine.vocs
@@ -292,8 +318,15 @@ class BadgerOptMonitor(QWidget):
         hbox_action.addWidget(btn_config)
         hbox_action.addWidget(btn_info)
 
+        # Time breakdown of the last optimization step
+        self.timing_panel = timing_panel = QLabel()
+        timing_panel.setContentsMargins(8, 0, 8, 0)
+        timing_panel.setToolTip(
+            'Time spent in each phase of the last optimization step')
+
         vbox.addWidget(config_bar)
         vbox.addWidget(monitor)
+        vbox.addWidget(timing_panel)
         vbox.addWidget(action_bar)
 
     # noinspection PyUnresolvedReferences
@@ -437,6 +470,8 @@ class BadgerOptMonitor(QWidget):
         constraint_names = self.vocs.constraint_names
         sta_names = self.vocs.constant_names
 
+        self.reset_curve_data()
+
         # Configure variable plots
         self.curves_variable = self._configure_plot(
             self.plot_var, self.inspector_variable, variable_names
@@ -546,7 +581,11 @@ class BadgerOptMonitor(QWidget):
     def init_routine_runner(self):
         self.reset_routine_runner()
 
-        self.routine_runner = routine_runner = BadgerRoutineRunner(
+        if strtobool(read_value('BADGER_RUN_IN_PROCESS')):
+            runner_class = BadgerRoutineProcessRunner
+        else:
+            runner_class = BadgerRoutineRunner
+        self.routine_runner = routine_runner = runner_class(
             self.routine, False
         )
         routine_runner.signals.env_ready.connect(self.env_ready)
@@ -568,6 +607,7 @@ class BadgerOptMonitor(QWidget):
         self.sig_new_run.emit()
         self.init_plots(self.routine)
         self.init_routine_runner()
+        self.timing_panel.clear()
         if use_termination_condition:
             self.routine_runner.set_termination_condition(self.termination_condition)
         self.running = True  # if a routine runner is working
@@ -611,10 +651,12 @@ class BadgerOptMonitor(QWidget):
 
         return data["timestamp"].to_numpy(copy=True)
 
-    def update(self):
+    def update(self, result: pd.DataFrame = None):
         # update plots in main window as well as any active extensions and the
         # extensions palette
-        self.update_curves()
+        # result: the newly evaluated solution(s), could be a batch
+        t_start = time.perf_counter()
+        self.update_curves(throttle=True)
         self.update_analysis_extensions()
         self.extensions_palette.update_palette()
 
@@ -623,40 +665,172 @@ class BadgerOptMonitor(QWidget):
         if self.eval_count < 5:
             self.enable_auto_range()
 
-        self.sig_progress.emit(self.routine.data.tail(1))
+        if result is None:
+            result = self.routine.data.tail(1)
+        self.sig_progress.emit(result)
 
         # Check critical condition
         self.check_critical()
 
-    def update_curves(self):
-        use_time_axis = self.plot_x_axis == 1
-        normalize_inputs = self.x_plot_y_axis == 1
+        if self.routine_runner:
+            trace = self.routine_runner.trace
+            trace.add('gui_update', time.perf_counter() - t_start)
+            self.update_timing_panel(trace.last)
 
-        data_copy = self.routine.sorted_data
+    def update_timing_panel(self, record):
+        # record: timing record of a step, see timing.RunTrace
+        if not record:
+            return
 
-        # Get timestamps
-        if use_time_axis:
-            ts = self.extract_timestamp(data_copy)
-            ts -= ts[0]
-        else:
-            ts = None
+        def fmt(name):
+            return f'{name.replace("_", " ")} {record[name]:.3g}s'
+
+        phases = []
+        for name in STEP_PHASES:
+            if name not in record:
+                continue
+            phases.append(fmt(name))
+            n_train = record.get('values', {}).get('n_train')
+            if name == 'generate' and n_train is not None:
+                phases[-1] += f' ({n_train:.0f} points)'
+            elif name == 'evaluate':
+                evaluation = [fmt(e) for e in EVALUATION_PHASES
+                              if not np.isnan(record.get(e, np.nan))]
+                if evaluation:
+                    phases[-1] += f' ({", ".join(evaluation)})'
+
+        self.timing_panel.setText(
+            f'Step {record["step"]}: {record["total"]:.3g}s | ' +
+            ' | '.join(phases))
+
+    def reset_curve_data(self):
+        self.curve_names = ['timestamp'] + self.vocs.variable_names + \
+            self.vocs.objective_names + self.vocs.constraint_names
+        self.curve_data = GrowableArray(len(self.curve_names))
+        self.curve_display = GrowableArray(len(self.curve_names))
+        self.curve_display_mode = None
+        self.curve_peaks = PeakPyramid(len(self.curve_names))
+        self.curves_drawn = None
+        self.redraw_timer.stop()
+
+    def transform_curve_data(self, rows):
+        # Get the plotted values from the evaluated ones
+        # rows: 2D array with the columns in self.curve_names
+        # The timestamps are always made relative, so that switching the
+        # x-axis between iteration and time doesn't need a new transform
+        normalize_inputs = self.x_plot_y_axis == 1
 
-        variable_names = self.vocs.variable_names
+        rows = rows.copy()
+        first = self.curve_data.data[:1].copy()
+        var_cols = slice(1, 1 + len(self.vocs.variable_names))
+
+        rows[:, 0] -= first[0, 0]
 
         # if normalize x, normalize using vocs
         if normalize_inputs:
-            input_data = self.vocs.normalize_inputs(data_copy)
-        else:
-            input_data = data_copy[variable_names]
+            lb, ub = self.vocs.bounds
+            rows[:, var_cols] = (rows[:, var_cols] - lb) / (ub - lb)
+            first[:, var_cols] = (first[:, var_cols] - lb) / (ub - lb)
 
-        # if plot relative, subtract the first value from the dict
+        # if plot relative, subtract the first value
         if self.x_plot_relative:
-            input_data[variable_names] = input_data[variable_names] - \
-                                        input_data[variable_names].iloc[0]
+            rows[:, var_cols] -= first[:, var_cols]
+
+        return rows
+
+    def sync_curve_data(self):
+        # Append the newly evaluated rows, transform only what is needed
+        data = self.routine.sorted_data
+        if data is None or len(data) < self.curve_data.size:
+            # the data has been reset
+            self.curve_data.clear()
+            self.curve_display.clear()
+            self.curve_peaks.clear()
+            self.curves_drawn = None
+        if data is None:
+            return
 
-        set_data(variable_names, self.curves_variable, input_data, ts)
-        set_data(self.vocs.objective_names, self.curves_objective, data_copy, ts)
-        set_data(self.vocs.constraint_names, self.curves_constraint, data_copy, ts)
+        n_old = self.curve_data.size
+        if len(data) > n_old:
+            self.curve_data.append(
+                data.iloc[n_old:][self.curve_names].to_numpy(dtype=np.double))
+
+        mode = (self.x_plot_y_axis, self.x_plot_relative)
+        if mode != self.curve_display_mode:  # transform everything again
+            self.curve_display_mode = mode
+            self.curve_display.clear()
+            self.curve_peaks.clear()
+            self.curves_drawn = None
+        n_display = self.curve_display.size
+        if self.curve_data.size > n_display:
+            self.curve_display.append(self.transform_curve_data(
+                self.curve_data.data[n_display:]))
+            self.curve_peaks.update(self.curve_display.data)
+
+    def update_curves(self, throttle=False):
+        self.sync_curve_data()
+
+        if not throttle:
+            self.redraw_curves()
+            return
+
+        self.request_redraw()
+
+    def request_redraw(self):
+        # Redraw at most once per REDRAW_INTERVAL
+        elapsed = (time.monotonic() - self.last_redraw) * 1000
+        if elapsed >= REDRAW_INTERVAL:
+            self.redraw_curves()
+        elif not self.redraw_timer.isActive():
+            self.redraw_timer.start(int(REDRAW_INTERVAL - elapsed))
+
+    def view_range_changed(self):
+        # Zoomed or panned, draw the rows that came into view. While auto
+        # ranging all the rows are drawn already, and before the first draw
+        # the curves may not match the data yet
+        if self.curves_drawn is None:
+            return
+        if not self.plot_obj.getViewBox().autoRangeEnabled()[0]:
+            self.request_redraw()
+
+    def visible_rows(self):
+        # Range of the plotted rows in view, all of them while auto ranging
+        n = self.curve_display.size
+        view_box = self.plot_obj.getViewBox()
+        if not n or view_box.autoRangeEnabled()[0]:
+            return 0, n
+
+        x_min, x_max = view_box.viewRange()[0]
+        if self.plot_x_axis == 1:  # time, sorted
+            start, stop = np.searchsorted(self.curve_display.data[:, 0],
+                                          [x_min, x_max])
+        else:
+            start, stop = np.floor(x_min), np.ceil(x_max)
+        # one more row on each side, so that the lines reach the edges
+        return int(np.clip(start - 1, 0, n)), int(np.clip(stop + 2, 0, n))
+
+    def redraw_curves(self):
+        self.redraw_timer.stop()
+        self.last_redraw = time.monotonic()
+
+        # Only the rows in view are drawn, as min/max peaks beyond
+        # CURVE_RESOLUTION rows, and only if they changed
+        start, stop = self.visible_rows()
+        drawn = (self.curve_display.size, self.curve_display_mode,
+                 self.plot_x_axis, start, stop)
+        if drawn == self.curves_drawn:
+            return
+        self.curves_drawn = drawn
+
+        display = self.curve_display.data
+        indices, rows = self.curve_peaks.peaks(display, start, stop,
+                                               CURVE_RESOLUTION)
+        x = display[indices, 0] if self.plot_x_axis == 1 else indices
+
+        curves = self.curves_variable | self.curves_objective | \
+            self.curves_constraint
+        for i, name in enumerate(self.curve_names[1:], start=1):
+            curves[name].setData(x, rows[:, i])
 
         # TODO: add tracking of observables
 
@@ -750,6 +924,7 @@ class BadgerOptMonitor(QWidget):
             # TODO: fill in the states
             run = archive_run(self.routine, states=None)
             self.routine_runner.run_filename = run['filename']
+            archive_timing(run, self.routine_runner.trace)
             env = self.routine.environment
             path = run['path']
             filename = run['filename'][:-4] + 'pickle'
@@ -891,18 +1066,20 @@ class BadgerOptMonitor(QWidget):
                                 f'Env vars {current_vars} -> {self.init_vars}')
 
     def jump_to_optimal(self):
-        try:
-            best_idx, _ = self.routine.vocs.select_best(
-                self.routine.sorted_data, n=1)
-            best_idx = int(best_idx[0])
-
-            self.jump_to_solution(best_idx)
-            self.sig_inspect.emit(best_idx)
-        except NotImplementedError:
+        tracker = self.routine.tracker
+        if tracker.is_multi_objective:
             QMessageBox.warning(
                 self, 'Jump to optimum',
                 'Jump to optimum is not supported for '
                 'multi-objective optimization yet')
+            return
+
+        if tracker.best_index is None:  # no feasible point
+            return
+
+        best_idx = int(tracker.best_index)
+        self.jump_to_solution(best_idx)
+        self.sig_inspect.emit(best_idx)
 
     def jump_to_solution(self, idx):
         if self.plot_x_axis:  # x-axis is time
@@ -1026,6 +1203,7 @@ class BadgerOptMonitor(QWidget):
             dlg = BadgerTerminationConditionDialog(
                 self, self.start,
                 self.save_termination_condition, self.termination_condition,
+                self.vocs,
             )
             self.tc_dialog = dlg
             try:
@@ -1061,11 +1239,3 @@ def create_cursor_line():
                                'fill': (200, 200, 200, 50),
                                'movable': True})
 
-
-def set_data(names: list[str], curves: dict, data: pd.DataFrame, ts=None):
-
-    for name in names:
-        if ts is not None:
-            curves[name].setData(ts, data[name].to_numpy(dtype=np.double))
-        else:
-            curves[name].setData(data[name].to_numpy(dtype=np.double))
@@ -8,7 +8,7 @@ from PyQt5.QtWidgets import QListWidget, QListWidgetItem, QLabel, QFileDialog
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QKeySequence, QIcon, QFont
 from ..components.search_bar import search_bar
-from ..components.data_table import data_table, update_table, reset_table, add_row
+from ..components.data_table import data_table, update_table, reset_table, add_rows
 from ..components.routine_item import BadgerRoutineItem
 from ..components.history_navigator import HistoryNavigator
 from ..components.run_monitor import BadgerOptMonitor
@@ -16,9 +16,9 @@ from ..components.routine_editor import BadgerRoutineEditor
 from ..components.status_bar import BadgerStatusBar
 from ..components.filter_cbox import BadgerFilterBox
 from ..utils import create_button
-from ....db import list_routine, load_routine, remove_routine, get_runs_by_routine, get_runs
+from ....db import list_routine, load_routine, remove_routine
 from ....db import import_routines, export_routines
-from ....archive import load_run, delete_run
+from ....archive import LazyRoutine, delete_run
 from ....utils import get_header, strtobool
 from ....settings import read_value
 
@@ -47,6 +47,7 @@ class BadgerHomePage(QWidget):
         self.mode = 'regular'  # home page mode
         self.splitter_state = None  # store the run splitter state
         self.tab_state = None  # store the tabs state before creating new routine
+        self.routine_editor_outdated = False  # editor to be filled when shown
 
         self.init_ui()
         self.config_logic()
@@ -150,6 +151,9 @@ class BadgerHomePage(QWidget):
         vbox_view.addWidget(history_nav_bar)
 
         label_nav = QLabel('History Run')
+        self.sbar_history = sbar_history = search_bar()
+        sbar_history.setPlaceholderText('Search runs')
+        sbar_history.setFixedWidth(160)
         self.cb_history = cb_history = HistoryNavigator()
         self.btn_prev = btn_prev = create_button(
             "next.png", "Go to the next run", size=(24, 24))
@@ -158,6 +162,7 @@ class BadgerHomePage(QWidget):
         btn_prev.setDisabled(True)
         btn_next.setDisabled(True)
         hbox_nav.addWidget(label_nav)
+        hbox_nav.addWidget(sbar_history)
         hbox_nav.addWidget(cb_history, 1)
         hbox_nav.addWidget(btn_next)
         hbox_nav.addWidget(btn_prev)
@@ -211,14 +216,17 @@ class BadgerHomePage(QWidget):
         self.sbar.textChanged.connect(self.refresh_routine_list)
         self.btn_new.clicked.connect(self.create_new_routine)
         self.routine_list.itemClicked.connect(self.select_routine)
-        self.run_table.cellClicked.connect(self.solution_selected)
-        self.run_table.itemSelectionChanged.connect(self.table_selection_changed)
+        self.run_table.clicked.connect(self.solution_selected)
+        self.run_table.selectionModel().selectionChanged.connect(
+            self.table_selection_changed)
 
         self.filter_box.cb_obj.currentIndexChanged.connect(self.refresh_routine_list)
         self.filter_box.cb_reg.currentIndexChanged.connect(self.refresh_routine_list)
         self.filter_box.cb_gain.currentIndexChanged.connect(self.refresh_routine_list)
 
         self.cb_history.currentIndexChanged.connect(self.go_run)
+        self.sbar_history.textChanged.connect(self.search_runs)
+        self.tabs.currentChanged.connect(self.tab_changed)
         self.btn_prev.clicked.connect(self.go_prev_run)
         self.btn_next.clicked.connect(self.go_next_run)
 
@@ -246,8 +254,12 @@ class BadgerHomePage(QWidget):
         self.sbar.setFocus()
 
     def load_all_runs(self):
-        runs = get_runs()
-        self.cb_history.updateItems(runs)
+        self.cb_history.updateItems()
+
+    def search_runs(self, keyword):
+        self.cb_history.setKeyword(keyword)
+        if not self.cb_history.count():
+            self.go_run(-1)  # sometimes we need to trigger this manually
 
     def create_new_routine(self):
         self.splitter_state = self.splitter_run.saveState()
@@ -281,12 +293,10 @@ class BadgerHomePage(QWidget):
         routine, timestamp = load_routine(routine_item.routine_name)
         self.current_routine = routine
         self.routine_editor.set_routine(routine)
-        runs = get_runs_by_routine(routine.name)
-        self.cb_history.updateItems(runs)
+        self.cb_history.updateItems(routine.name)
         if not self.cb_history.count():
             self.go_run(-1)  # sometimes we need to trigger this manually
-
-        if not runs:  # auto plot will not be triggered
+            # auto plot will not be triggered
             self.run_monitor.init_plots(routine)
 
         self.routine_list.itemWidget(routine_item).activate()
@@ -354,18 +364,34 @@ class BadgerHomePage(QWidget):
             return
 
         run_filename = self.cb_history.currentText()
-        try:
-            _routine = load_run(run_filename)
-            routine, _ = load_routine(_routine.name)  # get the initial routine
-            routine.data = _routine.data
-        except (IndexError, AttributeError):
-            return
+        runner = self.run_monitor.routine_runner
+        if runner and runner.run_filename == run_filename:
+            # The run just finished, its routine is still around
+            routine = runner.routine
+        else:
+            try:
+                # The routine is only instantiated when needed (rerun/edit)
+                routine = LazyRoutine(run_filename)
+            except (IndexError, AttributeError, FileNotFoundError):
+                return
         self.current_routine = routine  # update the current routine
         update_table(self.run_table, routine.sorted_data)
         self.run_monitor.init_plots(routine, run_filename)
-        self.routine_editor.set_routine(routine)
+        self.set_routine_editor(routine)
         self.status_bar.set_summary(f'current routine: {self.current_routine.name}')
 
+    def set_routine_editor(self, routine):
+        # Defer filling the routine editor until it is shown
+        if self.tabs.currentIndex() == 1:
+            self.routine_editor.set_routine(routine)
+            self.routine_editor_outdated = False
+        else:
+            self.routine_editor_outdated = True
+
+    def tab_changed(self, idx):
+        if idx == 1 and self.routine_editor_outdated:
+            self.set_routine_editor(self.current_routine)
+
     def go_prev_run(self):
         self.cb_history.selectPreviousItem()
 
@@ -375,11 +401,11 @@ class BadgerHomePage(QWidget):
     def inspect_solution(self, idx):
         self.run_table.selectRow(idx)
 
-    def solution_selected(self, r, c):
-        self.run_monitor.jump_to_solution(r)
+    def solution_selected(self, index):
+        self.run_monitor.jump_to_solution(index.row())
 
     def table_selection_changed(self):
-        indices = self.run_table.selectedIndexes()
+        indices = self.run_table.selectionModel().selectedIndexes()
         if len(indices) == 1:  # let other method handles it
             return
 
@@ -417,18 +443,16 @@ class BadgerHomePage(QWidget):
 
     def run_name(self, name):
         if self.prev_routine_item:
-            runs = get_runs_by_routine(self.current_routine.name)
+            self.cb_history.updateItems(self.current_routine.name)
         else:
-            runs = get_runs()
-        self.cb_history.updateItems(runs)
+            self.cb_history.updateItems()
 
     def progress(self, solution: DataFrame):
+        # solution could contain multiple rows if evaluated in batch
         vocs = self.current_routine.vocs
-        vars = list(solution[vocs.variable_names].to_numpy()[0])
-        objs = list(solution[vocs.objective_names].to_numpy()[0])
-        cons = list(solution[vocs.constraint_names].to_numpy()[0])
-        stas = list(solution[vocs.observable_names].to_numpy()[0])
-        add_row(self.run_table, objs + cons + vars + stas)
+        names = vocs.objective_names + vocs.constraint_names + \
+            vocs.variable_names + vocs.observable_names
+        add_rows(self.run_table, solution[names].to_numpy())
 
     def delete_run(self):
         run_name = self.cb_history.currentText()
@@ -444,10 +468,9 @@ class BadgerHomePage(QWidget):
         # Reset current routine if no routine is selected
         if not self.prev_routine_item:
             self.current_routine = None
-            runs = get_runs()
+            self.cb_history.updateItems()
         else:
-            runs = get_runs_by_routine(self.current_routine.name)
-        self.cb_history.updateItems(runs)
+            self.cb_history.updateItems(self.current_routine.name)
         if not self.cb_history.count():
             self.go_run(-1)  # sometimes we need to trigger this manually
 
@@ -1,4 +1,5 @@
 from importlib import resources
+import numpy as np
 from PyQt5.QtWidgets import QWidget, QAbstractSpinBox, QPushButton
 from PyQt5.QtCore import Qt, QObject, QEvent, QSize
 from PyQt5.QtGui import QIcon
@@ -40,3 +41,108 @@ def create_button(icon_file, tooltip,
         btn.setStyleSheet(stylesheet)
 
     return btn
+
+
+class GrowableArray:
+    """
+    2D array that rows can be appended to in amortized constant time.
+    """
+
+    def __init__(self, n_cols, capacity=256):
+        self._buffer = np.empty((capacity, n_cols))
+        self.size = 0
+
+    @property
+    def data(self):
+        # a view, only valid until the next append
+        return self._buffer[:self.size]
+
+    def append(self, rows):
+        n = self.size + len(rows)
+        if n > len(self._buffer):
+            buffer = np.empty((max(n, 2 * len(self._buffer)),
+                               self._buffer.shape[1]))
+            buffer[:self.size] = self._buffer[:self.size]
+            self._buffer = buffer
+        self._buffer[self.size:n] = rows
+        self.size = n
+
+    def clear(self):
+        self.size = 0
+
+
+class PeakPyramid:
+    """
+    Min/max pyramid of the rows of a GrowableArray, to draw long curves at a
+    bounded cost. Level k holds the min and max of each column over each
+    (complete) bucket of 2**k rows, so that any range of rows can be
+    summarized by about n_buckets peaks however long it is.
+    """
+
+    def __init__(self, n_cols):
+        self.n_cols = n_cols
+        self.levels = []  # (mins, maxs) of the buckets of 2, 4, 8... rows
+
+    def clear(self):
+        self.levels = []
+
+    def update(self, rows):
+        # rows: all the rows so far, only the new ones are summarized
+        mins = maxs = rows
+        k = 0
+        while len(mins) >= 2:
+            if k == len(self.levels):
+                self.levels.append((GrowableArray(self.n_cols),
+                                    GrowableArray(self.n_cols)))
+            level_mins, level_maxs = self.levels[k]
+            n = len(mins) // 2
+            if n > level_mins.size:
+                start, stop = 2 * level_mins.size, 2 * n
+                # fmin/fmax ignore the nan values
+                level_mins.append(np.fmin(mins[start:stop:2],
+                                          mins[start + 1:stop:2]))
+                level_maxs.append(np.fmax(maxs[start:stop:2],
+                                          maxs[start + 1:stop:2]))
+            mins, maxs = level_mins.data, level_maxs.data
+            k += 1
+
+    def peaks(self, rows, start, stop, n_buckets):
+        """
+        Summarize rows[start:stop] with the min and max rows of buckets of
+        rows, at most 2 * n_buckets rows in total, or the rows themselves if
+        there are few enough. Return the index of the first row of each
+        bucket (of each row) and the summarized rows.
+        """
+        n_rows = stop - start
+        if n_rows <= 2 * n_buckets:
+            return np.arange(start, stop), rows[start:stop]
+
+        # The buckets of 2**k rows, at most k - 1 smaller ones after them
+        # and one row should fit in the 2 * n_buckets rows
+        k = int(np.ceil(np.log2(n_rows / n_buckets)))
+        while k < len(self.levels) and \
+                n_rows // (1 << k) + 1 + k > n_buckets:
+            k += 1
+        k = min(k, len(self.levels))
+        size = 1 << k
+        mins, maxs = self.levels[k - 1]
+        first, last = start // size, stop // size
+        values = np.empty((2 * (last - first), self.n_cols))
+        values[0::2] = mins.data[first:last]
+        values[1::2] = maxs.data[first:last]
+        indices = [np.repeat(np.arange(first, last) * size, 2)]
+        values = [values]
+
+        # The rows after the last bucket, with smaller buckets
+        pos = last * size
+        for j in range(k - 1, 0, -1):
+            if pos + (1 << j) <= stop:
+                mins, maxs = self.levels[j - 1]
+                i = pos >> j
+                indices.append([pos, pos])
+                values.append(np.stack([mins.data[i], maxs.data[i]]))
+                pos += 1 << j
+        indices.append(np.arange(pos, stop))
+        values.append(rows[pos:stop])
+
+        return np.concatenate(indices), np.concatenate(values)
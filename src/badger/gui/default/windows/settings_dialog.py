@@ -70,18 +70,18 @@ class BadgerSettingsDialog(QDialog):
         grid.addWidget(archive_root_path, 4, 1)
 
         # Check Variable Interval
-        # self.var_int = var_int = QLabel('Check Variable Interval')
-        # self.var_int_val = var_int_val = QLineEdit(str(read_value('BADGER_CHECK_VAR_INTERVAL')))
-        # self.var_int_val.setValidator(validator)
-        # grid.addWidget(var_int, 5, 0)
-        # grid.addWidget(var_int_val, 5, 1)
+        self.var_int = var_int = QLabel('Check Variable Interval')
+        self.var_int_val = var_int_val = QLineEdit(str(read_value('BADGER_CHECK_VAR_INTERVAL')))
+        self.var_int_val.setValidator(validator)
+        grid.addWidget(var_int, 5, 0)
+        grid.addWidget(var_int_val, 5, 1)
 
         # Check Variable Timeout
-        # self.var_time = var_time = QLabel('Check Variable Timeout')
-        # self.var_time_val = var_time_val = QLineEdit(str(read_value('BADGER_CHECK_VAR_TIMEOUT')))
-        # self.var_time_val.setValidator(validator)
-        # grid.addWidget(var_time, 6, 0)
-        # grid.addWidget(var_time_val, 6, 1)
+        self.var_time = var_time = QLabel('Check Variable Timeout')
+        self.var_time_val = var_time_val = QLineEdit(str(read_value('BADGER_CHECK_VAR_TIMEOUT')))
+        self.var_time_val.setValidator(validator)
+        grid.addWidget(var_time, 6, 0)
+        grid.addWidget(var_time_val, 6, 1)
 
         # Plugin URL
         # self.plugin_url = plugin_url = QLabel('Plugin Server URL')
@@ -103,6 +103,13 @@ class BadgerSettingsDialog(QDialog):
         grid.addWidget(adv_features, 9, 0)
         grid.addWidget(enable_adv_features, 9, 1)
 
+        # Run the optimization in a worker process
+        self.run_in_process = run_in_process = QLabel('Run in Separate Process')
+        self.enable_run_in_process = enable_run_in_process = QCheckBox()
+        enable_run_in_process.setChecked(bool(strtobool(read_value('BADGER_RUN_IN_PROCESS'))))
+        grid.addWidget(run_in_process, 10, 0)
+        grid.addWidget(enable_run_in_process, 10, 1)
+
         grid.setColumnStretch(1, 1)
 
         vbox.addWidget(widget_settings)
@@ -139,13 +146,17 @@ class BadgerSettingsDialog(QDialog):
         write_value('BADGER_DB_ROOT', self.db_root_path.text())
         write_value('BADGER_LOGBOOK_ROOT', self.logbook_root_path.text())
         write_value('BADGER_ARCHIVE_ROOT', self.archive_root_path.text())
-        # write_value('BADGER_CHECK_VAR_INTERVAL', self.var_int_val.text())
-        # write_value('BADGER_CHECK_VAR_TIMEOUT', self.var_time_val.text())
+        write_value('BADGER_CHECK_VAR_INTERVAL',
+                    float(self.var_int_val.text()))
+        write_value('BADGER_CHECK_VAR_TIMEOUT',
+                    float(self.var_time_val.text()))
         # write_value('BADGER_PLUGINS_URL', self.plugin_url_name.text())
         write_value('BADGER_DATA_DUMP_PERIOD',
                     float(self.dump_period_val.text()))
         write_value('BADGER_ENABLE_ADVANCED',
                     self.enable_adv_features.isChecked())
+        write_value('BADGER_RUN_IN_PROCESS',
+                    self.enable_run_in_process.isChecked())
 
     def restore_settings(self):
         # Reset theme if needed
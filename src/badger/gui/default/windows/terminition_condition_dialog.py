@@ -1,5 +1,7 @@
 from PyQt5.QtWidgets import QDialog, QWidget, QHBoxLayout, QPushButton, QVBoxLayout, QSpinBox, QDoubleSpinBox
 from PyQt5.QtWidgets import QGroupBox, QLabel, QComboBox, QStyledItemDelegate, QStackedWidget
+from ....termination import DEFAULT_TERMINATION_CONDITION, \
+    SINGLE_OBJECTIVE_CONDITIONS, TC_MAX_EVAL
 
 
 stylesheet_run = '''
@@ -20,19 +22,20 @@ QPushButton
 
 
 class BadgerTerminationConditionDialog(QDialog):
-    def __init__(self, parent, run_opt, save_config, configs=None):
+    def __init__(self, parent, run_opt, save_config, configs=None,
+                 vocs=None):
         super().__init__(parent)
 
         self.run_opt = run_opt
         self.save_config = save_config
-        self.configs = configs
-        if configs is None:
-            self.configs = {
-                'tc_idx': 0,
-                'max_eval': 42,
-                'max_time': 600,
-                'ftol': 0
-            }
+        # Fill in the parameters of the conditions added since configs saved
+        self.configs = DEFAULT_TERMINATION_CONDITION | (configs or {})
+        # The conditions on the best objective value need a single objective
+        self.multi_objective = vocs is not None and \
+            len(vocs.objective_names) > 1
+        if self.multi_objective and \
+                self.configs['tc_idx'] in SINGLE_OBJECTIVE_CONDITIONS:
+            self.configs['tc_idx'] = TC_MAX_EVAL
 
         self.init_ui()
         self.config_logic()
@@ -55,8 +58,16 @@ class BadgerTerminationConditionDialog(QDialog):
         cb.addItems([
             'maximum evaluation reached',
             'maximum running time exceeded',
-            # 'optimization converged',
+            'no improvement in N evaluations',
+            'improvement rate below threshold',
+            'objective target reached',
+            'model uncertainty below tolerance',
         ])
+        if self.multi_objective:
+            for i in SINGLE_OBJECTIVE_CONDITIONS:
+                item = cb.model().item(i)
+                item.setEnabled(False)
+                item.setToolTip('Not available for multiple objectives')
         cb.setCurrentIndex(self.configs['tc_idx'])
 
         hbox.addWidget(lbl)
@@ -92,6 +103,17 @@ class BadgerTerminationConditionDialog(QDialog):
         sb_max_time.setSingleStep(0.1)
         hbox_max_time.addWidget(lbl)
         hbox_max_time.addWidget(sb_max_time, 1)
+        # No improvement config
+        stall_config = QWidget()
+        hbox_stall = QHBoxLayout(stall_config)
+        hbox_stall.setContentsMargins(0, 0, 0, 0)
+        lbl = QLabel('Evaluations without improvement')
+        self.sb_max_stall = sb_max_stall = QSpinBox()
+        sb_max_stall.setMinimum(1)
+        sb_max_stall.setMaximum(100000)
+        sb_max_stall.setValue(self.configs['max_stall'])
+        hbox_stall.addWidget(lbl)
+        hbox_stall.addWidget(sb_max_stall, 1)
         # Tolerance config
         tol_config = QWidget()
         hbox_tol = QHBoxLayout(tol_config)
@@ -103,12 +125,46 @@ class BadgerTerminationConditionDialog(QDialog):
         sb_tol.setValue(self.configs['ftol'])
         sb_tol.setDecimals(4)
         sb_tol.setSingleStep(0.001)
+        lbl_window = QLabel('over')
+        self.sb_window = sb_window = QSpinBox()
+        sb_window.setMinimum(1)
+        sb_window.setMaximum(100000)
+        sb_window.setValue(self.configs['window'])
+        sb_window.setSuffix(' evaluations')
         hbox_tol.addWidget(lbl)
         hbox_tol.addWidget(sb_tol, 1)
+        hbox_tol.addWidget(lbl_window)
+        hbox_tol.addWidget(sb_window, 1)
+        # Target config
+        target_config = QWidget()
+        hbox_target = QHBoxLayout(target_config)
+        hbox_target.setContentsMargins(0, 0, 0, 0)
+        lbl = QLabel('Objective target')
+        self.sb_target = sb_target = QDoubleSpinBox()
+        sb_target.setRange(-1e9, 1e9)
+        sb_target.setDecimals(4)
+        sb_target.setValue(self.configs['target'])
+        hbox_target.addWidget(lbl)
+        hbox_target.addWidget(sb_target, 1)
+        # Uncertainty config
+        std_config = QWidget()
+        hbox_std = QHBoxLayout(std_config)
+        hbox_std.setContentsMargins(0, 0, 0, 0)
+        lbl = QLabel('Max posterior std of objective')
+        self.sb_max_std = sb_max_std = QDoubleSpinBox()
+        sb_max_std.setRange(0.0, 1e9)
+        sb_max_std.setDecimals(4)
+        sb_max_std.setSingleStep(0.001)
+        sb_max_std.setValue(self.configs['max_std'])
+        hbox_std.addWidget(lbl)
+        hbox_std.addWidget(sb_max_std, 1)
 
         stacks.addWidget(max_eval_config)
         stacks.addWidget(max_time_config)
+        stacks.addWidget(stall_config)
         stacks.addWidget(tol_config)
+        stacks.addWidget(target_config)
+        stacks.addWidget(std_config)
 
         stacks.setCurrentIndex(self.configs['tc_idx'])
         vbox_config.addWidget(stacks)
@@ -138,6 +194,10 @@ class BadgerTerminationConditionDialog(QDialog):
         self.sb_max_eval.valueChanged.connect(self.max_eval_changed)
         self.sb_max_time.valueChanged.connect(self.max_time_changed)
         self.sb_tol.valueChanged.connect(self.ftol_changed)
+        self.sb_max_stall.valueChanged.connect(self.max_stall_changed)
+        self.sb_window.valueChanged.connect(self.window_changed)
+        self.sb_target.valueChanged.connect(self.target_changed)
+        self.sb_max_std.valueChanged.connect(self.max_std_changed)
 
     def max_eval_changed(self, max_eval):
         self.configs['max_eval'] = max_eval
@@ -148,6 +208,18 @@ class BadgerTerminationConditionDialog(QDialog):
     def ftol_changed(self, ftol):
         self.configs['ftol'] = ftol
 
+    def max_stall_changed(self, max_stall):
+        self.configs['max_stall'] = max_stall
+
+    def window_changed(self, window):
+        self.configs['window'] = window
+
+    def target_changed(self, target):
+        self.configs['target'] = target
+
+    def max_std_changed(self, max_std):
+        self.configs['max_std'] = max_std
+
     def run(self):
         self.save_config(self.configs)
         self.run_opt(True)
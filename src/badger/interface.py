@@ -1,8 +1,13 @@
+import asyncio
+import math
 import pickle
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Any, ClassVar, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, ClassVar, Dict, Iterable, List, Optional, Tuple
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, PrivateAttr
 
 from .utils import curr_ts
 
@@ -47,6 +52,13 @@ class Interface(BaseModel, ABC):
 
     # Private variables
     _logs: List[Dict] = []  # TODO: Add a property for it?
+    # Channel value cache, disabled until enable_cache is called
+    _cache_enabled: bool = False
+    _cache: Dict[str, Tuple[Any, float]] = {}  # value and time of the read
+    _cache_ttl: float = 0  # default time to live of the cached values (s)
+    _cache_ttls: Dict[str, float] = {}  # per channel time to live (s)
+    _subscribed: Dict[str, bool] = {}  # if the channel pushes its updates
+    _cache_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
 
     def start_recording(self):
         self._logs = []
@@ -72,6 +84,9 @@ class Interface(BaseModel, ABC):
             pickle.dump(self._logs, f)
 
     # Environment should only call this method to get channels
+    # All the channels needed in a step are passed in one call, so the
+    # interface should access them concurrently (or in bulk) if it can,
+    # ChannelInterface and AsyncInterface do it for you
     @abstractmethod
     def get_values(self, channel_names: List[str]) -> Dict[str, Any]:
         pass
@@ -81,8 +96,224 @@ class Interface(BaseModel, ABC):
     def set_values(self, channel_inputs: Dict[str, Any]):
         pass
 
+    # Async version of get_values/set_values, by default the sync methods
+    # run in a worker thread
+    async def async_get_values(self, channel_names: List[str]) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.get_values, channel_names)
+
+    async def async_set_values(self, channel_inputs: Dict[str, Any]):
+        return await asyncio.to_thread(self.set_values, channel_inputs)
+
+    # Override it if the interface could push the updates of some channels
+    # (monitors, subscriptions) and call update_cache on each update
+    # Should return the names of the channels that push their updates, the
+    # cached values of those never expire
+    def subscribe(self, channel_names: List[str]) -> List[str]:
+        return []
+
+    def enable_cache(self, ttl: float, ttls: Optional[Dict[str, float]] = None):
+        """
+        Serve the reads of get_values_cached from a local cache.
+
+        Parameters
+        ----------
+        ttl : float
+            Default time to live (in seconds) of the cached values.
+        ttls : dict, optional
+            Time to live of specific channels, overriding the default one,
+            0 to never cache a channel.
+        """
+        with self._cache_lock:
+            self._cache_enabled = True
+            self._cache_ttl = ttl
+            self._cache_ttls = dict(ttls or {})
+
+    def disable_cache(self):
+        with self._cache_lock:
+            self._cache_enabled = False
+            self._cache_ttl = 0
+            self._cache_ttls = {}
+            self._cache = {}
+
+    def invalidate_cache(self, channel_names: Optional[List[str]] = None):
+        # Drop the cached values of the channels, all of them if None
+        with self._cache_lock:
+            if channel_names is None:
+                self._cache = {}
+            else:
+                for name in channel_names:
+                    self._cache.pop(name, None)
+
+    def update_cache(self, channel_outputs: Dict[str, Any],
+                     timestamp: Optional[float] = None):
+        # Store values read from (or pushed by) the channels
+        if not self._cache_enabled:
+            return
+
+        if timestamp is None:
+            timestamp = time.monotonic()
+        with self._cache_lock:
+            for name, value in channel_outputs.items():
+                if self._get_ttl(name) > 0:
+                    self._cache[name] = (value, timestamp)
+
+    def _get_ttl(self, channel_name: str) -> float:
+        if self._subscribed.get(channel_name):
+            return math.inf
+
+        return self._cache_ttls.get(channel_name, self._cache_ttl)
+
+    def get_values_cached(self, channel_names: List[str],
+                          bypass: bool = False) -> Dict[str, Any]:
+        """
+        Same as get_values, but the values read within their time to live
+        are served from the cache. Use bypass=True to always read from the
+        channels (and refresh the cache), e.g. for readbacks after a set.
+        """
+        if not self._cache_enabled:
+            return self.get_values(channel_names)
+
+        # Subscribe to the channels that are read for the first time
+        channel_names_new = [name for name in channel_names
+                             if name not in self._subscribed]
+        if channel_names_new:
+            subscribed = set(self.subscribe(channel_names_new))
+            for name in channel_names_new:
+                self._subscribed[name] = name in subscribed
+
+        now = time.monotonic()
+        cached = {}
+        if not bypass:
+            with self._cache_lock:
+                for name in channel_names:
+                    try:
+                        value, timestamp = self._cache[name]
+                    except KeyError:
+                        continue
+                    if now - timestamp < self._get_ttl(name):
+                        cached[name] = value
+
+        channel_names_read = [name for name in channel_names
+                              if name not in cached]
+        channel_outputs = {}
+        if channel_names_read:
+            channel_outputs = self.get_values(channel_names_read)
+            self.update_cache(channel_outputs, now)
+
+        return {name: cached[name] if name in cached else channel_outputs[name]
+                for name in channel_names}
+
     def get_value(self, channel_name: str, **kwargs) -> Any:
         return self.get_values([channel_name], **kwargs)[channel_name]
 
     def set_value(self, channel_name: str, channel_value, **kwargs):
         return self.set_values({channel_name: channel_value}, **kwargs)
+
+
+class ChannelInterface(Interface):
+    """
+    Interface that accesses the channels one at a time: implement
+    `get_channel_value` and `set_channel_value` instead of `get_values` and
+    `set_values`. The channels of a get/set call are then accessed in a thread
+    pool, at most `max_concurrency` at a time, so reading many channels takes
+    about the latency of the slowest one rather than the sum.
+    """
+
+    max_concurrency: int = Field(16, ge=1, description="Maximum number of channels accessed concurrently")
+
+    _executor: Optional[ThreadPoolExecutor] = PrivateAttr(None)
+
+    @abstractmethod
+    def get_channel_value(self, channel_name: str) -> Any:
+        pass
+
+    @abstractmethod
+    def set_channel_value(self, channel_name: str, channel_value):
+        pass
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix=f'badger-intf-{self.name}')
+
+        return self._executor
+
+    @log
+    def get_values(self, channel_names: List[str]) -> Dict[str, Any]:
+        if len(channel_names) < 2:
+            return {name: self.get_channel_value(name)
+                    for name in channel_names}
+
+        values = self.executor.map(self.get_channel_value, channel_names)
+        return dict(zip(channel_names, values))
+
+    @log
+    def set_values(self, channel_inputs: Dict[str, Any]):
+        if len(channel_inputs) < 2:
+            for name, value in channel_inputs.items():
+                self.set_channel_value(name, value)
+            return
+
+        # Consume the results to raise the errors, if any
+        list(self.executor.map(self.set_channel_value,
+                               channel_inputs.keys(), channel_inputs.values()))
+
+
+class AsyncInterface(Interface):
+    """
+    Interface with native asyncio channel access: implement
+    `async_get_values` and `async_set_values` (`gather_limited` helps to
+    access the channels concurrently). The sync `get_values` and `set_values`
+    run them in an event loop owned by the interface, in a background thread,
+    so clients and connections can be kept across calls.
+    """
+
+    max_concurrency: int = Field(16, ge=1, description="Maximum number of channel accesses gathered concurrently")
+
+    _loop: Optional[asyncio.AbstractEventLoop] = PrivateAttr(None)
+    _loop_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @abstractmethod
+    async def async_get_values(self, channel_names: List[str]) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def async_set_values(self, channel_inputs: Dict[str, Any]):
+        pass
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, daemon=True,
+                                 name=f'badger-intf-{self.name}').start()
+
+        return self._loop
+
+    def run(self, coro: Awaitable):
+        # Run a coroutine in the loop of the interface and wait for it
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def gather_limited(self, coros: Iterable[Awaitable]) -> List:
+        """
+        Gather the coroutines with at most `max_concurrency` of them
+        running at a time.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def limited(coro):
+            async with semaphore:
+                return await coro
+
+        return await asyncio.gather(*[limited(coro) for coro in coros])
+
+    @log
+    def get_values(self, channel_names: List[str]) -> Dict[str, Any]:
+        return self.run(self.async_get_values(channel_names))
+
+    @log
+    def set_values(self, channel_inputs: Dict[str, Any]):
+        return self.run(self.async_set_values(channel_inputs))
@@ -1,16 +1,24 @@
 import json
-from copy import deepcopy
+import logging
 from typing import Optional, List, Any
 
 import pandas as pd
 from pandas import DataFrame
 from pydantic import ConfigDict, Field, model_validator, field_validator, \
-    ValidationInfo, SerializeAsAny
+    ValidationInfo, SerializeAsAny, PrivateAttr
 from xopt import Xopt, VOCS, Evaluator
 from xopt.generators import get_generator
+from xopt.generators.bayesian.bayesian_generator import BayesianGenerator
 from badger.utils import curr_ts
+from badger.acquisition import Acquisition
+from badger.timing import PhaseTimer, phase, timing_columns
+from badger.tracker import BestTracker
+from badger.training import TrainingWindow
+from badger.warm_start import WarmStart
 from badger.environment import Environment, instantiate_env
 
+logger = logging.getLogger(__name__)
+
 
 class Routine(Xopt):
 
@@ -21,6 +29,23 @@ class Routine(Xopt):
     critical_constraint_names: Optional[List[str]] = Field([])
     tags: Optional[List] = Field(None)
     script: Optional[str] = Field(None)
+    # Number of candidates to generate and evaluate per optimization step
+    batch_size: int = Field(1, ge=1)
+    # Generate the next candidates while the current ones are being evaluated
+    pipeline: bool = Field(False)
+    # Read the observables several times per evaluation and reduce them
+    acquisition: Optional[Acquisition] = Field(None)
+    # Bound the training set of the generator model, all points if None
+    training_window: Optional[TrainingWindow] = Field(None)
+    # Give the points of the compatible archived runs to the generator
+    warm_start: Optional[WarmStart] = Field(None)
+
+    # (data, sorted data) pair, sorted data is only recomputed if data changes
+    _sorted_data_cache: Optional[tuple] = PrivateAttr(None)
+    # Running optimum of the data, see the tracker property
+    _tracker: Optional[BestTracker] = PrivateAttr(None)
+    # Points of the archived runs given to the generator, see warm_start
+    _warm_start_data: Optional[DataFrame] = PrivateAttr(None)
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
@@ -75,19 +100,59 @@ class Routine(Xopt):
 
             # create evaluator
             env = data["environment"]
+            acquisition = data.get("acquisition")
+            if isinstance(acquisition, dict):
+                acquisition = data["acquisition"] = Acquisition(**acquisition)
 
-            def evaluate_point(point: dict):
+            def evaluate_points(points):
+                # points could be a dict of scalars (single point),
+                # a dict of lists or a dataframe (batch of points)
+                try:
+                    points = pd.DataFrame(points)
+                except ValueError:
+                    points = pd.DataFrame(points, index=[0])
                 # sanitize inputs
-                point = pd.Series(point).explode().to_dict()
-                env._set_variables(point)
-                obs = env._get_observables(data["vocs"].output_names)
+                points = [pd.Series(point).explode().to_dict()
+                          for point in points.to_dict("records")]
+                observable_names = data["vocs"].output_names
 
-                ts = curr_ts()
-                obs['timestamp'] = ts.timestamp()
+                # Let the env evaluate the whole batch in one go if possible
+                obs_list = None
+                if len(points) > 1:
+                    obs_list = env._evaluate_batch(points, observable_names)
 
-                return obs
+                if obs_list is None:
+                    obs_list = []
+                    for point in points:
+                        # time the evaluation phases of the point
+                        with PhaseTimer() as timer:
+                            with phase('set_variables'):
+                                env._set_variables(point)
+                            with phase('get_observables'):
+                                if acquisition is not None and \
+                                        acquisition.n_shots > 1:
+                                    obs = acquisition.acquire(
+                                        lambda: env._get_observables(
+                                            observable_names,
+                                            bypass_cache=True),
+                                        observable_names)
+                                else:
+                                    obs = env._get_observables(
+                                        observable_names)
 
-            data["evaluator"] = Evaluator(function=evaluate_point)
+                        ts = curr_ts()
+                        obs['timestamp'] = ts.timestamp()
+                        obs.update(timing_columns(timer.durations))
+                        obs_list.append(obs)
+                else:
+                    ts = curr_ts()
+                    for obs in obs_list:
+                        obs.setdefault('timestamp', ts.timestamp())
+
+                return pd.DataFrame(obs_list).to_dict("list")
+
+            data["evaluator"] = Evaluator(function=evaluate_points,
+                                          vectorized=True)
 
         return data
 
@@ -103,11 +168,96 @@ class Routine(Xopt):
 
     @property
     def sorted_data(self):
-        data_copy = deepcopy(self.data)
-        data_copy.index = data_copy.index.astype(int)
-        data_copy.sort_index(inplace=True)
+        """Data sorted by (integer) index.
+
+        The returned dataframe is shared between all readers and could be
+        the data itself, so it must not be modified in place.
+        """
+        data = self.data
+        if data is None:
+            return data
+
+        cache = self._sorted_data_cache
+        # Xopt replaces the dataframe when adding data, so identity suffices
+        # (length is checked in case rows were appended in place)
+        if cache is not None and cache[0] is data and \
+                len(cache[1]) == len(data):
+            return cache[1]
+
+        if data.index.dtype.kind == 'i' and data.index.is_monotonic_increasing:
+            sorted_data = data
+        else:
+            sorted_data = data.set_axis(data.index.astype(int))
+            sorted_data = sorted_data.sort_index()
+
+        self._sorted_data_cache = (data, sorted_data)
+
+        return sorted_data
+
+    def add_data(self, new_data: pd.DataFrame):
+        super().add_data(new_data)
+        self.apply_training_window()
+
+    @property
+    def training_data(self) -> Optional[DataFrame]:
+        """The warm start points (negative index) followed by the data"""
+        if self._warm_start_data is None or not len(self._warm_start_data):
+            return self.sorted_data
+
+        return pd.concat([self._warm_start_data, self.sorted_data])
+
+    def preload_warm_start(self) -> int:
+        """
+        Give the points of the compatible archived runs to the generator,
+        return the number of points loaded.
+        """
+        if self.warm_start is None:
+            return 0
+        # Only the models trained on the points benefit from them, the other
+        # generators would take the points as their own steps
+        if not isinstance(self.generator, BayesianGenerator):
+            logger.warning(
+                f'Generator {self.generator.name} can not be warm started, '
+                'the archived runs are ignored')
+            return 0
+
+        # Start over from the routine data: when a routine is run again
+        # (with its data reset) the generator still holds the points of the
+        # previous run, which is now one of the archived runs
+        self.generator.data = self.data
+
+        points = self.warm_start.load(self)
+        self._warm_start_data = points
+        if len(points):
+            self.generator.add_data(points)
+            self.apply_training_window()
+
+        return len(points)
+
+    def apply_training_window(self):
+        # Only the models refit on all the data at every step need it, the
+        # other generators might rely on the full history
+        if self.training_window is None or \
+                not isinstance(self.generator, BayesianGenerator):
+            return
+
+        self.generator.data = self.training_window.select(
+            self, self.training_data)
+
+    @property
+    def tracker(self) -> BestTracker:
+        """Running optimum (or Pareto front) of the data.
+
+        Synced with the points added since the last access, so following a
+        run costs O(1) per point for single-objective problems.
+        """
+        tracker = self._tracker
+        if tracker is None or tracker.vocs is not self.vocs:
+            tracker = self._tracker = BestTracker(
+                self.vocs, getattr(self.generator, 'reference_point', None))
+        tracker.sync(self.sorted_data)
 
-        return data_copy
+        return tracker
 
     def json(self, **kwargs) -> str:
         """Handle custom serialization of environment"""
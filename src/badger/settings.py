@@ -30,16 +30,16 @@ BADGER_PATH_DICT = {
 
 
 BADGER_CORE_DICT = {
-    # 'BADGER_CHECK_VAR_INTERVAL': {
-    #     'display name': 'check var interval',
-    #     'description': 'Waiting time between each round of check var when set var to env, unit is second',
-    #     'default value': 0.1,
-    # },
-    # 'BADGER_CHECK_VAR_TIMEOUT': {
-    #     'display name': 'check var timeout',
-    #     'description': 'Maximum waiting time before giving up check var if takes too long time, unit is second',
-    #     'default value': 3,
-    # },
+    "BADGER_CHECK_VAR_INTERVAL": {
+        "display name": "check var interval",
+        "description": "Initial waiting time between each round of check var when set var to env (doubled every round), unit is second",
+        "default value": 0.1,
+    },
+    "BADGER_CHECK_VAR_TIMEOUT": {
+        "display name": "check var timeout",
+        "description": "Maximum waiting time before giving up check var if takes too long time, unit is second",
+        "default value": 3,
+    },
     "BADGER_DATA_DUMP_PERIOD": {
         "display name": "data dump period",
         "description": "Minimum time interval between data dumps, unit is second",
@@ -64,6 +64,11 @@ BADGER_GUI_DICT = {
         "description": "Enable advanced features on the GUI",
         "default value": False,
     },
+    "BADGER_RUN_IN_PROCESS": {
+        "display name": "run in separate process",
+        "description": "Run the optimization in a separate worker process to keep the GUI responsive",
+        "default value": False,
+    },
 }
 
 
@@ -1,45 +1,75 @@
 import numpy as np
 
+# All the reducers take the data (array of readings) and optionally the axis
+# to reduce along (all the data if None) and whether to ignore the nan values
 
-def none(data):
+
+def none(data, axis=None, ignore_nan=False):
     return data
 
 
-def median(data):
-    return np.median(data)
+def median(data, axis=None, ignore_nan=False):
+    if ignore_nan:
+        return np.nanmedian(data, axis=axis)
+
+    return np.median(data, axis=axis)
+
+
+def std_deviation(data, axis=None, ignore_nan=False):
+    if ignore_nan:
+        return np.nanstd(data, axis=axis)
+
+    return np.std(data, axis=axis)
+
+
+def median_deviation(data, axis=None, ignore_nan=False):
+    median = np.nanmedian if ignore_nan else np.median
+    center = median(data, axis=axis, keepdims=True)
+
+    return median(np.abs(data - center), axis=axis)
 
 
-def std_deviation(data):
-    return np.std(data)
+def max(data, axis=None, ignore_nan=False):
+    if ignore_nan:
+        return np.nanmax(data, axis=axis)
 
+    return np.max(data, axis=axis)
 
-def median_deviation(data):
-    median = np.median(data)
 
-    return np.median(np.abs(data - median))
+def min(data, axis=None, ignore_nan=False):
+    if ignore_nan:
+        return np.nanmin(data, axis=axis)
 
+    return np.min(data, axis=axis)
 
-def max(data):
-    return np.max(data)
 
+def percent_80(data, axis=None, ignore_nan=False):
+    if ignore_nan:
+        return np.nanpercentile(data, 80, axis=axis)
 
-def min(data):
-    return np.min(data)
+    return np.percentile(data, 80, axis=axis)
 
 
-def percent_80(data):
-    return np.percentile(data, 80)
+def percent_20(data, axis=None, ignore_nan=False):
+    if ignore_nan:
+        return np.nanpercentile(data, 20, axis=axis)
 
+    return np.percentile(data, 20, axis=axis)
 
-def percent_20(data):
-    return np.percentile(data, 20)
 
+def avg_mean(data, axis=None, ignore_nan=False):
+    data = np.asarray(data, dtype=float)
+    if ignore_nan:
+        percentile = np.nanpercentile(data, 50, axis=axis, keepdims=True)
+    else:
+        percentile = np.percentile(data, 50, axis=axis, keepdims=True)
 
-def avg_mean(data):
-    percentile = np.percentile(data, 50)
+    # nan values are never above the percentile, so they are dropped anyway
+    return np.nanmean(np.where(data > percentile, data, np.nan), axis=axis)
 
-    return np.mean(data[data > percentile])
 
+def mean(data, axis=None, ignore_nan=False):
+    if ignore_nan:
+        return np.nanmean(data, axis=axis)
 
-def mean(data):
-    return np.mean(data)
+    return np.mean(data, axis=axis)
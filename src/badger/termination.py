@@ -0,0 +1,210 @@
+import logging
+import time
+from collections import deque
+
+import numpy as np
+
+from badger.errors import BadgerConfigError
+
+logger = logging.getLogger(__name__)
+
+# Termination conditions by index (tc_idx), as listed in the termination
+# condition dialog, with the name of their main parameter
+TC_MAX_EVAL = 0  # max_eval: number of evaluations
+TC_MAX_TIME = 1  # max_time: running time (s)
+TC_NO_IMPROVEMENT = 2  # max_stall: evaluations without improvement
+TC_IMPROVEMENT_RATE = 3  # ftol: improvement over the last `window` evaluations
+TC_TARGET = 4  # target: objective value to reach
+TC_UNCERTAINTY = 5  # max_std: posterior std of the objective
+
+TC_PARAMS = ['max_eval', 'max_time', 'max_stall', 'ftol', 'target', 'max_std']
+
+# Conditions on the best objective value, undefined on a Pareto front
+SINGLE_OBJECTIVE_CONDITIONS = [TC_IMPROVEMENT_RATE, TC_TARGET]
+
+DEFAULT_TERMINATION_CONDITION = {
+    'tc_idx': TC_MAX_EVAL,
+    'max_eval': 42,
+    'max_time': 600,
+    'max_stall': 20,
+    'ftol': 0,
+    'window': 20,
+    'target': 0,
+    'max_std': 0.01,
+}
+
+
+def validate_termination_condition(condition: dict, vocs):
+    """
+    Raise a BadgerConfigError if the condition can not be met on the
+    problem, the conditions on the best objective value need a single
+    objective.
+    """
+    if not condition or condition['tc_idx'] not in \
+            SINGLE_OBJECTIVE_CONDITIONS:
+        return
+
+    n_objectives = len(vocs.objective_names)
+    if n_objectives > 1:
+        raise BadgerConfigError(
+            f'Termination condition {TC_PARAMS[condition["tc_idx"]]} needs '
+            f'a single objective, the routine has {n_objectives}')
+
+
+def parse_termination_condition(spec: str, vocs=None) -> dict:
+    """
+    Parse a termination condition given as comma separated key=value
+    pairs, the first key being the main parameter of the condition, e.g.
+    `max_eval=50` or `ftol=0.001,window=20`. If the vocs is given, the
+    condition is validated on it.
+    """
+    condition = dict(DEFAULT_TERMINATION_CONDITION)
+    try:
+        pairs = [item.split('=') for item in spec.split(',')]
+        params = {key.strip(): float(value) for key, value in pairs}
+    except ValueError:
+        raise BadgerConfigError(f'Invalid termination condition: {spec}')
+
+    main = next(iter(params))
+    if main not in TC_PARAMS:
+        raise BadgerConfigError(
+            f'Unknown termination condition {main}, should be one of '
+            f'{", ".join(TC_PARAMS)}')
+    unknown = params.keys() - condition.keys()
+    if unknown:
+        raise BadgerConfigError(
+            f'Unknown termination condition parameters: {", ".join(unknown)}')
+
+    for key in ['max_eval', 'max_stall', 'window']:
+        if key in params:
+            params[key] = int(params[key])
+    condition.update(params)
+    condition['tc_idx'] = TC_PARAMS.index(main)
+    if vocs is not None:
+        validate_termination_condition(condition, vocs)
+
+    return condition
+
+
+class TerminationChecker:
+    """
+    Check a termination condition (a dict with the index of the condition
+    `tc_idx` and its parameters, see DEFAULT_TERMINATION_CONDITION) on the
+    data of a routine. The running statistics are only updated with the
+    points added since the last check.
+
+    The convergence conditions (no improvement, improvement rate, target)
+    follow the best feasible objective. The no improvement condition also
+    applies to multi-objective problems, where an improvement is a new
+    point on the Pareto front, the other two are rejected for them (see
+    validate_termination_condition). The uncertainty condition needs a
+    generator with a model.
+    """
+
+    def __init__(self, condition: dict, start_time: float = None):
+        self.condition = condition
+        self.start_time = time.time() if start_time is None else start_time
+        self.reset()
+
+    def reset(self):
+        self.n_seen = 0
+        self.best = None  # best objective (as minimization)
+        self.n_last_improvement = 0  # number of evaluations at that time
+        # best objective after each of the last window evaluations
+        window = (self.condition or {}).get('window', 1)
+        self.history = deque(maxlen=window + 1)
+        self._front_last = None
+
+    def update(self, routine):
+        data = routine.sorted_data
+        n = 0 if data is None else len(data)
+        if n < self.n_seen:  # the data has been reset
+            self.reset()
+        if n == self.n_seen:
+            return
+
+        tracker = routine.tracker
+        vocs = routine.vocs
+        new_data = data.iloc[self.n_seen:]
+        if tracker.is_multi_objective:
+            # the front changes iff one of the new points joined it
+            front = tracker.front_index
+            last = front[-1] if front else None
+            if last is not None and last != self._front_last and \
+                    last in new_data.index:
+                self.n_last_improvement = data.index.get_loc(last) + 1
+            self._front_last = last
+            self.n_seen = n
+            return
+
+        name = vocs.objective_names[0]
+        sign = 1.0 if vocs.objectives[name] == 'MINIMIZE' else -1.0
+        feasible = vocs.feasibility_data(new_data)['feasible']
+        values = new_data[name].to_numpy(dtype=float) * sign
+        values[~feasible.to_numpy(dtype=bool)] = np.nan
+
+        best = np.inf if self.best is None else self.best
+        for i, value in enumerate(values, start=self.n_seen + 1):
+            if value < best:  # False for nan
+                best = value
+                self.n_last_improvement = i
+            self.history.append(best)
+        self.best = None if np.isinf(best) else best
+        self.n_seen = n
+
+    def check(self, routine) -> bool:
+        """Whether the condition has been met"""
+        condition = self.condition
+        if not condition:
+            return False
+        validate_termination_condition(condition, routine.vocs)
+
+        idx = condition['tc_idx']
+        if idx == TC_MAX_TIME:
+            return time.time() - self.start_time >= condition['max_time']
+
+        self.update(routine)
+        if idx == TC_MAX_EVAL:
+            return self.n_seen >= condition['max_eval']
+        elif idx == TC_NO_IMPROVEMENT:
+            return self.n_seen - self.n_last_improvement >= \
+                condition['max_stall']
+        elif idx == TC_IMPROVEMENT_RATE:
+            window = condition['window']
+            if len(self.history) <= window or np.isinf(self.history[0]):
+                return False
+            return self.history[0] - self.history[-1] <= condition['ftol']
+        elif idx == TC_TARGET:
+            if self.best is None:
+                return False
+            name = routine.vocs.objective_names[0]
+            if routine.vocs.objectives[name] == 'MINIMIZE':
+                return self.best <= condition['target']
+            return -self.best >= condition['target']
+        elif idx == TC_UNCERTAINTY:
+            std = posterior_std(routine)
+            return std is not None and std <= condition['max_std']
+
+        return False
+
+
+def posterior_std(routine):
+    """
+    Posterior standard deviation of the (first) objective at the last
+    evaluated point, None if the generator has no model (yet).
+    """
+    model = getattr(routine.generator, 'model', None)
+    data = routine.sorted_data
+    if model is None or data is None or not len(data):
+        return None
+
+    import torch
+
+    vocs = routine.vocs
+    x = torch.tensor(
+        data[vocs.variable_names].iloc[-1:].to_numpy(dtype=float))
+    idx = vocs.output_names.index(vocs.objective_names[0])
+    with torch.no_grad():
+        variance = model.posterior(x).variance
+
+    return float(variance[0, idx].sqrt())
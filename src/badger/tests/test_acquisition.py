@@ -0,0 +1,139 @@
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+import pytest
+
+
+def test_reduce_shots():
+    from badger.acquisition import reduce_shots
+    from badger.errors import BadgerConfigError
+
+    shots = np.array([
+        [1.0, 1.0, np.nan, 5.0],
+        [2.0, np.nan, np.nan, 1.0],
+        [3.0, 3.0, np.nan, 3.0],
+        [10.0, 4.0, np.nan, 2.0],
+    ])
+    names = ["a", "b", "c", "d"]
+    rules = {
+        "a": {"reducer": "median"},
+        "b": {"reducer": "mean"},
+        "d": {"reducer": "none"},
+    }
+
+    values = reduce_shots(shots, names, rules)
+    assert values["a"] == 2.5
+    assert values["b"] == pytest.approx(8 / 3)  # nan ignored
+    assert np.isnan(values["c"])  # no valid reading at all
+    assert values["d"] == 2.0  # last reading
+
+    # Default rule of parse_rule
+    values = reduce_shots(shots, names)
+    assert values["a"] == np.percentile([1, 2, 3, 10], 80)
+
+    # No filtering
+    values = reduce_shots(shots, names, {"b": {"filter": "none",
+                                               "reducer": "mean"}})
+    assert np.isnan(values["b"])
+
+    with pytest.raises(BadgerConfigError):
+        reduce_shots(shots, names, {"a": {"reducer": "unknown"}})
+
+
+def test_take_shots():
+    from badger.acquisition import take_shots
+
+    def read():
+        time.sleep(0.05)
+        return {"f": 1.0}
+
+    t0 = time.monotonic()
+    shots = take_shots(read, ["f", "g"], 5, interval=0.01, concurrent=True)
+    dt = time.monotonic() - t0
+    assert shots.shape == (5, 2)
+    assert np.all(shots[:, 0] == 1.0)
+    assert np.all(np.isnan(shots[:, 1]))
+    assert dt < 0.25  # slow reads overlap
+
+
+def test_routine_acquisition():
+    from badger.environment import Environment
+    from badger.routine import Routine
+
+    class Environment(Environment):
+        name = "noisy"
+        variables = {"x1": [0, 1]}
+        observables = ["f"]
+
+        n_reads: int = 0
+
+        def set_variables(self, variable_inputs: Dict[str, float]):
+            pass
+
+        def get_observables(self, observable_names: List[str]) -> Dict:
+            self.n_reads += 1
+            # alternating readings
+            return {"f": 1.0 if self.n_reads % 2 else 3.0}
+
+    routine = Routine(
+        name="test_acquisition",
+        environment=Environment(),
+        vocs={"variables": {"x1": [0, 1]}, "objectives": {"f": "MINIMIZE"}},
+        generator="random",
+        acquisition={"n_shots": 4, "rules": {"f": {"reducer": "mean"}}},
+    )
+    routine.evaluate_data({"x1": 0.5})
+
+    assert routine.environment.n_reads == 4
+    assert routine.data["f"].iloc[0] == 2.0
+    assert routine.data["f_noise"].iloc[0] == 1.0
+
+    # The acquisition is saved with the routine
+    assert json.loads(routine.json())["acquisition"]["n_shots"] == 4
+
+
+def test_routine_acquisition_cached():
+    from badger.environment import Environment
+    from badger.interface import Interface
+    from badger.routine import Routine
+
+    class Interface(Interface):
+        name = "noisy"
+
+        _n_reads: int = 0
+
+        def get_values(self, channel_names):
+            self._n_reads += 1
+            return {name: 1.0 if self._n_reads % 2 else 3.0
+                    for name in channel_names}
+
+        def set_values(self, channel_inputs):
+            pass
+
+    class Environment(Environment):
+        name = "noisy"
+        variables = {"x1": [0, 1]}
+        observables = ["f"]
+
+    interface = Interface()
+    interface.enable_cache(ttl=60)
+    routine = Routine(
+        name="test_acquisition_cached",
+        environment=Environment(interface=interface),
+        vocs={"variables": {"x1": [0, 1]}, "objectives": {"f": "MINIMIZE"}},
+        generator="random",
+        acquisition={"n_shots": 4, "rules": {"f": {"reducer": "mean"}}},
+    )
+    routine.evaluate_data({"x1": 0.5})
+
+    # Each shot is read from the machine, not from the cache
+    interface = routine.environment.interface
+    assert interface._n_reads == 4
+    assert routine.data["f"].iloc[0] == 2.0
+    assert routine.data["f_noise"].iloc[0] == 1.0
+
+    # The single reads are still served from the cache
+    assert routine.environment._get_observables(["f"]) == {"f": 3.0}
+    assert interface._n_reads == 4
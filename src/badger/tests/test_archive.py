@@ -0,0 +1,134 @@
+import os
+
+import pandas as pd
+
+
+class TestArchive:
+    def test_archive_run_appends(self):
+        from badger.archive import archive_run, get_data_filename
+        from badger.tests.utils import create_routine, fix_db_path_issue
+        from badger.utils import count_records
+
+        fix_db_path_issue()
+
+        routine = create_routine()
+        routine.random_evaluate(3)
+        run = archive_run(routine)
+
+        header_file = os.path.join(run["path"], run["filename"])
+        data_file = os.path.join(run["path"],
+                                 get_data_filename(run["filename"]))
+        assert count_records(data_file) == 3
+        mtime = os.path.getmtime(header_file)
+
+        routine.random_evaluate(2)
+        archive_run(routine)
+
+        # Only the new points are appended, the header is not rewritten
+        assert count_records(data_file) == 5
+        assert os.path.getmtime(header_file) == mtime
+
+    def test_load_run(self):
+        from badger.archive import archive_run, load_run, delete_run
+        from badger.tests.utils import create_routine, fix_db_path_issue
+
+        fix_db_path_issue()
+
+        routine = create_routine()
+        routine.random_evaluate(4)
+        run = archive_run(routine)
+
+        loaded_routine = load_run(run["filename"])
+        assert loaded_routine.vocs == routine.vocs
+        assert len(loaded_routine.generator.data) == 4
+        pd.testing.assert_frame_equal(
+            loaded_routine.data[routine.vocs.all_names],
+            routine.sorted_data[routine.vocs.all_names],
+            check_dtype=False,
+        )
+
+        delete_run(run["filename"])
+        run_name = os.path.splitext(run["filename"])[0]
+        assert not [f for f in os.listdir(run["path"])
+                    if os.path.splitext(f)[0] == run_name]
+
+    def test_load_data_truncated(self, tmp_path):
+        from badger.utils import append_data, load_data
+
+        data_file = os.path.join(tmp_path, "test.jsonl")
+        append_data(data_file, pd.DataFrame({"x": [1.0, 2.0], "f": [3.0, 4.0]}))
+        # Simulate a crash while writing the last record
+        with open(data_file, "a") as f:
+            f.write('{"x": 5.0, "f"')
+
+        data = load_data(data_file)
+        assert data.to_dict("list") == {"x": [1.0, 2.0], "f": [3.0, 4.0]}
+
+    def test_run_catalog(self):
+        from badger.archive import archive_run, list_run, rebuild_run_index
+        from badger.db import get_run_records, remove_run_by_filename
+        from badger.tests.utils import create_routine, fix_db_path_issue
+
+        fix_db_path_issue()
+
+        routine = create_routine()
+        routine.random_evaluate(3)
+        run = archive_run(routine)
+
+        record = [r for r in get_run_records("test")
+                  if r["filename"] == run["filename"]][0]
+        assert record["path"] == run["path"]
+        assert record["environment"] == "test"
+        assert record["n_points"] == 3
+        assert record["best"] == routine.data["f"].max()
+
+        runs = list_run()
+        year = run["filename"].split("-")[1]
+        assert any(run["filename"] in files
+                   for month in runs[year].values()
+                   for files in month.values())
+
+        # Rebuild the catalog from the archive
+        remove_run_by_filename(run["filename"])
+        n_added, _ = rebuild_run_index()
+        assert n_added >= 1
+        record_rebuilt = [r for r in get_run_records("test")
+                          if r["filename"] == run["filename"]][0]
+        for key in ["path", "environment", "n_points", "best"]:
+            assert record_rebuilt[key] == record[key]
+
+        # Runs removed from the archive are removed from the catalog
+        for f in os.listdir(run["path"]):
+            os.remove(os.path.join(run["path"], f))
+        _, n_removed = rebuild_run_index()
+        assert n_removed >= 1
+        assert run["filename"] not in [r["filename"]
+                                       for r in get_run_records()]
+
+    def test_lazy_routine(self):
+        from badger.archive import archive_run, LazyRoutine, delete_run
+        from badger.db import save_routine, remove_routine
+        from badger.tests.utils import create_routine, fix_db_path_issue
+
+        fix_db_path_issue()
+
+        routine = create_routine()
+        save_routine(routine)
+        routine.random_evaluate(3)
+        run = archive_run(routine)
+
+        lazy_routine = LazyRoutine(run["filename"])
+        assert lazy_routine.name == "test"
+        assert lazy_routine.vocs == routine.vocs
+        assert len(lazy_routine.sorted_data) == 3
+        assert lazy_routine._routine is None  # nothing instantiated yet
+
+        # Anything else needs the full routine
+        assert lazy_routine.generator.name == routine.generator.name
+        assert lazy_routine._routine is not None
+        assert len(lazy_routine.data) == 3
+        lazy_routine.data = None
+        assert lazy_routine._routine.data is None
+
+        delete_run(run["filename"])
+        remove_routine("test")
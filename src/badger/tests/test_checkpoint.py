@@ -0,0 +1,148 @@
+import os
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+
+def test_checkpoint(tmp_path):
+    from badger import checkpoint
+    from badger.checkpoint import Checkpoint, load_checkpoint
+    from badger.tests.utils import create_routine
+    from badger.utils import count_records
+
+    routine = create_routine()
+    dump_file = os.path.join(tmp_path, "state.yaml")
+    ckpt = Checkpoint(dump_file)
+
+    with patch.object(checkpoint, "write_atomic",
+                      wraps=checkpoint.write_atomic) as write_atomic:
+        for _ in range(3):
+            result = routine.random_evaluate(2)
+            ckpt.update(routine.generator, result)
+
+        # The state of the random generator never changes
+        assert write_atomic.call_count == 1
+    # Only the new points are appended
+    assert count_records(ckpt.data_file) == 6
+    assert [f for f in os.listdir(tmp_path) if f.endswith(".tmp")] == []
+
+    generator, data = load_checkpoint(dump_file)
+    assert generator.name == routine.generator.name
+    assert generator.vocs == routine.vocs
+    assert len(generator.data) == 6
+    pd.testing.assert_frame_equal(
+        data[routine.vocs.all_names],
+        routine.sorted_data[routine.vocs.all_names],
+        check_dtype=False,
+    )
+
+    # A new checkpoint under the same name starts over
+    Checkpoint(dump_file)
+    assert count_records(ckpt.data_file) == 0
+
+
+def test_checkpoint_bayesian(tmp_path):
+    from badger import checkpoint
+    from badger.checkpoint import Checkpoint
+    from badger.tests.utils import create_routine
+    from badger.utils import load_config
+    from xopt.generators.bayesian import UpperConfidenceBoundGenerator
+
+    routine = create_routine()
+    routine.generator = UpperConfidenceBoundGenerator(
+        vocs=routine.vocs, gp_constructor={"name": "standard", "use_low_noise_prior": True})
+    routine.random_evaluate(3)
+    dump_file = os.path.join(tmp_path, "state.yaml")
+    ckpt = Checkpoint(dump_file)
+
+    with patch.object(checkpoint, "write_atomic",
+                      wraps=checkpoint.write_atomic) as write_atomic:
+        for _ in range(3):
+            routine.step()
+            ckpt.update(routine.generator, routine.data.iloc[-1:])
+
+        # The computation time and the model change at every step, the
+        # state itself doesn't
+        assert write_atomic.call_count == 1
+
+    state = load_config(dump_file)["generator"]["upper_confidence_bound"]
+    assert "computation_time" not in state
+    assert "model" not in state
+
+
+def test_load_dumped_state(tmp_path):
+    import yaml
+    from badger.checkpoint import load_checkpoint
+    from badger.tests.utils import create_routine
+    from badger.utils import state_to_dict
+
+    routine = create_routine()
+    routine.random_evaluate(3)
+    # A state dumped by former versions, with the data in the yaml file
+    dump_file = os.path.join(tmp_path, "state.yaml")
+    with open(dump_file, "w") as f:
+        yaml.dump(state_to_dict(routine.generator, routine.data), f)
+
+    generator, data = load_checkpoint(dump_file)
+    assert len(generator.data) == 3
+    # DataFrame.to_json rounds the values
+    assert data["f"].tolist() == pytest.approx(
+        routine.sorted_data["f"].tolist())
+
+
+def test_dump_state(tmp_path):
+    from badger.checkpoint import load_checkpoint
+    from badger.tests.utils import create_routine
+    from badger.utils import dump_state
+
+    routine = create_routine()
+    routine.random_evaluate(3)
+    dump_file = os.path.join(tmp_path, "state.yaml")
+    dump_state(dump_file, routine.generator, routine.data)
+
+    generator, data = load_checkpoint(dump_file)
+    assert len(generator.data) == 3
+    assert data["f"].tolist() == routine.sorted_data["f"].tolist()
+
+
+def test_resume_from_checkpoint(tmp_path):
+    from badger.core import run_routine
+    from badger.errors import BadgerRoutineError, BadgerRunTerminatedError
+    from badger.tests.utils import create_routine
+    from badger.utils import count_records
+
+    dump_file = os.path.join(tmp_path, "state.yaml")
+
+    def run(routine, n, resume_file=None):
+        routine.data = None  # same as the routine runners
+        with pytest.raises(BadgerRunTerminatedError):
+            run_routine(
+                routine,
+                lambda: 0 if routine.data is None or len(routine.data) < n
+                else 2,
+                lambda candidates: None, lambda points: None,
+                lambda states: None,
+                dump_file_callback=lambda: dump_file,
+                resume_file=resume_file)
+
+    routine = create_routine()
+    run(routine, 4)
+    assert count_records(dump_file[:-4] + "jsonl") == 4
+
+    # The run picks up where it was, the initial points are not evaluated
+    # again and the checkpoint carries on
+    new_routine = create_routine()
+    run(new_routine, 7, resume_file=dump_file)
+    assert len(new_routine.data) == 7
+    assert len(new_routine.generator.data) == 7
+    assert new_routine.generator.vocs is new_routine.vocs
+    assert new_routine.sorted_data["f"].iloc[:4].tolist() == \
+        routine.sorted_data["f"].tolist()
+    assert count_records(dump_file[:-4] + "jsonl") == 7
+
+    # Not a run of the routine
+    other_routine = create_routine()
+    other_routine.vocs.objectives = {"f": "MINIMIZE"}
+    with pytest.raises(BadgerRoutineError):
+        run(other_routine, 8, resume_file=dump_file)
@@ -99,7 +99,9 @@ class TestCore:
 
         path = "./test.yaml"
         assert os.path.exists(path) is True
+        assert os.path.exists("./test.jsonl") is True
         os.remove("./test.yaml")
+        os.remove("./test.jsonl")
 
     def test_evaluate_points(self) -> None:
         """
@@ -145,3 +147,101 @@ class TestCore:
 
         assert len(self.candidates_list) == self.count - 1
         assert len(self.points_eval_list) == self.count
+
+    def test_run_routine_batch(self) -> None:
+        """
+        A unit test to ensure the batch mode of run_routine generates,
+        evaluates and adds the candidates batch by batch.
+        """
+        from badger.core import run_routine
+        from badger.tests.utils import create_routine
+
+        routine = create_routine()
+        routine.batch_size = 3
+
+        self.count = 0
+
+        with pytest.raises(BadgerRunTerminatedError):
+            run_routine(
+                routine,
+                self.mock_active_callback,
+                self.mock_generate_callback,
+                self.mock_evaluate_callback,
+                self.mock_states_callback,
+            )
+
+        # 1 initial point + 4 batches of 3 points
+        assert len(routine.data) == 1 + 3 * (self.count - 1)
+        assert all(len(c) == 3 for c in self.candidates_list)
+        assert all(len(r) == 3 for r in self.points_eval_list[1:])
+
+    def test_run_routine_batch_not_supported(self) -> None:
+        """
+        A unit test to ensure batch mode is rejected for generators that
+        cannot generate candidates in batch.
+        """
+        from badger.core import run_routine
+        from badger.errors import BadgerRoutineError
+        from badger.tests.utils import create_routine
+        from xopt.generators.scipy.neldermead import NelderMeadGenerator
+
+        routine = create_routine()
+        routine.generator = NelderMeadGenerator(vocs=routine.vocs)
+        routine.batch_size = 2
+
+        with pytest.raises(BadgerRoutineError):
+            run_routine(
+                routine,
+                self.mock_active_callback,
+                self.mock_generate_callback,
+                self.mock_evaluate_callback,
+                self.mock_states_callback,
+            )
+
+    def test_run_routine_pipeline(self) -> None:
+        """
+        A unit test to ensure the pipelined mode of run_routine evaluates
+        every generated candidate, including the ones in flight when the
+        run is terminated.
+        """
+        from badger.core import run_routine
+        from badger.tests.utils import create_routine
+
+        routine = create_routine()
+        routine.pipeline = True
+
+        self.count = 0
+
+        with pytest.raises(BadgerRunTerminatedError):
+            run_routine(
+                routine,
+                self.mock_active_callback,
+                self.mock_generate_callback,
+                self.mock_evaluate_callback,
+                self.mock_states_callback,
+            )
+
+        # The candidates generated while the last point was in flight are
+        # dropped on termination, the in-flight point itself is recorded
+        assert len(self.points_eval_list) == self.count
+        assert len(routine.data) == self.count
+        assert len(self.candidates_list) == self.count
+
+    def test_generate_candidates_with_pending(self) -> None:
+        """
+        A unit test to ensure the pending points are only visible to the
+        generator while generating new candidates.
+        """
+        from badger.core import generate_candidates
+        from badger.tests.utils import create_routine_turbo
+
+        routine = create_routine_turbo()
+        routine.random_evaluate(3, seed=1)
+        n_data = len(routine.generator.data)
+
+        pending = generate_candidates(routine, 1)
+        candidates = generate_candidates(routine, 1, pending)
+
+        assert len(candidates) == 1
+        assert len(routine.generator.data) == n_data
+        assert not candidates.equals(pending)
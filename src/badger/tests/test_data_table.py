@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+
+def test_run_data_table(qtbot):
+    from PyQt5.QtCore import Qt
+    from badger.gui.default.components.data_table import (
+        data_table, update_table, reset_table, add_rows)
+
+    table = data_table()
+    qtbot.addWidget(table)
+    model = table.model()
+    assert model.rowCount() == 0
+
+    data = pd.DataFrame({
+        "x0": [0.5, 1.0],
+        "f": [1e-8, 2.0],
+        "timestamp": [1.0, 2.0],
+        "xopt_error": [False, False],
+        "xopt_runtime": [0.1, 0.1],
+        "badger_time_evaluate": [0.1, 0.1],
+        "f_noise": [0.0, 0.1],
+    })
+    update_table(table, data)
+    assert model.columnCount() == 2
+    assert model.headerData(0, Qt.Horizontal) == "x0"
+    assert model.headerData(1, Qt.Vertical) == "1"
+    assert model.data(model.index(1, 1)) == "2"
+    assert model.data(model.index(0, 1)) == "1e-08"
+
+    # Live runs append rows in blocks
+    inserted = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append(
+        (first, last)))
+    reset_table(table, ["f", "x0"])
+    assert model.rowCount() == 0
+    add_rows(table, np.arange(6).reshape(3, 2))
+    add_rows(table, [[6, 7]])
+    assert inserted == [(0, 2), (3, 3)]
+    assert model.rowCount() == 4
+    assert model.data(model.index(3, 0)) == "6"
+
+    update_table(table)
+    assert model.rowCount() == 0
@@ -27,3 +27,218 @@ class TestDB:
         assert new_routine.vocs == routine.vocs
 
         remove_routine("test")
+
+    def test_pooled_connection(self):
+        import threading
+        from badger.db import ROUTINES_DB, get_connection, transaction, \
+            list_routine, save_routine, remove_routine
+        from badger.tests.utils import create_routine, fix_db_path_issue
+
+        fix_db_path_issue()
+
+        # Connections are reused within a thread
+        con = get_connection(ROUTINES_DB)
+        assert get_connection(ROUTINES_DB) is con
+
+        # But not shared across threads
+        cons = []
+        thread = threading.Thread(
+            target=lambda: cons.append(get_connection(ROUTINES_DB)))
+        thread.start()
+        thread.join()
+        assert cons[0] is not con
+
+        # Nested transactions are rolled back as a whole
+        routine = create_routine()
+        try:
+            with transaction(ROUTINES_DB):
+                save_routine(routine)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        assert "test" not in list_routine()[0]
+
+        save_routine(routine)
+        assert "test" in list_routine()[0]
+        remove_routine("test")
+        assert "test" not in list_routine()[0]
+
+    def test_quoted_names(self):
+        from badger.db import save_routine, list_routine, remove_routine
+        from badger.tests.utils import create_routine, fix_db_path_issue
+
+        fix_db_path_issue()
+
+        routine = create_routine()
+        routine.name = 'test "quoted"'
+        save_routine(routine)
+        assert routine.name in list_routine('"quoted"')[0]
+
+        remove_routine(routine.name, remove_runs=True)
+        assert routine.name not in list_routine()[0]
+
+    def test_list_routine_metadata(self):
+        from badger.db import save_routine, list_routine, remove_routine
+        from badger.tests.utils import create_routine, fix_db_path_issue
+
+        fix_db_path_issue()
+
+        routine = create_routine()
+        routine.description = "a test routine"
+        routine.tags = ["tuning", "test"]
+        save_routine(routine)
+
+        names, _, descriptions = list_routine("tes")
+        assert names == ["test"]
+        assert descriptions == ["a test routine"]
+
+        assert list_routine(tags={"tuning": None})[0] == ["test"]
+        assert list_routine(tags={"region": "inj"})[0] == []
+
+        remove_routine("test")
+
+    def test_migrate_routines_db(self):
+        import sqlite3
+        from badger.db import BADGER_DB_ROOT, ROUTINES_DB, SCHEMAS, \
+            FTS_SCHEMAS, close_all_connections, list_routine, remove_routine
+        from badger.tests.utils import create_routine, fix_db_path_issue
+
+        fix_db_path_issue()
+
+        # Create a db with the schema before metadata columns were added
+        close_all_connections()
+        db_path = os.path.join(BADGER_DB_ROOT, ROUTINES_DB)
+        os.remove(db_path)
+        con = sqlite3.connect(db_path)
+        con.execute(SCHEMAS[ROUTINES_DB][0])
+        routine = create_routine()
+        routine.description = "legacy"
+        con.execute("insert into routine values (?, ?, ?)",
+                    ("test", routine.yaml(), "2023-01-01 00:00:00"))
+        # A search index not keyed by the routine rowid
+        con.execute(FTS_SCHEMAS[ROUTINES_DB])
+        con.execute("insert into routine_fts (rowid, name, description) "
+                    "values (7, 'test', 'legacy')")
+        con.commit()
+        con.close()
+
+        names, _, descriptions = list_routine()
+        assert names == ["test"]
+        assert descriptions == ["legacy"]
+        assert list_routine("legacy")[0] == ["test"]
+
+        remove_routine("test")
+
+    def test_search(self):
+        from badger.archive import archive_run, delete_run
+        from badger.db import ROUTINES_DB, get_connection, save_routine, \
+            list_routine, remove_routine, search_runs
+        from badger.tests.utils import create_routine, fix_db_path_issue
+
+        fix_db_path_issue()
+
+        routine = create_routine()
+        routine.description = "Tune the injector"
+        save_routine(routine)
+
+        # Search by description, variable and objective names
+        assert list_routine("inject")[0] == ["test"]
+        assert list_routine("x3")[0] == ["test"]
+        assert list_routine("f injector")[0] == ["test"]
+        assert list_routine("undulator")[0] == []
+
+        # The index rows follow the routine records
+        save_routine(routine)
+        cur = get_connection(ROUTINES_DB).cursor()
+        cur.execute("select f.rowid from routine_fts f join routine r "
+                    "on r.rowid = f.rowid where r.name = 'test'")
+        assert len(cur.fetchall()) == 1
+
+        routine.random_evaluate(2)
+        run = archive_run(routine)
+        assert search_runs("test") == [run["filename"]]
+        assert search_runs(run["filename"][10:20]) == [run["filename"]]
+        assert search_runs("test", routine="test") == [run["filename"]]
+        assert search_runs("test", routine="other") == []
+
+        delete_run(run["filename"])
+        assert search_runs("test") == []
+
+        remove_routine("test")
+        assert list_routine("inject")[0] == []
+
+    def test_remove_routine_runs(self):
+        from datetime import datetime
+        from badger.db import RUNS_DB, get_connection, save_routine, \
+            save_run_record, remove_routine, find_compatible_runs
+        from badger.tests.utils import create_routine, fix_db_path_issue
+
+        fix_db_path_issue()
+
+        routine = create_routine()
+        routine.name = "removed"
+        save_routine(routine)
+        variables = {"x0": [-1, 1]}
+        save_run_record({
+            "filename": "BadgerOpt-2023-01-01-000000.yaml",
+            "savedAt": datetime(2023, 1, 1),
+            "finishedAt": datetime(2023, 1, 1),
+            "routine": "removed",
+            "path": None,
+            "environment": "removed_env",
+            "n_points": 1,
+            "best": None,
+            "vocs": {"variables": variables, "outputs": ["f"]},
+        })
+        assert len(find_compatible_runs("removed_env", variables)) == 1
+
+        # The vocs of the runs are removed with them
+        remove_routine("removed", remove_runs=True)
+        assert find_compatible_runs("removed_env", variables) == []
+        cur = get_connection(RUNS_DB).cursor()
+        cur.execute("select count(*) from run_vocs where run not in "
+                    "(select id from run)")
+        assert cur.fetchone()[0] == 0
+
+    def test_run_pages(self):
+        from datetime import datetime
+        from badger.db import save_run_record, get_run_groups, \
+            get_runs_page, get_adjacent_run, remove_run_by_filename
+        from badger.tests.utils import fix_db_path_issue
+
+        fix_db_path_issue()
+
+        runs = [
+            "BadgerOpt-2022-12-31-235959.yaml",
+            "BadgerOpt-2023-01-02-080000.yaml",
+            "BadgerOpt-2023-01-02-090000.yaml",
+            "BadgerOpt-2023-03-01-120000.yaml",
+        ]
+        for i, run in enumerate(runs):
+            save_run_record({
+                "filename": run,
+                "savedAt": datetime(2023, 1, 1, i),
+                "finishedAt": datetime(2023, 1, 1, i),
+                "routine": "paged" if i else "other",
+                "path": None,
+                "environment": "test",
+                "n_points": 1,
+                "best": None,
+            })
+
+        assert get_run_groups("year") == ["2023", "2022"]
+        assert get_run_groups("month", "2023") == ["2023-03", "2023-01"]
+        assert get_run_groups("day", "2023-01") == ["2023-01-02"]
+        assert get_run_groups("year", routine="paged") == ["2023"]
+
+        assert get_runs_page("2023-01-02") == runs[2:0:-1]
+        assert get_runs_page(limit=2) == runs[:1:-1]
+        assert get_runs_page(offset=3) == runs[:1]
+
+        assert get_adjacent_run(runs[1]) == runs[0]
+        assert get_adjacent_run(runs[1], routine="paged") is None
+        assert get_adjacent_run(runs[1], older=False) == runs[2]
+        assert get_adjacent_run(runs[3], older=False) is None
+
+        for run in runs:
+            remove_run_by_filename(run)
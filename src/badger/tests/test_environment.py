@@ -87,3 +87,94 @@ class TestEnv:
         routine.environment.flag = 1
         result = json.loads(routine.json())
         assert result["environment"]["flag"] == 1
+
+    def test_env_evaluate_batch(self):
+        from badger.environment import Environment
+
+        class Environment(Environment):
+            name = 'test'
+            variables = {'x1': [0, 1], 'x2': [0, 10]}
+            observables = ['y1', 'c1']
+
+            n_batches: int = 0
+
+            def set_variables(self, variable_inputs: Dict[str, float]):
+                raise NotImplementedError
+
+            def evaluate_batch(self, variable_inputs, observable_names):
+                self.n_batches += 1
+                return [{'y1': p['x1'] + p['x2'], 'c1': 0.0}
+                        for p in variable_inputs]
+
+        from badger.routine import Routine
+
+        vocs = TEST_VOCS_BASE.model_copy(update={"constants": {}})
+        routine = Routine(
+            name="test_routine",
+            environment=Environment(),
+            vocs=vocs,
+            generator="random",
+            batch_size=3,
+        )
+        candidates = routine.generator.generate(routine.batch_size)
+        result = routine.evaluate_data(candidates)
+
+        assert routine.environment.n_batches == 1
+        assert len(routine.data) == 3
+        assert result["y1"].to_list() == \
+            (result["x1"] + result["x2"]).to_list()
+
+    def test_env_wait_for_variables(self):
+        import time
+        from badger.environment import Environment
+
+        class Environment(Environment):
+            name = 'test'
+            variables = {'x1': [0, 1], 'x2': [0, 1], 'x3': [0, 1]}
+            observables = ['f']
+            # x3 is not checked
+            readback_tolerances = {'x1': 0.01, 'x2': 0.01}
+            readback_timeouts = {'x2': 0.3}
+
+            # Time for the readbacks to reach the setpoints
+            settle_time: Dict[str, float] = {'x1': 0.2, 'x2': 1000}
+            n_reads: int = 0
+
+            _setpoints: dict = {}
+            _t_set: float = 0
+
+            def set_variables(self, variable_inputs: Dict[str, float]):
+                self._setpoints = variable_inputs
+                self._t_set = time.monotonic()
+
+            def get_variables(self, variable_names: List[str]) -> Dict:
+                self.n_reads += 1
+                dt = time.monotonic() - self._t_set
+                return {name: self._setpoints[name]
+                        if dt >= self.settle_time[name] else -1
+                        for name in variable_names}
+
+            def get_observables(self, observable_names: List[str]) -> Dict:
+                return {ele: 1.0 for ele in observable_names}
+
+        env = Environment()
+
+        # Return as soon as the readback is within tolerance
+        t0 = time.monotonic()
+        env._set_variables({'x1': 0.5, 'x3': 0.5})
+        dt = time.monotonic() - t0
+        assert 0.2 <= dt < 1
+        assert env.n_reads < 5  # backoff between the reads
+
+        # Readbacks already settled
+        env.settle_time = {'x1': 0, 'x2': 0}
+        env.n_reads = 0
+        env._set_variables({'x1': 0.5, 'x2': 0.5})
+        assert env.n_reads == 1
+
+        # Give up on a variable after its timeout
+        env.settle_time = {'x1': 0, 'x2': 1000}
+        t0 = time.monotonic()
+        env._set_variables({'x1': 0.5, 'x2': 0.5})
+        dt = time.monotonic() - t0
+        assert 0.3 <= dt < 1
@@ -0,0 +1,75 @@
+from datetime import datetime
+
+
+def test_history_navigator(qtbot):
+    from badger.db import save_run_record, remove_run_by_filename
+    from badger.gui.default.components.history_navigator import \
+        HistoryNavigator
+    from badger.tests.utils import fix_db_path_issue
+
+    fix_db_path_issue()
+
+    runs = [
+        "BadgerOpt-2023-03-01-120000.yaml",
+        "BadgerOpt-2023-01-02-090000.yaml",
+        "BadgerOpt-2023-01-02-080000.yaml",
+        "BadgerOpt-2022-12-31-235959.yaml",
+    ]
+    for run in runs:
+        save_run_record({
+            "filename": run,
+            "savedAt": datetime.now(),
+            "finishedAt": datetime.now(),
+            "routine": "nav",
+            "path": None,
+            "environment": "test",
+            "n_points": 1,
+            "best": None,
+        })
+
+    nav = HistoryNavigator()
+    qtbot.addWidget(nav)
+    nav.updateItems("nav")
+
+    # Only the latest day is populated
+    assert nav.currentText() == runs[0]
+    assert nav.currentIsFirst()
+    assert not nav.currentIsLast()
+    assert nav.view().topLevelItemCount() == 2
+    year_2022 = nav.view().topLevelItem(1)
+    assert year_2022.childCount() == 0
+
+    # Navigating fetches the runs on demand
+    for run in runs[1:]:
+        nav.selectNextItem()
+        assert nav.currentText() == run
+    assert nav.currentIsLast()
+    assert year_2022.childCount() == 1
+
+    for run in runs[-2::-1]:
+        nav.selectPreviousItem()
+        assert nav.currentText() == run
+    assert nav.currentIsFirst()
+
+    # Only the runs matching the keyword, as a flat list
+    nav.setKeyword("2023-01-02")
+    assert nav.view().topLevelItemCount() == 2
+    assert nav.currentText() == runs[1]
+    assert nav.currentIsFirst()
+    nav.selectNextItem()
+    assert nav.currentText() == runs[2]
+    assert nav.currentIsLast()
+    nav.selectPreviousItem()
+    assert nav.currentText() == runs[1]
+
+    nav.setKeyword("2021")
+    assert not nav.count()
+    nav.setKeyword("")
+    assert nav.currentText() == runs[0]
+
+    # No runs at all
+    nav.updateItems("no such routine")
+    assert not nav.count()
+
+    for run in runs:
+        remove_run_by_filename(run)
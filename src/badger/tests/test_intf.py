@@ -1,3 +1,6 @@
+import pytest
+
+
 def test_find_intf():
     from badger.factory import get_intf, list_intf
 
@@ -79,6 +82,181 @@ def test_recording():
     assert record["channel_outputs"] == {"x1": 3, "x2": 4, "x3": 5}
 
 
+def test_channel_interface():
+    import time
+    from badger.interface import ChannelInterface
+
+    class Interface(ChannelInterface):
+        name = "channel"
+
+        def get_channel_value(self, channel_name):
+            time.sleep(0.05)  # latency of one channel
+            return int(channel_name[1:])
+
+        def set_channel_value(self, channel_name, channel_value):
+            if channel_value < 0:
+                raise ValueError(f"Invalid value for {channel_name}")
+
+    intf = Interface(max_concurrency=20)
+    channel_names = [f"x{i}" for i in range(20)]
+
+    t0 = time.perf_counter()
+    channel_outputs = intf.get_values(channel_names)
+    dt = time.perf_counter() - t0
+    assert channel_outputs == {name: i for i, name in enumerate(channel_names)}
+    assert dt < 0.5  # 1s if read one by one
+
+    assert intf.get_value("x3") == 3
+    intf.set_values({"x1": 1, "x2": 2})
+    with pytest.raises(ValueError):
+        intf.set_values({"x1": 1, "x2": -1})
+
+    assert intf._logs[0]["channel_outputs"] == channel_outputs
+
+
+def test_async_interface():
+    import asyncio
+    import time
+    from badger.interface import AsyncInterface
+
+    class Interface(AsyncInterface):
+        name = "async"
+
+        _states: dict = {}
+
+        async def read(self, channel_name):
+            await asyncio.sleep(0.05)
+            return self._states.get(channel_name, 0)
+
+        async def async_get_values(self, channel_names):
+            values = await self.gather_limited(
+                self.read(name) for name in channel_names)
+            return dict(zip(channel_names, values))
+
+        async def async_set_values(self, channel_inputs):
+            self._states.update(channel_inputs)
+
+    intf = Interface(max_concurrency=50)
+    intf.set_values({"x1": 3, "x2": 4})
+
+    channel_names = [f"x{i}" for i in range(50)]
+    t0 = time.perf_counter()
+    channel_outputs = intf.get_values(channel_names)
+    dt = time.perf_counter() - t0
+    assert channel_outputs["x1"] == 3
+    assert channel_outputs["x2"] == 4
+    assert channel_outputs["x0"] == 0
+    assert dt < 1  # 2.5s if read one by one
+
+    # Sync interfaces get the async API through a worker thread
+    from badger.factory import get_intf
+
+    SyncInterface, _ = get_intf("test")
+    sync_intf = SyncInterface()
+    asyncio.run(sync_intf.async_set_values({"x1": 5}))
+    assert asyncio.run(sync_intf.async_get_values(["x1"])) == {"x1": 5}
+
+
+def test_cache():
+    import time
+    from badger.interface import Interface as BaseInterface
+
+    class Interface(BaseInterface):
+        name = "cached"
+
+        _states: dict = {}
+        _n_reads: int = 0
+
+        def get_values(self, channel_names):
+            self._n_reads += len(channel_names)
+            return {name: self._states.get(name, 0) for name in channel_names}
+
+        def set_values(self, channel_inputs):
+            self._states.update(channel_inputs)
+
+        def subscribe(self, channel_names):
+            return [name for name in channel_names if name.startswith("m")]
+
+    intf = Interface()
+
+    # No caching by default
+    intf.get_values_cached(["x1", "x2"])
+    intf.get_values_cached(["x1", "x2"])
+    assert intf._n_reads == 4
+
+    intf.enable_cache(ttl=60, ttls={"x2": 0, "x3": 0.05})
+    intf.get_values_cached(["x1", "x2", "x3"])
+    assert intf._n_reads == 7
+    assert intf.get_values_cached(["x1", "x3"]) == {"x1": 0, "x3": 0}
+    assert intf._n_reads == 7  # served from the cache
+    intf.get_values_cached(["x2"])
+    assert intf._n_reads == 8  # never cached
+
+    # Expired values are read again
+    time.sleep(0.05)
+    intf.get_values_cached(["x1", "x3"])
+    assert intf._n_reads == 9
+
+    # Readback after set
+    intf.set_values({"x1": 1})
+    assert intf.get_values_cached(["x1"]) == {"x1": 0}
+    assert intf.get_values_cached(["x1"], bypass=True) == {"x1": 1}
+    assert intf._n_reads == 10
+
+    # Subscribed channels are kept up to date by the pushed updates
+    intf.enable_cache(ttl=0)
+    assert intf.get_values_cached(["m1"]) == {"m1": 0}
+    intf.update_cache({"m1": 2})
+    assert intf.get_values_cached(["m1"]) == {"m1": 2}
+    assert intf._n_reads == 11
+
+    intf.invalidate_cache(["m1"])
+    assert intf.get_values_cached(["m1"]) == {"m1": 0}
+    assert intf._n_reads == 12
+
+    intf.disable_cache()
+    intf.get_values_cached(["m1"])
+    assert intf._n_reads == 13
+
+
+def test_env_cache_invalidation():
+    from badger.factory import get_env
+
+    Environment, configs = get_env("test")
+    from badger.environment import instantiate_env
+
+    env = instantiate_env(Environment, configs)
+    env.interface.enable_cache(ttl=60)
+
+    assert env._get_variables(["x1"]) == {"x1": 0}
+    env.interface._states["x1"] = 0.5  # changed behind the cache
+    assert env._get_variables(["x1"]) == {"x1": 0}
+
+    # Setting the variables invalidates the cache
+    env._set_variables({"x2": 0.3})
+    assert env._get_variables(["x1", "x2"]) == {"x1": 0.5, "x2": 0.3}
+
+
+def test_env_readbacks_bypass_cache():
+    from badger.factory import get_env
+
+    Environment, configs = get_env("test")
+    from badger.environment import instantiate_env
+
+    env = instantiate_env(Environment, configs)
+    env.interface.enable_cache(ttl=60)
+
+    assert env._get_variables(["x1"]) == {"x1": 0}
+    assert env._get_observables(["f"]) == {"f": 0}
+    env.interface._states.update({"x1": 0.5, "f": 1})  # behind the cache
+
+    # The readbacks are always read from the machine, without dropping the
+    # cached values of the other channels
+    assert env.get_readbacks(["x1"]) == {"x1": 0.5}
+    assert env._get_variables(["x1"]) == {"x1": 0.5}
+    assert env._get_observables(["f"]) == {"f": 0}
+
+
 # def test_run(mock_config_root):
 #     from coolname import generate_slug
 #     from badger.log import config_log
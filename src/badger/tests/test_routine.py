@@ -44,6 +44,26 @@ class TestRoutine:
         routine_re = Routine.from_yaml(routine_str)
         assert routine_re.environment.flag == 1
 
+    def test_routine_sorted_data(self):
+        from badger.tests.utils import create_routine
+
+        routine = create_routine()
+        routine.random_evaluate(3)
+
+        # No copy while data does not change
+        sorted_data = routine.sorted_data
+        assert sorted_data is routine.data
+        assert routine.sorted_data is sorted_data
+
+        routine.random_evaluate(2)
+        assert len(routine.sorted_data) == 5
+
+        # Shuffled string index (e.g. data loaded from a yaml file)
+        routine.data = routine.data.set_axis(
+            ["3", "0", "4", "1", "2"]).iloc[[1, 3, 4, 0, 2]]
+        assert list(routine.sorted_data.index) == [0, 1, 2, 3, 4]
+        assert routine.sorted_data is routine.sorted_data
+
     @pytest.fixture(scope="module", autouse=True)
     def clean_up(self):
         yield
@@ -81,3 +81,24 @@ def test_ui_update(qtbot):
     window.refresh_ui(routine)
 
     assert window.generator_box.edit.toPlainText() == "{}\n"
+
+
+def test_warm_start_generator(qtbot):
+    # only the Bayesian generators can be warm started
+    from badger.gui.default.components.routine_page import BadgerRoutinePage
+
+    window = BadgerRoutinePage()
+    qtbot.addWidget(window)
+    qtbot.keyClicks(window.env_box.cb, "test")
+    window.env_box.var_table.cellWidget(0, 0).setChecked(True)
+    window.env_box.obj_table.cellWidget(0, 0).setChecked(True)
+    window.generator_box.check_warm_start.setChecked(True)
+
+    qtbot.keyClicks(window.generator_box.cb, "upper_confidence_bound")
+    assert window.generator_box.check_warm_start.isEnabled()
+    assert window._compose_routine().warm_start is not None
+
+    window.generator_box.cb.setCurrentIndex(
+        window.generators.index("neldermead"))
+    assert not window.generator_box.check_warm_start.isEnabled()
+    assert window._compose_routine().warm_start is None
@@ -1,3 +1,9 @@
+def stuck_worker(*args):
+    # A worker stuck in the interface I/O
+    import time
+    time.sleep(600)
+
+
 
 class TestRoutineRunner:
     def test_routine_runner(self, qtbot):
@@ -13,3 +19,116 @@ class TestRoutineRunner:
         assert len(runner.routine.data) == 2
 
         # TODO: check for signal emit message
+
+    def test_process_runner(self, qtbot):
+        from badger.gui.default.components.routine_runner import \
+            BadgerRoutineProcessRunner
+        from badger.tests.utils import create_routine
+
+        routine = create_routine()
+
+        runner = BadgerRoutineProcessRunner(routine, False)
+        runner.set_termination_condition({"tc_idx": 0, "max_eval": 3})
+
+        progress = []
+        finished = []
+        runner.signals.progress.connect(progress.append)
+        runner.signals.finished.connect(lambda: finished.append(True))
+        runner.signals.error.connect(lambda e: print(e))
+
+        # The rows evaluated in the worker process end up in the routine
+        runner.run()
+        assert finished
+        assert len(runner.routine.data) == 3
+        assert sum(len(data) for data in progress) == 3
+        assert set(routine.vocs.all_names) <= set(runner.routine.data.columns)
+
+    def test_process_runner_stop(self, qtbot):
+        from badger.gui.default.components.routine_runner import \
+            BadgerRoutineProcessRunner
+        from badger.tests.utils import create_routine
+
+        routine = create_routine()
+
+        runner = BadgerRoutineProcessRunner(routine, False)
+        runner.stop_routine()  # queued before the worker starts
+
+        info = []
+        runner.signals.info.connect(info.append)
+        runner.run()
+        assert info
+        assert len(runner.routine.data) <= 1  # only the initial point
+
+    def test_process_runner_stuck(self, qtbot, monkeypatch):
+        import threading
+        import time
+        from badger.gui.default.components import routine_runner
+        from badger.tests.utils import create_routine
+
+        monkeypatch.setattr(routine_runner, "run_routine_worker", stuck_worker)
+        runner = routine_runner.BadgerRoutineProcessRunner(
+            create_routine(), False)
+        runner.exit_timeout = 0.5
+
+        info = []
+        finished = []
+        runner.signals.info.connect(info.append)
+        runner.signals.finished.connect(lambda: finished.append(True))
+        thread = threading.Thread(target=runner.run)
+        thread.start()
+        thread.join(1)
+        assert thread.is_alive()
+
+        # The worker gets terminated instead of blocking the runner forever
+        t0 = time.monotonic()
+        runner.stop_routine()
+        thread.join(10)
+        assert not thread.is_alive()
+        assert time.monotonic() - t0 < 5
+        qtbot.waitUntil(lambda: len(finished) == len(info) == 1)
+
+    def test_pause_resume(self, qtbot):
+        import threading
+        from badger.gui.default.components.routine_runner import BadgerRoutineRunner
+        from badger.tests.utils import create_routine
+
+        routine = create_routine()
+
+        runner = BadgerRoutineRunner(routine, False)
+        runner.set_termination_condition({"tc_idx": 0, "max_eval": 3})
+        runner.ctrl_routine(True)
+
+        thread = threading.Thread(target=runner.run)
+        thread.start()
+
+        # The run blocks while paused
+        thread.join(0.5)
+        assert thread.is_alive()
+        assert routine.data is None or len(routine.data) <= 1
+
+        runner.ctrl_routine(False)
+        thread.join(10)
+        assert not thread.is_alive()
+        assert len(routine.data) == 3
+
+    def test_stop_while_paused(self, qtbot):
+        import threading
+        from badger.gui.default.components.routine_runner import BadgerRoutineRunner
+        from badger.tests.utils import create_routine
+
+        routine = create_routine()
+
+        runner = BadgerRoutineRunner(routine, False)
+        runner.ctrl_routine(True)
+
+        info = []
+        runner.signals.info.connect(info.append)
+        thread = threading.Thread(target=runner.run)
+        thread.start()
+        thread.join(0.5)
+        assert thread.is_alive()
+
+        runner.stop_routine()
+        thread.join(10)
+        assert not thread.is_alive()
+        qtbot.waitUntil(lambda: len(info) == 1)
@@ -104,6 +104,125 @@ def test_plotting(qtbot):
     monitor.update_curves()
 
 
+def test_incremental_curves(qtbot):
+    monitor = create_test_run_monitor()
+    routine = monitor.routine
+    assert monitor.curve_data.size == 10
+
+    # Only the new rows are appended
+    routine.random_evaluate(3)
+    monitor.update_curves()
+    assert monitor.curve_data.size == 13
+
+    def check_curves():
+        data = routine.sorted_data
+        variable_names = routine.vocs.variable_names
+        inputs = data[variable_names]
+        if monitor.x_plot_y_axis == 1:
+            inputs = routine.vocs.normalize_inputs(data)
+        if monitor.x_plot_relative:
+            inputs = inputs - inputs.iloc[0]
+        ts = data["timestamp"].to_numpy() - data["timestamp"].iloc[0]
+        for name in variable_names:
+            x, y = monitor.curves_variable[name].getData()
+            assert np.allclose(y, inputs[name])
+            if monitor.plot_x_axis == 1:
+                assert np.allclose(x, ts)
+        _, y = monitor.curves_objective["f"].getData()
+        assert np.allclose(y, data["f"])
+
+    check_curves()
+
+    # Switching the plot mode transforms the data again
+    monitor.x_plot_y_axis = 1
+    monitor.plot_x_axis = 1
+    monitor.update_curves()
+    check_curves()
+
+    monitor.x_plot_relative = False
+    routine.random_evaluate(2)
+    monitor.update_curves()
+    check_curves()
+
+
+def test_curves_level_of_detail(qtbot):
+    monitor = create_test_run_monitor()
+
+    # The monitor draws the level of detail itself, see redraw_curves
+    curve = monitor.curves_objective["f"]
+    assert not curve.opts["autoDownsample"]
+    assert not curve.opts["clipToView"]
+
+    # Switching the x-axis doesn't transform the data again
+    display = monitor.curve_display.data
+    monitor.select_x_axis(1)
+    assert np.shares_memory(monitor.curve_display.data, display)
+    x, _ = monitor.curves_variable["x0"].getOriginalDataset()
+    assert np.allclose(x, display[:, 0])
+
+    monitor.select_x_axis(0)
+    assert np.shares_memory(monitor.curve_display.data, display)
+
+
+def test_redraw_cost(qtbot):
+    import pandas as pd
+    import pyqtgraph as pg
+    from badger.gui.default.components.run_monitor import CURVE_RESOLUTION
+
+    monitor = create_test_run_monitor(add_data=False)
+    qtbot.addWidget(monitor)
+    routine = monitor.routine
+
+    n = 20 * CURVE_RESOLUTION + 7
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(rng.uniform(-1, 1, (n, 6)),
+                        columns=["x0", "x1", "x2", "x3", "f", "c"])
+    data["timestamp"] = np.arange(n, dtype=float)
+    routine.data = data
+
+    set_data = pg.PlotDataItem.setData
+    with patch.object(pg.PlotDataItem, "setData", autospec=True,
+                      side_effect=set_data) as redraw:
+        monitor.update_curves()
+        # All the curves, with at most 2 points (min and max) per bucket
+        assert redraw.call_count == 6
+        for call in redraw.call_args_list:
+            _, x, y = call.args
+            assert len(x) == len(y) <= 2 * CURVE_RESOLUTION
+
+        # The extremes are kept
+        x, y = monitor.curves_objective["f"].getOriginalDataset()
+        assert x[0] == 0 and x[-1] > n - n / CURVE_RESOLUTION
+        assert y.max() == data["f"].max() and y.min() == data["f"].min()
+
+        # Nothing changed in view, nothing to draw again
+        redraw.reset_mock()
+        monitor.redraw_curves()
+        monitor.view_range_changed()
+        assert redraw.call_count == 0
+
+        # One more row, drawn
+        routine.data = pd.concat([data, data.tail(1)], ignore_index=True)
+        monitor.update_curves()
+        assert redraw.call_count == 6
+
+        # Zoomed in: all the rows in view
+        redraw.reset_mock()
+        monitor.plot_obj.setXRange(1000, 1100, padding=0)
+        monitor.redraw_curves()
+        assert redraw.call_count == 6
+        x, y = monitor.curves_objective["f"].getOriginalDataset()
+        assert x[0] == 999 and x[-1] == 1101
+        assert np.array_equal(y, data["f"].iloc[999:1102])
+
+        # Back to the whole run
+        monitor.enable_auto_range()
+        monitor.redraw_curves()
+        x, y = monitor.curves_objective["f"].getOriginalDataset()
+        assert len(x) <= 2 * CURVE_RESOLUTION
+        assert x[0] == 0 and x[-1] > n - n / CURVE_RESOLUTION
+
+
 def test_click_graph(qtbot, mocker):
     monitor = create_test_run_monitor()
     sig_inspect_spy = QSignalSpy(monitor.sig_inspect)
@@ -233,9 +352,10 @@ def test_y_axis_specification(qtbot):
 def test_pause_play(qtbot):
     monitor = create_test_run_monitor(add_data=False)
 
+    # Run long enough to be paused and resumed
     monitor.termination_condition = {
-        "tc_idx": 0,
-        "max_eval": 10,
+        "tc_idx": 1,
+        "max_time": 2,
     }
     spy = QSignalSpy(monitor.sig_pause)
 
@@ -370,6 +490,10 @@ def test_run_until(qtbot):
 
     assert len(monitor.routine.data) == 5
 
+    # The time breakdown of the steps is shown and archived with the run
+    assert monitor.routine_runner.trace.records
+    assert monitor.timing_panel.text().startswith('Step')
+
 
 def test_add_extensions(qtbot):
     from badger.gui.default.components.analysis_extensions import ParetoFrontViewer
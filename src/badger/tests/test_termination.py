@@ -0,0 +1,133 @@
+import time
+
+import pytest
+
+
+def test_parse_termination_condition():
+    from badger.errors import BadgerConfigError
+    from badger.termination import parse_termination_condition, \
+        TC_IMPROVEMENT_RATE
+
+    condition = parse_termination_condition("ftol=0.01, window=5")
+    assert condition["tc_idx"] == TC_IMPROVEMENT_RATE
+    assert condition["ftol"] == 0.01
+    assert condition["window"] == 5
+
+    with pytest.raises(BadgerConfigError):
+        parse_termination_condition("window=5")
+    with pytest.raises(BadgerConfigError):
+        parse_termination_condition("max_eval=five")
+
+
+def test_convergence_conditions():
+    from badger.tests.utils import create_routine
+    from badger.termination import TerminationChecker, \
+        parse_termination_condition
+
+    routine = create_routine()
+    routine.random_evaluate(30)
+    data = routine.sorted_data
+
+    # Reference values from the full data
+    best = data["f"].where(data["c"] > 0).cummax()
+    improved = best.diff().gt(0)
+    improved.iloc[0] = best.notna().iloc[0]
+    n_last_improvement = int(improved.to_numpy().nonzero()[0][-1]) + 1
+    stall = len(data) - n_last_improvement
+
+    checker = TerminationChecker(
+        parse_termination_condition(f"max_stall={stall}"))
+    assert checker.check(routine)
+    assert checker.n_last_improvement == n_last_improvement
+    checker = TerminationChecker(
+        parse_termination_condition(f"max_stall={stall + 1}"))
+    assert not checker.check(routine)
+    routine.random_evaluate(1)
+    assert checker.check(routine) == (checker.n_last_improvement != 31)
+    assert checker.n_seen == 31  # updated incrementally
+    best = routine.sorted_data["f"].where(routine.sorted_data["c"] > 0).cummax()
+
+    checker = TerminationChecker(
+        parse_termination_condition(f"target={best.iloc[-1]}"))
+    assert checker.check(routine)
+    checker = TerminationChecker(
+        parse_termination_condition(f"target={best.iloc[-1] + 1}"))
+    assert not checker.check(routine)
+
+    # Improvement of the best over the last 10 evaluations
+    improvement = best.iloc[-1] - best.iloc[-11]
+    checker = TerminationChecker(
+        parse_termination_condition(f"ftol={improvement},window=10"))
+    assert checker.check(routine)
+    if improvement > 0:
+        checker = TerminationChecker(
+            parse_termination_condition(f"ftol={improvement / 2},window=10"))
+        assert not checker.check(routine)
+
+    checker = TerminationChecker(
+        parse_termination_condition("max_time=0.1"), time.time())
+    assert not checker.check(routine)
+    time.sleep(0.1)
+    assert checker.check(routine)
+
+
+def test_uncertainty_condition():
+    from badger.tests.utils import create_routine_turbo
+    from badger.termination import TerminationChecker, posterior_std, \
+        parse_termination_condition
+
+    routine = create_routine_turbo()
+    routine.random_evaluate(5)
+    assert posterior_std(routine) is None  # no model yet
+
+    routine.generator.train_model()
+    std = posterior_std(routine)
+    assert std >= 0
+
+    checker = TerminationChecker(
+        parse_termination_condition(f"max_std={std + 1e-6}"))
+    assert checker.check(routine)
+    checker = TerminationChecker(
+        parse_termination_condition(f"max_std={std / 2}"))
+    assert not checker.check(routine) or std == 0
+
+
+def test_multi_objective_conditions():
+    from badger.errors import BadgerConfigError
+    from badger.tests.utils import create_multiobjective_routine
+    from badger.termination import TerminationChecker, \
+        parse_termination_condition
+
+    routine = create_multiobjective_routine()
+    routine.random_evaluate(5)
+    vocs = routine.vocs
+
+    # No best objective value to follow on a Pareto front
+    for spec in ["ftol=0.01", "target=1"]:
+        with pytest.raises(BadgerConfigError):
+            parse_termination_condition(spec, vocs)
+        checker = TerminationChecker(parse_termination_condition(spec))
+        with pytest.raises(BadgerConfigError):
+            checker.check(routine)
+
+    checker = TerminationChecker(
+        parse_termination_condition("max_stall=100", vocs))
+    assert not checker.check(routine)
+
+
+def test_termination_dialog_multi_objective(qtbot):
+    from badger.gui.default.windows.terminition_condition_dialog import \
+        BadgerTerminationConditionDialog
+    from badger.tests.utils import create_multiobjective_routine
+    from badger.termination import TC_MAX_EVAL, TC_TARGET, \
+        SINGLE_OBJECTIVE_CONDITIONS
+
+    vocs = create_multiobjective_routine().vocs
+    dlg = BadgerTerminationConditionDialog(
+        None, lambda _: None, lambda _: None, {"tc_idx": TC_TARGET}, vocs)
+    qtbot.addWidget(dlg)
+
+    assert dlg.configs["tc_idx"] == TC_MAX_EVAL
+    assert dlg.cb.currentIndex() == TC_MAX_EVAL
+    for i in SINGLE_OBJECTIVE_CONDITIONS:
+        assert not dlg.cb.model().item(i).isEnabled()
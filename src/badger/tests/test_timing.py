@@ -0,0 +1,99 @@
+import json
+import os
+import time
+
+import pytest
+
+from badger.errors import BadgerRunTerminatedError
+
+
+def test_phase_nesting():
+    from badger.timing import PhaseTimer, phase
+
+    # Nothing is recorded without an active timer
+    with phase('generate'):
+        pass
+
+    with PhaseTimer() as timer:
+        with phase('callbacks'):
+            time.sleep(0.05)
+            with phase('dump'):
+                time.sleep(0.1)
+        with phase('callbacks'):
+            pass
+
+    # The nested phase is only counted once, in the inner one
+    assert set(timer.durations) == {'callbacks', 'dump'}
+    assert 0.05 <= timer.durations['callbacks'] < 0.1
+    assert timer.durations['dump'] >= 0.1
+    assert sum(timer.durations.values()) <= timer.elapsed
+
+
+def test_record_value():
+    from badger.timing import PhaseTimer, record_value
+
+    with PhaseTimer() as timer:
+        # e.g. candidates generated twice in a step
+        record_value('n_train', 10)
+        record_value('n_train', 12)
+
+    assert timer.values == {'n_train': 12}
+    assert 'n_train' not in timer.durations
+
+
+def test_evaluation_timing_columns():
+    from badger.tests.utils import create_routine
+    from badger.timing import EVALUATION_PHASES, TIMING_PREFIX
+
+    routine = create_routine()
+    routine.random_evaluate(3)
+
+    for name in EVALUATION_PHASES:
+        assert (routine.data[TIMING_PREFIX + name] >= 0).all()
+
+
+def test_run_trace(tmp_path):
+    from badger.core import run_routine
+    from badger.tests.utils import create_routine
+    from badger.timing import RunTrace
+
+    routine = create_routine()
+    trace_file = os.path.join(tmp_path, 'trace.jsonl')
+    records = []
+    trace = RunTrace(trace_file, on_step=records.append)
+    n_init = len(routine.initial_points)
+    n_evals = 0
+
+    def active_callback():
+        return 2 if n_evals >= n_init + 2 else 0
+
+    def evaluate_callback(data):
+        nonlocal n_evals
+        n_evals += len(data)
+        trace.add('gui_update', 0.5)  # reported by another thread
+
+    with pytest.raises(BadgerRunTerminatedError):
+        run_routine(routine, active_callback, lambda _: None,
+                    evaluate_callback, None, trace=trace)
+
+    # One step per initial point, the terminated step is not recorded
+    assert len(trace.records) == n_init + 2
+    assert records == trace.records
+    for i, record in enumerate(trace.records):
+        assert record['step'] == i
+        assert record['n_points'] == 1
+        phases = ['evaluate', 'add_data', 'callbacks', 'set_variables',
+                  'get_observables']
+        if i >= n_init:
+            phases += ['status', 'generate']
+        for name in phases:
+            assert record[name] >= 0
+        # the time reported during a step is added to it once done
+        assert record['gui_update'] == 0.5
+        # the size of the training set, apart from the durations
+        assert 'n_train' not in record
+        if i >= n_init:
+            assert record['values'] == {'n_train': i}
+
+    with open(trace_file) as f:
+        assert [json.loads(line) for line in f] == trace.records
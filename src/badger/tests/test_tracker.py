@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from xopt import VOCS
+
+
+def test_single_objective():
+    from badger.tests.utils import create_routine
+
+    routine = create_routine()
+    for _ in range(5):
+        routine.random_evaluate(4)
+        best_idx, best_value = routine.vocs.select_best(routine.sorted_data)
+        tracker = routine.tracker
+        assert tracker.n_seen == len(routine.data)
+        assert tracker.best_index == best_idx[0]
+        assert tracker.best_value == best_value[0]
+        assert tracker.is_optimal(best_idx[0])
+
+    # New data, start over
+    routine.data = None
+    assert routine.tracker.best_index is None
+    routine.random_evaluate(2)
+    best_idx, _ = routine.vocs.select_best(routine.sorted_data)
+    assert routine.tracker.best_index == best_idx[0]
+
+
+def test_pareto_front():
+    from badger.tracker import BestTracker
+
+    vocs = VOCS(
+        variables={"x": [0, 1]},
+        objectives={"f1": "MINIMIZE", "f2": "MAXIMIZE"},
+        constraints={"c": ["GREATER_THAN", 0]},
+    )
+    tracker = BestTracker(vocs, reference_point={"f1": 1.0, "f2": 0.0})
+
+    rng = np.random.default_rng(1)
+    data = pd.DataFrame({
+        "x": rng.random(60),
+        "f1": rng.random(60),
+        "f2": rng.random(60),
+        "c": rng.random(60) - 0.2,
+    })
+    for end in [10, 25, 60]:
+        tracker.sync(data.iloc[:end])
+
+    # Brute force: feasible points not dominated by any other one
+    feasible = data[data["c"] > 0]
+    points = feasible[["f1", "f2"]].to_numpy() * [1, -1]
+    front = [idx for idx, p in zip(feasible.index, points)
+             if not np.any(np.all(points <= p, axis=1) &
+                           np.any(points < p, axis=1))]
+    assert sorted(tracker.front_index) == front
+    assert tracker.is_optimal(front[0])
+
+    # Grid estimate of the dominated area
+    grid = np.stack(np.meshgrid(np.linspace(0, 1, 400),
+                                np.linspace(-1, 0, 400)), -1).reshape(-1, 2)
+    pts = feasible.loc[front, ["f1", "f2"]].to_numpy() * [1, -1]
+    dominated = np.any(np.all(pts[None] <= grid[:, None], axis=2), axis=1)
+    assert tracker.hypervolume == pytest.approx(dominated.mean(), abs=0.01)
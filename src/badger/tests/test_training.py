@@ -0,0 +1,32 @@
+def test_training_window():
+    from badger.tests.utils import create_routine, create_routine_turbo
+    from badger.training import TrainingWindow
+
+    routine = create_routine()
+    routine.random_evaluate(30)
+    data = routine.sorted_data
+
+    window = TrainingWindow(policy="recent", size=10)
+    assert window.select(routine).index.tolist() == list(range(20, 30))
+
+    window = TrainingWindow(policy="best_recent", size=10, n_best=5)
+    selected = window.select(routine)
+    feasible = data[data["c"] > 0]
+    best = feasible["f"].nlargest(5).index
+    assert set(selected.index) == set(range(20, 30)) | set(best)
+
+    window = TrainingWindow(policy="trust_region", size=10)
+    selected = window.select(routine)
+    assert len(selected) == 10
+    assert routine.tracker.best_index in selected.index
+
+    # Only the models refit on all the data are bounded
+    routine.training_window = TrainingWindow(policy="recent", size=10)
+    routine.random_evaluate(1)
+    assert len(routine.generator.data) == 31
+
+    routine = create_routine_turbo()
+    routine.training_window = TrainingWindow(policy="recent", size=10)
+    routine.random_evaluate(15)
+    assert len(routine.data) == 15
+    assert routine.generator.data.index.tolist() == list(range(5, 15))
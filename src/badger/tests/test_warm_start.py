@@ -0,0 +1,112 @@
+def create_bayesian_routine():
+    from badger.tests.utils import create_routine
+    from xopt.generators.bayesian import UpperConfidenceBoundGenerator
+
+    routine = create_routine()
+    routine.generator = UpperConfidenceBoundGenerator(
+        vocs=routine.vocs,
+        gp_constructor={"name": "standard", "use_low_noise_prior": True})
+
+    return routine
+
+
+def test_warm_start():
+    from badger.archive import archive_run, delete_run
+    from badger.db import find_compatible_runs
+    from badger.tests.utils import create_routine, fix_db_path_issue
+    from badger.warm_start import WarmStart
+
+    fix_db_path_issue()
+
+    routine = create_routine()
+    routine.random_evaluate(10)
+    run = archive_run(routine)
+
+    variables = {f"x{i}": [-1, 1] for i in range(4)}
+    records = find_compatible_runs("test", variables, ["f", "c"])
+    assert [r["filename"] for r in records] == [run["filename"]]
+    # Different variables, non-overlapping bounds, missing outputs
+    assert not find_compatible_runs("test", {"x0": [-1, 1]})
+    assert not find_compatible_runs("test", variables | {"x0": [2, 3]})
+    assert not find_compatible_runs("test", variables, ["g"])
+
+    new_routine = create_bayesian_routine()
+    new_routine.vocs.variables["x0"] = [0, 1]
+    new_routine.warm_start = WarmStart()
+    n_points = new_routine.preload_warm_start()
+
+    # Only the points within the new bounds are loaded
+    in_bounds = routine.data[routine.data["x0"] >= 0]
+    assert n_points == len(in_bounds)
+    assert new_routine.data is None
+    generator_data = new_routine.generator.data
+    assert generator_data.index.tolist() == list(range(-n_points, 0))
+    assert generator_data["f"].tolist() == in_bounds["f"].tolist()
+
+    # The new points come after the archived ones
+    new_routine.random_evaluate(2)
+    assert len(new_routine.generator.data) == n_points + 2
+    assert len(new_routine.training_data) == n_points + 2
+
+    delete_run(run["filename"])
+    assert not find_compatible_runs("test", variables)
+
+
+def test_warm_start_rerun():
+    import pytest
+    from badger.archive import archive_run
+    from badger.core import run_routine
+    from badger.errors import BadgerRunTerminatedError
+    from badger.tests.utils import fix_db_path_issue
+    from badger.warm_start import WarmStart
+
+    fix_db_path_issue()
+
+    routine = create_bayesian_routine()
+    routine.warm_start = WarmStart()
+
+    def run():
+        # Same as the routine runners: reset the data and run
+        routine.data = None
+        with pytest.raises(BadgerRunTerminatedError):
+            run_routine(
+                routine,
+                lambda: 0 if routine.data is None or len(routine.data) < 5
+                else 2,
+                lambda candidates: None, lambda points: None,
+                lambda states: None)
+        archive_run(routine)
+
+    run()
+    n_first = len(routine.data)
+    assert len(routine.generator.data) == n_first
+
+    run()
+    # The archived points of the first run, then the points of the second
+    # one, only once
+    data = routine.generator.data
+    assert len(data) == n_first + len(routine.data)
+    assert data.index.tolist() == \
+        list(range(-n_first, 0)) + routine.data.index.tolist()
+
+
+def test_warm_start_not_bayesian():
+    from badger.archive import archive_run, delete_run
+    from badger.tests.utils import create_routine, fix_db_path_issue
+    from badger.warm_start import WarmStart
+    from xopt.generators.scipy.neldermead import NelderMeadGenerator
+
+    fix_db_path_issue()
+
+    routine = create_routine()
+    routine.random_evaluate(3)
+    run = archive_run(routine)
+
+    new_routine = create_routine()
+    new_routine.generator = NelderMeadGenerator(vocs=new_routine.vocs)
+    new_routine.warm_start = WarmStart()
+    # The archived points would be taken as simplex steps
+    assert new_routine.preload_warm_start() == 0
+    assert new_routine.generator.data is None
+
+    delete_run(run["filename"])
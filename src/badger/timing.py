@@ -0,0 +1,206 @@
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, List
+
+from pandas import DataFrame
+
+try:  # spans are only emitted if OpenTelemetry is installed
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+# Prefix of the extra data columns holding the time spent in each evaluation
+# phase of a point, in seconds
+TIMING_PREFIX = 'badger_time_'
+
+# Phases of an optimization step
+STEP_PHASES = ['status', 'generate', 'evaluate', 'add_data', 'callbacks',
+               'dump', 'gui_update']
+# Phases of the evaluation of a point, part of the evaluate phase of a step
+EVALUATION_PHASES = ['set_variables', 'settle', 'get_observables']
+
+# Active timers of each thread, the innermost one records the phases
+_local = threading.local()
+
+# A proxy tracer, follows the tracer provider configured by the application
+_tracer = otel_trace.get_tracer('badger') if otel_trace else None
+
+
+def _span(name: str):
+    if _tracer is None:
+        return nullcontext()
+
+    return _tracer.start_as_current_span(f'badger.{name}')
+
+
+def _active_timers() -> list:
+    try:
+        return _local.timers
+    except AttributeError:
+        _local.timers = []
+        return _local.timers
+
+
+class PhaseTimer:
+    """
+    Accumulate the wall-clock time spent in each phase. While the timer is
+    active (used as a context manager), the `phase` blocks run by the same
+    thread are recorded in it. Phases are exclusive: the time spent in a
+    phase nested in another one is only counted in the inner one.
+
+    The other values of the step (see `record_value`) are kept apart, in
+    `values`.
+    """
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+        self.values: Dict[str, float] = {}
+        self.elapsed = 0.0
+        self._start = None
+        self._open = []  # time spent in the children of the open phases
+
+    def __enter__(self):
+        _active_timers().append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self._start
+        _active_timers().remove(self)
+        return False
+
+    def add(self, name: str, seconds: float):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Time the block as phase `name` of the innermost active timer of the
+    current thread (nothing is recorded if there is none), and wrap it in an
+    OpenTelemetry span if available.
+    """
+    timers = _active_timers()
+    timer = timers[-1] if timers else None
+
+    with _span(name):
+        if timer is None:
+            yield
+            return
+
+        start = time.perf_counter()
+        timer._open.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            timer.add(name, elapsed - timer._open.pop())
+            if timer._open:
+                timer._open[-1] += elapsed
+
+
+def record_evaluation(result: DataFrame):
+    """
+    Add the evaluation phases of the evaluated points (the TIMING_PREFIX
+    columns of result, summed over the points) to the innermost active timer
+    of the current thread.
+    """
+    timers = _active_timers()
+    if not timers:
+        return
+
+    timer = timers[-1]
+    timer.add('n_points', len(result))
+    for col in result.columns:
+        if col.startswith(TIMING_PREFIX):
+            # nan if the point has been evaluated in a batch by the env
+            timer.add(col[len(TIMING_PREFIX):], float(result[col].sum()))
+
+
+def record_value(name: str, value: float):
+    # Set a value of the step (e.g. the size of the training set) in the
+    # innermost active timer of the current thread, the last one set wins
+    timers = _active_timers()
+    if timers:
+        timers[-1].values[name] = value
+
+
+def timing_columns(durations: Dict[str, float]) -> Dict[str, float]:
+    # Evaluation phases -> extra data columns
+    return {TIMING_PREFIX + name: durations.get(name, 0.0)
+            for name in EVALUATION_PHASES}
+
+
+class RunTrace:
+    """
+    Timing trace of a run, one record per optimization step with the start
+    time and total duration of the step, the time spent in each of its
+    phases (see STEP_PHASES) and the number of points evaluated in it, with
+    the time spent in their evaluation phases (see EVALUATION_PHASES,
+    included in the evaluate phase). The other values of the step (see
+    `record_value`) are under 'values'.
+
+    The records are appended to trace_file as JSON lines (if given) and
+    passed to on_step as soon as the step is done.
+    """
+
+    def __init__(self, trace_file: str = None,
+                 on_step: Callable[[dict], None] = None):
+        self.records: List[dict] = []
+        self.trace_file = trace_file
+        self.on_step = on_step
+
+        # time reported by other threads, added to the next step done
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @property
+    def last(self) -> dict:
+        with self._lock:
+            return self.records[-1] if self.records else None
+
+    @contextmanager
+    def step(self):
+        """Time an optimization step, recorded if it's done without error"""
+        timestamp = time.time()
+        with _span('step'), PhaseTimer() as timer:
+            yield timer
+
+        self.add_step({
+            'step': len(self.records),
+            'timestamp': timestamp,
+            'total': timer.elapsed,
+            **timer.durations,
+            'values': timer.values,
+        })
+
+    def add(self, name: str, seconds: float):
+        """
+        Add time spent in phase `name` outside of the thread running the
+        steps (the GUI updates for example). Thread safe.
+        """
+        with self._lock:
+            self._pending[name] = self._pending.get(name, 0.0) + seconds
+
+    def add_step(self, record: dict):
+        with self._lock:
+            for name, seconds in self._pending.items():
+                record[name] = record.get(name, 0.0) + seconds
+            self._pending = {}
+            record['step'] = len(self.records)
+            self.records.append(record)
+
+        if self.trace_file:
+            with open(self.trace_file, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+        if self.on_step:
+            self.on_step(record)
+
+    def dump(self, filename: str):
+        """Write all the records to filename as JSON lines"""
+        with self._lock:
+            lines = [json.dumps(record) + '\n' for record in self.records]
+        with open(filename, 'w') as f:
+            f.writelines(lines)
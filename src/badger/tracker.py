@@ -0,0 +1,145 @@
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from xopt import VOCS
+
+
+class BestTracker:
+    """
+    Running optimum of the evaluated points, updated incrementally with the
+    points added since the last `sync`, only the feasible points are
+    considered.
+
+    For single-objective problems it's the best point, as in
+    `VOCS.select_best`. For multi-objective problems it's the set of the
+    non-dominated points (Pareto front), and its hypervolume if a reference
+    point is given.
+    """
+
+    def __init__(self, vocs: VOCS, reference_point: Dict[str, float] = None):
+        self.vocs = vocs
+        self.reference_point = reference_point
+
+        # Objectives as minimization: sign of each objective
+        self._signs = np.array([
+            1.0 if vocs.objectives[name] == 'MINIMIZE' else -1.0
+            for name in vocs.objective_names])
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.n_seen = 0
+        self._first = None  # label of the first point, to detect new data
+        self.best_index = None
+        self.best_value = None
+        self._front_index = []
+        self._front = np.empty((0, len(self._signs)))
+        self._hypervolume = None
+
+    @property
+    def is_multi_objective(self) -> bool:
+        return len(self._signs) > 1
+
+    @property
+    def front_index(self) -> List:
+        """Labels of the points on the Pareto front, in evaluation order"""
+        return list(self._front_index)
+
+    def is_optimal(self, idx) -> bool:
+        if self.is_multi_objective:
+            return idx in self._front_index
+
+        return self.best_index is not None and idx == self.best_index
+
+    def sync(self, data: Optional[pd.DataFrame]):
+        """
+        Update with the points of data not seen yet, data being the sorted
+        data of the routine. Start over if it's not the data seen so far
+        plus new points.
+        """
+        with self._lock:
+            if data is None or not len(data):
+                if self.n_seen:
+                    self.reset()
+                return
+
+            if len(data) < self.n_seen or data.index[0] != self._first:
+                self.reset()
+                self._first = data.index[0]
+
+            if len(data) > self.n_seen:
+                self._update(data.iloc[self.n_seen:])
+                self.n_seen = len(data)
+
+    def _update(self, new_data: pd.DataFrame):
+        feasible = self.vocs.feasibility_data(new_data)['feasible']
+        new_data = new_data[feasible.to_numpy(dtype=bool)]
+        values = new_data[self.vocs.objective_names].to_numpy(dtype=float)
+        values = values * self._signs
+        keep = ~np.isnan(values).any(axis=1)
+        labels, values = new_data.index[keep], values[keep]
+        if not len(values):
+            return
+
+        if not self.is_multi_objective:
+            i = int(np.argmin(values[:, 0]))  # first one among ties
+            value = values[i, 0]
+            if self.best_value is None or \
+                    value < self.best_value * self._signs[0]:
+                self.best_index = labels[i]
+                self.best_value = float(value * self._signs[0])
+            return
+
+        changed = False
+        for label, point in zip(labels, values):
+            front = self._front
+            if np.any(np.all(front <= point, axis=1)):  # dominated or equal
+                continue
+
+            kept = ~np.all(point <= front, axis=1)
+            self._front = np.vstack([front[kept], point])
+            self._front_index = [idx for idx, k in
+                                 zip(self._front_index, kept) if k]
+            self._front_index.append(label)
+            changed = True
+
+        if changed:
+            self._hypervolume = None
+
+    @property
+    def hypervolume(self) -> Optional[float]:
+        """
+        Hypervolume of the Pareto front w.r.t. the reference point (None if
+        not given), only the points better than the reference count.
+        """
+        if not self.is_multi_objective or self.reference_point is None:
+            return None
+
+        with self._lock:
+            if self._hypervolume is None:
+                self._hypervolume = self._compute_hypervolume()
+
+            return self._hypervolume
+
+    def _compute_hypervolume(self) -> float:
+        ref = np.array([self.reference_point[name]
+                        for name in self.vocs.objective_names])
+        ref = ref * self._signs
+        front = self._front[np.all(self._front < ref, axis=1)]
+        if not len(front):
+            return 0.0
+
+        if front.shape[1] == 2:  # sum of the rectangles, sorted along x
+            front = front[np.argsort(front[:, 0])]
+            widths = np.diff(np.append(front[:, 0], ref[0]))
+            heights = ref[1] - front[:, 1]
+            return float(np.sum(widths * heights))
+
+        import torch
+        from botorch.utils.multi_objective.hypervolume import Hypervolume
+
+        # botorch maximizes
+        hv = Hypervolume(ref_point=-torch.tensor(ref))
+        return float(hv.compute(-torch.tensor(front)))
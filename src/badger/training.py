@@ -0,0 +1,84 @@
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, Field
+
+# Training data policies, by name as shown in the routine editor
+TRAINING_POLICIES = {
+    'recent': 'Recent',
+    'best_recent': 'Best + recent',
+    'trust_region': 'Trust region',
+}
+
+
+class TrainingWindow(BaseModel):
+    """
+    Bounded training set of the generator model. The routine data keeps (and
+    archives) all the evaluated points, while the generator only gets the
+    selected ones, so the cost of a model fit doesn't grow with the run.
+
+    - recent: the last `size` points
+    - best_recent: the `n_best` best points plus the last `size` ones
+    - trust_region: the `size` points closest to the best one (normalized
+      variable space), so the model is accurate where it matters most
+    """
+
+    policy: Literal['recent', 'best_recent', 'trust_region'] = Field('recent')
+    size: int = Field(200, ge=1, description="Number of recent (or closest to the best) points")
+    n_best: int = Field(20, ge=0, description="Number of best points kept in addition to the recent ones")
+
+    def select(self, routine, data: pd.DataFrame = None) -> pd.DataFrame:
+        """Training set of the generator, from the routine data by default"""
+        if data is None:
+            data = routine.sorted_data
+        if data is None or len(data) <= self.size:
+            return data
+
+        if self.policy == 'recent':
+            return data.iloc[-self.size:]
+
+        if self.policy == 'best_recent':
+            keep = data.index[-self.size:].union(
+                self.best_points(routine, data))
+            return data.loc[keep]
+
+        tracker = routine.tracker
+        if tracker.is_multi_objective:
+            best = tracker.front_index
+        elif tracker.best_index is not None:
+            best = [tracker.best_index]
+        else:  # no feasible point yet
+            best = []
+        if not best:
+            return data.iloc[-self.size:]
+
+        # distance to the closest best point, in normalized variable space
+        vocs = routine.vocs
+        lb, ub = vocs.bounds
+        x = (data[vocs.variable_names].to_numpy(dtype=float) - lb) / (ub - lb)
+        x_best = x[data.index.get_indexer(best)]
+        dist = np.min(np.linalg.norm(x[:, None] - x_best[None], axis=2),
+                      axis=1)
+        closest = np.sort(np.argsort(dist, kind='stable')[:self.size])
+
+        return data.iloc[closest]
+
+    def best_points(self, routine, data: pd.DataFrame) -> pd.Index:
+        # The n_best best feasible points, the latest points of the Pareto
+        # front for multi-objective problems
+        if not self.n_best:
+            return data.index[:0]
+
+        vocs = routine.vocs
+        tracker = routine.tracker
+        if tracker.is_multi_objective:
+            return pd.Index(tracker.front_index[-self.n_best:])
+
+        feasible = vocs.feasibility_data(data)['feasible']
+        name = vocs.objective_names[0]
+        values = data.loc[feasible.to_numpy(dtype=bool), name]
+        if vocs.objectives[name] == 'MINIMIZE':
+            return values.nsmallest(self.n_best).index
+
+        return values.nlargest(self.n_best).index
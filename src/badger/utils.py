@@ -5,6 +5,7 @@ import sys
 import pathlib
 from datetime import datetime
 
+import pandas as pd
 import yaml
 
 from .errors import BadgerLoadConfigError
@@ -251,12 +252,58 @@ def get_value_or_none(book, key):
 
 
 def dump_state(dump_file, generator, data):
-    """dump data to file"""
+    """dump data to file, as a checkpoint (see checkpoint.Checkpoint)"""
     if dump_file is not None:
-        output = state_to_dict(generator, data)
-        with open(dump_file, "w") as f:
-            yaml.dump(output, f)
-        logger.debug(f"Dumped state to YAML file: {dump_file}")
+        from badger.checkpoint import Checkpoint
+
+        Checkpoint(dump_file).update(generator, data)
+
+
+def append_data(filename, data):
+    """Append the rows of a dataframe to a JSON-lines file, one record per row"""
+    if data is None or not len(data):
+        return
+
+    # json.dumps keeps the full float precision, unlike DataFrame.to_json
+    lines = [json.dumps(record) + "\n" for record in data.to_dict("records")]
+    with open(filename, "a") as f:
+        f.writelines(lines)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def load_data(filename):
+    """Load the rows appended by `append_data` into a dataframe"""
+    if not os.path.getsize(filename):
+        return pd.DataFrame()
+
+    # Fast columnar parsing, only fails if the file is corrupted
+    try:
+        return pd.read_json(filename, lines=True, convert_dates=False,
+                            precise_float=True, dtype=False)
+    except ValueError:
+        pass
+
+    records = []
+    with open(filename, "r") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # a partially written last record (crash during writing)
+                logger.warning(f"Skipped a corrupted record in {filename}")
+
+    return pd.DataFrame(records, dtype=float) if not records \
+        else pd.DataFrame(records)
+
+
+def count_records(filename):
+    """Count the records in a JSON-lines file, 0 if file does not exist"""
+    try:
+        with open(filename, "rb") as f:
+            return sum(1 for _ in f)
+    except FileNotFoundError:
+        return 0
 
 
 def state_to_dict(generator, data, include_data=True):
@@ -274,6 +321,16 @@ def state_to_dict(generator, data, include_data=True):
     return output
 
 
+def get_best_objective(vocs, data):
+    """Best feasible objective value in data, None if not available"""
+    try:
+        _, value = vocs.select_best(data, n=1)
+        return float(value[0])
+    except (NotImplementedError, IndexError, KeyError):
+        # multi-objective, no feasible point or no data at all
+        return None
+
+
 # https://stackoverflow.com/a/18472142
 def strtobool(val):
     """Convert a string representation of truth to true (1) or false (0).
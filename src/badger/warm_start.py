@@ -0,0 +1,69 @@
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+
+class WarmStart(BaseModel):
+    """
+    Warm start a routine with the points of the archived runs on the same
+    environment, with the same variables (bounds overlapping) and outputs.
+    The points are given to the generator before the first generation, they
+    are not part of the routine data.
+    """
+
+    max_age: Optional[float] = Field(30, gt=0, description="Only use the runs of the last max_age days, all runs if None")
+    max_runs: int = Field(10, ge=1, description="Max number of runs to load, the latest ones")
+    max_points: int = Field(1000, ge=1, description="Max number of points to load, the latest ones")
+
+    def load(self, routine) -> pd.DataFrame:
+        """
+        Points of the compatible runs within the routine bounds, as a
+        dataframe with the variables and outputs of the routine, indexed
+        from -n to -1 (oldest point first).
+        """
+        from badger.archive import get_data_filename
+        from badger.db import find_compatible_runs
+        from badger.utils import load_data
+
+        vocs = routine.vocs
+        since = None
+        if self.max_age is not None:
+            since = datetime.now() - timedelta(days=self.max_age)
+        runs = find_compatible_runs(
+            routine.environment.name,
+            {name: list(bounds) for name, bounds in vocs.variables.items()},
+            vocs.output_names, since)[:self.max_runs]
+
+        names = vocs.variable_names + vocs.output_names
+        lb, ub = vocs.bounds
+        frames = []
+        for run in reversed(runs):  # oldest first
+            data_file = os.path.join(run['path'],
+                                     get_data_filename(run['filename']))
+            try:
+                data = load_data(data_file)[names]
+            except (OSError, KeyError) as e:
+                logger.warning(
+                    f'Failed to load the data of run {run["filename"]}: {e}')
+                continue
+
+            x = data[vocs.variable_names].to_numpy(dtype=float)
+            in_bounds = np.all((x >= lb) & (x <= ub), axis=1)
+            frames.append(data[in_bounds])
+
+        if not frames:
+            return pd.DataFrame(columns=names)
+
+        points = pd.concat(frames, ignore_index=True)
+        points = points.dropna(subset=vocs.objective_names)
+        points = points.iloc[-self.max_points:]
+        points.index = np.arange(-len(points), 0)
+
+        return points
@@ -0,0 +1,151 @@
+import logging
+import time
+import traceback
+from multiprocessing.connection import Connection
+
+from pandas import DataFrame
+
+from badger.core import run_routine
+from badger.errors import BadgerRunTerminatedError
+from badger.routine import Routine
+from badger.termination import TerminationChecker
+from badger.timing import RunTrace
+
+logger = logging.getLogger(__name__)
+
+# Messages sent by the worker process, as (message, payload) tuples
+MSG_ENV_READY = 'env_ready'  # initial values of the variables
+MSG_STATES = 'states'  # system states at the start of the run
+MSG_PROGRESS = 'progress'  # newly evaluated solution(s) as a DataFrame
+MSG_TIMING = 'timing'  # timing record of an optimization step
+MSG_TERMINATED = 'terminated'  # run terminated, with the reason
+MSG_ERROR = 'error'  # run failed, with the error message
+
+# Commands accepted by the worker process, as (command, *args) tuples
+CMD_PAUSE = 'pause'  # with True to pause, False to resume
+CMD_STOP = 'stop'
+CMD_TERMINATION = 'termination'  # with the termination condition
+
+
+class RoutineWorker:
+    """
+    Run a routine in a worker process. The evaluated solutions are streamed
+    back over `data_conn`, while pause/stop/termination commands are read
+    from `cmd_conn` between the optimization steps.
+    """
+
+    def __init__(self, routine: Routine, cmd_conn: Connection,
+                 data_conn: Connection, termination_condition: dict = None):
+        self.routine = routine
+        self.cmd_conn = cmd_conn
+        self.data_conn = data_conn
+        self.termination = None
+        self.termination_condition = termination_condition
+        self.start_time = None
+
+        self.is_paused = False
+        self.is_killed = False
+
+        self.trace = RunTrace(on_step=self.step_done)
+
+    def poll_commands(self, timeout: float = 0):
+        # Apply all the pending commands, wait at most timeout for the first
+        # one (forever if None)
+        try:
+            while self.cmd_conn.poll(timeout):
+                timeout = 0
+                cmd, *args = self.cmd_conn.recv()
+                if cmd == CMD_PAUSE:
+                    self.is_paused = args[0]
+                elif cmd == CMD_STOP:
+                    self.is_killed = True
+                elif cmd == CMD_TERMINATION:
+                    self.termination_condition = args[0]
+                    self.termination = None  # start over
+                else:
+                    logger.warning(f'Unknown command {cmd} ignored')
+        except (EOFError, OSError):  # the controlling process is gone
+            self.is_killed = True
+
+    def wait_commands(self):
+        # Block on the commands while paused, until resumed or stopped
+        self.poll_commands()
+        while self.is_paused and not self.is_killed:
+            self.poll_commands(None)
+
+    def check_run_status(self):
+        self.wait_commands()
+
+        if self.termination is None:
+            self.termination = TerminationChecker(
+                self.termination_condition, self.start_time)
+        if self.termination.check(self.routine):
+            return 2
+
+        if self.is_killed:
+            return 2
+        elif self.is_paused:
+            return 1
+        else:
+            return 0
+
+    def before_evaluate(self, candidates: DataFrame):
+        self.wait_commands()
+
+        if self.is_killed:
+            raise BadgerRunTerminatedError
+
+    def after_evaluate(self, data: DataFrame):
+        self.data_conn.send((MSG_PROGRESS, data))
+
+    def step_done(self, record: dict):
+        self.data_conn.send((MSG_TIMING, record))
+
+    def states_ready(self, states):
+        self.data_conn.send((MSG_STATES, states))
+
+    def run(self):
+        self.start_time = time.time()
+
+        try:
+            var_names = self.routine.vocs.variable_names
+            var_dict = self.routine.environment._get_variables(var_names)
+            self.data_conn.send((MSG_ENV_READY, list(var_dict.values())))
+
+            self.routine.data = None  # reset data
+            run_routine(
+                self.routine,
+                active_callback=self.check_run_status,
+                generate_callback=self.before_evaluate,
+                evaluate_callback=self.after_evaluate,
+                states_callback=self.states_ready,
+                trace=self.trace
+            )
+        except BadgerRunTerminatedError as e:
+            self.data_conn.send((MSG_TERMINATED, str(e)))
+        except Exception as e:
+            traceback.print_exc()
+            self.data_conn.send((MSG_ERROR, str(e)))
+        finally:
+            self.data_conn.close()
+
+
+def run_routine_worker(routine_config: dict, cmd_conn: Connection,
+                       data_conn: Connection,
+                       termination_condition: dict = None):
+    """
+    Entry point of the worker process. The routine is instantiated from its
+    config in the worker, so the environment gets its own connection to the
+    machine there.
+    """
+    try:
+        routine = Routine(**routine_config)
+    except Exception as e:
+        traceback.print_exc()
+        data_conn.send((MSG_ERROR, f'Failed to load the routine: {e}'))
+        data_conn.close()
+        return
+
+    worker = RoutineWorker(routine, cmd_conn, data_conn,
+                           termination_condition)
+    worker.run()